@@ -6,9 +6,105 @@ FIX: Η στήλη ΚΑΛΗ_ΓΝΩΣΗ_ΕΛΛΗΝΙΚΩΝ χρησιμοποιε
 import streamlit as st
 import openpyxl
 from openpyxl.styles import Alignment, PatternFill, Font
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from openpyxl.utils import coordinate_to_tuple
+from dataclasses import asdict, dataclass, field, replace
+from typing import Callable, Dict, FrozenSet, Iterable, List, TextIO, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+import csv
+import hashlib
 import io
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import queue
+import struct
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import unicodedata
+import uuid
+import zipfile
+import xml.etree.ElementTree as ET
+
+
+# Οι τέσσερις μετρικές που ισορροπούμε (κλειδιά του calculate_spreads)
+METRICS = ('ep3', 'boys', 'girls', 'greek_yes')
+
+# Διαθέσιμοι αλγόριθμοι για το optimize()
+ENGINES = ('asymmetric', 'multi_metric', 'batched')
+
+# Προαιρετικές κινήσεις του asymmetric μετά το P8 (attributes του TeamOptimizer)
+MOVE_OPTIONS = ('mixed_moves', 'transfer_size_tolerance', 'rotations')
+
+# Objective: τρόποι σύγκρισης και όροι (όρος -> spreads που αθροίζονται, 'size' = μέγεθος τμήματος)
+OBJECTIVE_MODES = ('lexicographic', 'weighted')
+OBJECTIVE_TERMS = {
+    'ep3': ('ep3',),
+    'gender': ('boys', 'girls'),
+    'greek': ('greek_yes',),
+    'size': ('size',),
+}
+
+# Sheets με εξωτερικές προτάσεις swaps και aliases στηλών (normalized, χωρίς τόνους)
+SUGGESTION_SHEETS = ('SWAP_SUGGESTIONS', 'ΑΝΤΑΛΛΑΓΕΣ_ΑΝΑ_ΤΜΗΜΑ')
+SUGGESTION_COLUMNS = {
+    'from_team': ('ΑΠΟΤΜΗΜΑ', 'ΑΠΟ', 'ΤΜΗΜΑΑ', 'ΤΜΗΜΑ1', 'FROMTEAM', 'FROM', 'ΤΜΗΜΑ'),
+    'to_team': ('ΠΡΟΣΤΜΗΜΑ', 'ΠΡΟΣ', 'ΤΜΗΜΑΒ', 'ΤΜΗΜΑ2', 'TOTEAM', 'TO'),
+    'students_out': ('ΜΑΘΗΤΕΣOUT', 'ΜΑΘΗΤΕΣΑ', 'ΜΑΘΗΤΗΣΑ', 'STUDENTSOUT', 'OUT'),
+    'students_in': ('ΜΑΘΗΤΕΣIN', 'ΜΑΘΗΤΕΣΒ', 'ΜΑΘΗΤΗΣΒ', 'STUDENTSIN', 'IN'),
+}
+
+# Binary snapshot: magic, version, #strings, bytes κειμένου, #ints, bytes JSON swaps, bytes JSON meta
+SNAPSHOT_MAGIC = b'TOSN'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_HEADER = struct.Struct('<4sHIIIII')
+# v1: χωρίς meta (διαβάζεται ακόμα)
+SNAPSHOT_HEADER_V1 = struct.Struct('<4sHIIII')
+
+# Checkpoints των background jobs (ένα αρχείο ανά Excel + ρυθμίσεις)
+CHECKPOINT_DIR = os.path.join(tempfile.gettempdir(), 'team_optimizer_checkpoints')
+
+# Υποχρεωτικές στήλες (normalized) των ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ / SINGLE / τμημάτων (flat)
+PAIR_COLUMNS = ('ΜΑΘΗΤΗΣΑ', 'ΜΑΘΗΤΗΣΒ', 'ΚΑΤΗΓΟΡΙΑΔΥΑΔΑΣ', 'ΕΠΙΔΟΣΗ')
+SINGLE_COLUMNS = ('ΟΝΟΜΑ', 'ΦΥΛΟ', 'ΚΑΛΗΓΝΩΣΗΕΛΛΗΝΙΚΩΝ', 'ΕΠΙΔΟΣΗ')
+ASSIGNMENT_COLUMNS = ('ΤΜΗΜΑ', 'ΟΝΟΜΑ')
+
+# Στήλες των πινάκων εξόδου (sheets του export και CSV/JSONL)
+TEAM_SHEET_COLUMNS = ('ΟΝΟΜΑ', 'ΦΥΛΟ', 'ΚΑΛΗ_ΓΝΩΣΗ_ΕΛΛΗΝΙΚΩΝ', 'ΕΠΙΔΟΣΗ', 'ΦΙΛΟΙ')
+STATISTICS_COLUMNS = ('Τμήμα', 'Σύνολο', 'Αγόρια', 'Κορίτσια',
+                      'Γνώση (ΝΑΙ)', 'Γνώση (ΟΧΙ)', 'Επ1', 'Επ2', 'Επ3')
+SUMMARY_COLUMNS = ('Μετρική', 'Spread', 'Στόχος', 'Status')
+SWAPS_LOG_COLUMNS = ('#', 'Τύπος', 'Από Τμήμα', 'Μαθητές OUT (ep3)',
+                     'Προς Τμήμα', 'Μαθητές IN (ep1/2)', 'Δ_ep3', 'Δ_φύλου', 'Δ_γνώσης', 'Priority',
+                     'Μετρική', 'Objective')
+
+# Sheets του workbook που δεν είναι τμήματα
+NON_TEAM_SHEETS = ('ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ', 'SINGLE') + SUGGESTION_SHEETS
+
+# parallel_sheets: κάτω από τόσα bytes XML (όλα τα sheets τμημάτων) parsing χωρίς process pool
+PARALLEL_SHEETS_MIN_BYTES = 4_000_000
+
+# Background jobs στο UI: κάθε πόσα δευτερόλεπτα ξαναδιαβάζουμε το status
+JOB_POLL_SECONDS = 1.0
+# Φάσεις ενός job όπου μπορεί να λήξει το όριο χρόνου (result['timed_out_phase'])
+JOB_PHASE_LABELS = {'load': 'φόρτωση Excel', 'suggestions': 'αξιολόγηση προτάσεων', 'optimize': 'optimization'}
+
+# Χαρακτηριστικά που κρατάμε ίδια ανά μετρική (P1-P8: σταδιακή χαλάρωση)
+PROTECTED_ATTRS = {
+    'ep3': ('gender', 'greek'),
+    'boys': ('ep3', 'greek'),
+    'girls': ('ep3', 'greek'),
+    'greek_yes': ('gender', 'ep3'),
+}
+# Batched engine: υποψήφιοι εταίροι ανά ακραίο τμήμα και μετρική σε κάθε γύρο
+BATCH_PARTNERS = 4
+# Ιδιότητες μονάδας (βλ. _student_attr) που κρατούν οι κλάσεις του batched engine
+UNIT_ATTRS = ('ep3', 'gender', 'greek')
 
 
 @dataclass
@@ -22,6 +118,137 @@ class Student:
     locked: bool
 
 
+@dataclass
+class RosterDiff:
+    """Αλλαγές roster μετά από ένα run (νέες εγγραφές, αποχωρήσεις, διορθώσεις)"""
+    added: List[Student] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[Student] = field(default_factory=list)
+    # Προαιρετικό τμήμα για κάθε νέο μαθητή (π.χ. από το νέο STEP7)
+    placements: Dict[str, str] = field(default_factory=dict)
+    
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+def diff_rosters(old_students: Dict[str, Student], new_students: Dict[str, Student],
+                 new_teams: Optional[Dict[str, List[str]]] = None) -> RosterDiff:
+    """Diff ανάμεσα σε δύο φορτώσεις (π.χ. αρχικό και διορθωμένο STEP7)"""
+    diff = RosterDiff()
+    team_of = {}
+    for team, names in (new_teams or {}).items():
+        for name in names:
+            team_of[name] = team
+    
+    for name, student in new_students.items():
+        if name not in old_students:
+            diff.added.append(student)
+            if name in team_of:
+                diff.placements[name] = team_of[name]
+        elif student != old_students[name]:
+            diff.changed.append(student)
+    
+    diff.removed = [name for name in old_students if name not in new_students]
+    return diff
+
+
+@dataclass
+class Objective:
+    """Συνάρτηση στόχου για την κατάταξη και την αποδοχή swaps (μικρότερη τιμή = καλύτερη)
+    
+    mode='lexicographic': οι όροι του order συγκρίνονται με τη σειρά. Ένα swap
+    βελτιώνει αν μειώνει τον πρώτο όρο, ή τον αφήνει ίδιο και μειώνει κάποιο
+    spread των επόμενων όρων (η προεπιλογή είναι ο αρχικός κανόνας ep3 -> φύλο -> γνώση).
+    mode='weighted': Σ weights[όρος]·spread + over_target_penalty·(υπέρβαση στόχων)
+    + size_penalty·(spread μεγέθους τμημάτων).
+    """
+    mode: str = 'lexicographic'
+    order: Tuple[str, ...] = ('ep3', 'gender', 'greek')
+    weights: Dict[str, float] = field(default_factory=lambda: {'ep3': 1.0, 'gender': 1.0, 'greek': 1.0})
+    over_target_penalty: float = 0.0
+    size_penalty: float = 0.0
+    
+    def __post_init__(self):
+        self.order = tuple(self.order)
+        if self.mode not in OBJECTIVE_MODES:
+            raise ValueError(f"Άγνωστο objective '{self.mode}' (διαθέσιμα: {', '.join(OBJECTIVE_MODES)})")
+        if not self.order:
+            raise ValueError("Το order του objective δεν μπορεί να είναι κενό")
+        for term in list(self.order) + list(self.weights):
+            if term not in OBJECTIVE_TERMS:
+                raise ValueError(f"Άγνωστος όρος objective '{term}' (διαθέσιμοι: {', '.join(OBJECTIVE_TERMS)})")
+    
+    def value(self, spreads: Dict[str, int], targets: Dict[str, int]):
+        """Λίστα όρων (lexicographic) ή float (weighted) από spreads που περιέχουν και το 'size'"""
+        if self.mode == 'lexicographic':
+            return [sum(spreads[m] for m in OBJECTIVE_TERMS[term]) for term in self.order]
+        
+        total = sum(weight * sum(spreads[m] for m in OBJECTIVE_TERMS[term])
+                    for term, weight in self.weights.items())
+        if self.over_target_penalty:
+            total += self.over_target_penalty * sum(max(0, spreads[m] - target) for m, target in targets.items())
+        if self.size_penalty:
+            total += self.size_penalty * spreads['size']
+        return total
+    
+    def evaluate(self, spreads_before: Dict[str, int], spreads_after: Dict[str, int],
+                 targets: Dict[str, int]) -> Dict:
+        before = self.value(spreads_before, targets)
+        after = self.value(spreads_after, targets)
+        
+        if self.mode == 'weighted':
+            improves = after < before
+        else:
+            improves = after[0] < before[0] or (after[0] == before[0] and any(
+                spreads_after[m] < spreads_before[m]
+                for term in self.order[1:] for m in OBJECTIVE_TERMS[term]
+            ))
+        
+        return {'improves': improves, 'objective_before': before, 'objective_after': after}
+    
+    def format(self, value) -> str:
+        if isinstance(value, (int, float)):
+            return f"{value:g}"
+        return ', '.join(f"{term}={v}" for term, v in zip(self.order, value))
+
+
+class UnionFind:
+    """Disjoint-set (path halving + union by size) για ομάδες φίλων"""
+    
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+        self.size: Dict[str, int] = {}
+        
+    def add(self, x: str) -> None:
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            
+    def find(self, x: str) -> str:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+    
+    def union(self, a: str, b: str) -> None:
+        self.add(a)
+        self.add(b)
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        
+    def groups(self) -> Dict[str, List[str]]:
+        """Συνιστώσες με τη σειρά εισαγωγής (και μέσα σε κάθε συνιστώσα)"""
+        result: Dict[str, List[str]] = {}
+        for x in self.parent:
+            result.setdefault(self.find(x), []).append(x)
+        return result
+
+
 class TeamOptimizer:
     """Asymmetric swap optimizer"""
     
@@ -31,68 +258,273 @@ class TeamOptimizer:
         self.target_ep3 = 3
         self.target_gender = 4
         self.target_greek = 4
-        
-    def load_from_excel(self, file_bytes: bytes) -> None:
-        """Διάβασμα completed Excel - FIX: Δεδομένα από ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ/SINGLE"""
-        wb = openpyxl.load_workbook(io.BytesIO(file_bytes), data_only=True)
+        self.objective = Objective()
+        # P9/P10: Δυάδα ↔ Solo+Solo και αντίστροφα, P11: μεταφορές 1→0 (None = όχι)
+        self.mixed_moves = False
+        self.transfer_size_tolerance: Optional[int] = None
+        # P12: κυκλικές μετακινήσεις σε τρία τμήματα
+        self.rotations = False
+        # Επιπλέον πεδία των checkpoints (optimize(checkpoint_meta=...) / resume_optimize)
+        self.checkpoint_meta: Optional[Dict] = None
+        # Ομάδες φίλων (union-find) και index συνιστωσών ανά τμήμα
+        self.friend_groups: Dict[str, List[str]] = {}
+        self._friend_adj: Optional[Dict[str, set]] = None
+        self._unit_index: Dict[str, Tuple[Tuple[str, ...], List[List[str]]]] = {}
+        # Batched engine: (solos, groups) ανά τμήμα και καλύτερο swap ανά (μετρική, high, low),
+        # με κλειδί τη σύνθεση των τμημάτων ώστε να μένουν έγκυρα ανάμεσα στους γύρους
+        self._batch_units: Dict[str, Tuple[Tuple[str, ...], Tuple[List[Dict], List[Dict]]]] = {}
+        self._batch_pairs: Dict[Tuple[str, str, str], Tuple[Tuple[Tuple[str, ...], ...], Optional[Dict]]] = {}
+        
+    def load_from_excel(self, file_bytes: bytes, parallel_sheets: bool = False,
+                        max_workers: Optional[int] = None) -> None:
+        """Διάβασμα completed Excel - FIX: Δεδομένα από ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ/SINGLE
+        
+        parallel_sheets: τα sheets τμημάτων διαβάζονται παράλληλα κατευθείαν από το XML
+        του xlsx (σε worker processes), αντί για openpyxl ένα-ένα.
+        """
+        wb = openpyxl.load_workbook(io.BytesIO(file_bytes), data_only=True, read_only=parallel_sheets)
         
         print("\n🔍 DEBUG: Starting Excel load...")
         
         # ΒΗΜΑ 1: Διάβασε δεδομένα μαθητών από ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ
         if 'ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ' in wb.sheetnames:
             print("\n📄 Loading student data from ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ...")
-            self._load_from_kategoriopoihsh(wb['ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ'])
+            self._load_from_kategoriopoihsh(self._open_sheet(wb, 'ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ'))
         
         # ΒΗΜΑ 2: Διάβασε δεδομένα από SINGLE
         if 'SINGLE' in wb.sheetnames:
             print("\n📄 Loading student data from SINGLE...")
-            self._load_from_single(wb['SINGLE'])
+            self._load_from_single(self._open_sheet(wb, 'SINGLE'))
         
         print(f"\n✅ Total students loaded: {len(self.students)}")
         
         # ΒΗΜΑ 3: Διάβασε team assignments από Α1, Α2, etc
         print("\n📄 Loading team assignments...")
-        for sheet_name in wb.sheetnames:
-            if sheet_name in ['ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ', 'SINGLE', 'SWAP_SUGGESTIONS', 
-                              'ΑΝΤΑΛΛΑΓΕΣ_ΑΝΑ_ΤΜΗΜΑ']:
-                continue
-            
-            sheet = wb[sheet_name]
-            headers = self._parse_headers(sheet)
-            
-            if 'ΟΝΟΜΑ' not in headers:
+        team_sheets = [name for name in wb.sheetnames if name not in NON_TEAM_SHEETS]
+        if parallel_sheets:
+            parsed = self._read_team_sheets_parallel(file_bytes, team_sheets, max_workers)
+        else:
+            parsed = ((name, self._read_team_sheet(wb[name])) for name in team_sheets)
+        
+        # Merge με τη σειρά του workbook
+        for sheet_name, names in parsed:
+            if names is None:
                 continue
             
-            self.teams[sheet_name] = []
-            
-            for row_idx in range(2, sheet.max_row + 1):
-                name = self._get_cell_value(sheet, row_idx, headers.get('ΟΝΟΜΑ'))
-                if name and name in self.students:
-                    self.teams[sheet_name].append(name)
+            self.teams[sheet_name] = [name for name in names if name and name in self.students]
             
             print(f"  ✅ {sheet_name}: {len(self.teams[sheet_name])} students")
         
+        # ΒΗΜΑ 4: Ομάδες φίλων (union-find) μία φορά στη φόρτωση
+        self._build_friend_groups()
+        if self.friend_groups:
+            largest = max(len(members) for members in self.friend_groups.values())
+            print(f"\n👥 Friend groups: {len(self.friend_groups)} (max size {largest})")
+        
         print(f"\n✅ Total teams: {len(self.teams)}\n")
         wb.close()
     
+    def _open_sheet(self, wb, sheet_name: str):
+        """Worksheet για τους loaders - σε read-only workbook αντιγραφή σε κανονικό sheet"""
+        sheet = wb[sheet_name]
+        if not wb.read_only:
+            return sheet
+        # Το cell() ενός read-only sheet ξαναδιαβάζει τις γραμμές σε κάθε κλήση
+        sheet.reset_dimensions()
+        copy = openpyxl.Workbook().active
+        for row in sheet.iter_rows(values_only=True):
+            copy.append(row)
+        return copy
+    
+    def _read_team_sheet(self, sheet) -> Optional[List[str]]:
+        """Ονόματα (στήλη ΟΝΟΜΑ) ενός sheet τμήματος - None αν δεν είναι sheet τμήματος"""
+        headers = self._parse_headers(sheet)
+        
+        if 'ΟΝΟΜΑ' not in headers:
+            return None
+        
+        return [self._get_cell_value(sheet, row_idx, headers.get('ΟΝΟΜΑ'))
+                for row_idx in range(2, sheet.max_row + 1)]
+    
+    def _read_team_sheets_parallel(self, file_bytes: bytes, team_sheets: List[str],
+                                   max_workers: Optional[int] = None):
+        """Παράλληλο parsing των sheets τμημάτων από το XML τους (σειρά workbook)
+        
+        Κάτω από PARALLEL_SHEETS_MIN_BYTES (ασυμπίεστο XML) το κόστος του process pool
+        ξεπερνά το κέρδος: parsing στο ίδιο process, με τοπικό archive - τα globals των
+        workers δεν αγγίζονται, ώστε να μη μένει το workbook στη μνήμη του server.
+        """
+        with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+            parts = _xlsx_worksheet_parts(archive)
+            tasks = [(name, parts[name]) for name in team_sheets if name in parts]
+            xml_bytes = sum(archive.getinfo(part).file_size for _, part in tasks)
+            
+            if max_workers == 1 or len(tasks) <= 1 or xml_bytes < PARALLEL_SHEETS_MIN_BYTES:
+                shared = _xlsx_shared_strings(archive)
+                return [_parse_sheet_xml(archive, shared, name, part) for name, part in tasks]
+        
+        chunksize = max(1, len(tasks) // (4 * (max_workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sheet_worker,
+                                 initargs=(file_bytes,)) as pool:
+            # Το map κρατάει τη σειρά των tasks -> ντετερμινιστικό merge
+            return list(pool.map(_parse_team_sheet_xml, tasks, chunksize=chunksize))
+    
+    def load_from_csv(self, pairs: Optional[TextIO] = None, singles: Optional[TextIO] = None,
+                      assignments: Optional[TextIO] = None) -> None:
+        """Φόρτωση από CSV χωρίς openpyxl (streaming ανά γραμμή)
+        
+        pairs / singles: ίδιες στήλες με ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ / SINGLE.
+        assignments: στήλες ΤΜΗΜΑ, ΟΝΟΜΑ (όλα τα sheets τμημάτων σε ένα αρχείο).
+        """
+        self._load_from_flat(self._csv_records, pairs, singles, assignments)
+    
+    def load_from_jsonl(self, pairs: Optional[TextIO] = None, singles: Optional[TextIO] = None,
+                        assignments: Optional[TextIO] = None) -> None:
+        """Φόρτωση από JSON Lines (ένα object ανά γραμμή, κλειδιά = headers των sheets)"""
+        self._load_from_flat(self._jsonl_records, pairs, singles, assignments)
+    
+    def _load_from_flat(self, reader, pairs: Optional[TextIO], singles: Optional[TextIO],
+                        assignments: Optional[TextIO]) -> None:
+        print("\n🔍 DEBUG: Starting flat load...")
+        
+        for label, source, required, ingest in (
+            ('ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ', pairs, PAIR_COLUMNS, self._ingest_pairs),
+            ('SINGLE', singles, SINGLE_COLUMNS, self._ingest_singles),
+        ):
+            if source is None:
+                continue
+            print(f"\n📄 Loading student data from {label}...")
+            headers, records = reader(source)
+            missing = [h for h in required if h not in headers]
+            if missing:
+                print(f"  ⚠️  Missing headers in {label}: {missing}")
+                continue
+            ingest(records)
+        
+        print(f"\n✅ Total students loaded: {len(self.students)}")
+        
+        if assignments is not None:
+            print("\n📄 Loading team assignments...")
+            headers, records = reader(assignments)
+            missing = [h for h in ASSIGNMENT_COLUMNS if h not in headers]
+            if missing:
+                print(f"  ⚠️  Missing headers in assignments: {missing}")
+            else:
+                # Ίδιο φιλτράρισμα με τα sheets τμημάτων, σειρά πρώτης εμφάνισης
+                for record in records:
+                    team_name = self._record_value(record, 'ΤΜΗΜΑ')
+                    name = self._record_value(record, 'ΟΝΟΜΑ')
+                    if not team_name:
+                        continue
+                    members = self.teams.setdefault(team_name, [])
+                    if name and name in self.students:
+                        members.append(name)
+                
+                for team_name, members in self.teams.items():
+                    print(f"  ✅ {team_name}: {len(members)} students")
+        
+        self._build_friend_groups()
+        if self.friend_groups:
+            largest = max(len(members) for members in self.friend_groups.values())
+            print(f"\n👥 Friend groups: {len(self.friend_groups)} (max size {largest})")
+        
+        print(f"\n✅ Total teams: {len(self.teams)}\n")
+    
+    def _flat_keys(self, key) -> Tuple[str, ...]:
+        """Κλειδιά record για ένα header (raw + normalized, όπως στο _parse_headers)"""
+        if not key:
+            return ()
+        raw_header = str(key).strip()
+        return (raw_header, raw_header.upper().replace(' ', '').replace('_', ''))
+    
+    def _csv_records(self, stream: TextIO) -> Tuple[set, Iterable[Dict]]:
+        reader = csv.reader(stream)
+        header = next(reader, [])
+        columns = [self._flat_keys(key) for key in header]
+        
+        def records():
+            for row in reader:
+                # Κενό πεδίο = κενό cell (None), όπως στο openpyxl
+                yield {key: value for keys, value in zip(columns, row) if value != '' for key in keys}
+        
+        return {key for keys in columns for key in keys}, records()
+    
+    def _jsonl_records(self, stream: TextIO) -> Tuple[set, Iterable[Dict]]:
+        """Records ενός JSONL - οι στήλες είναι η ένωση των κλειδιών όλων των γραμμών
+        
+        Ένα προαιρετικό κλειδί μπορεί να λείπει από τις πρώτες γραμμές (όπως ένα κενό
+        cell), άρα οι στήλες δεν βγαίνουν από την πρώτη γραμμή μόνο.
+        """
+        objects = []
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Μη έγκυρο JSON στη γραμμή {line_no}: {e.msg}") from e
+            if not isinstance(obj, dict):
+                raise ValueError(f"Η γραμμή {line_no} δεν είναι JSON object")
+            objects.append(obj)
+        
+        key_cache: Dict[str, Tuple[str, ...]] = {}
+        for obj in objects:
+            for key in obj:
+                if key not in key_cache:
+                    key_cache[key] = self._flat_keys(key)
+        
+        def normalize(obj: Dict) -> Dict:
+            record = {}
+            for key, value in obj.items():
+                if value is not None and value != '':
+                    for normalized in key_cache[key]:
+                        record[normalized] = value
+            return record
+        
+        headers = {key for keys in key_cache.values() for key in keys}
+        return headers, (normalize(obj) for obj in objects)
+    
     def _load_from_kategoriopoihsh(self, sheet) -> None:
         """Διάβασμα δυάδων από ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ sheet"""
         headers = self._parse_headers(sheet)
         
-        required = ['ΜΑΘΗΤΗΣΑ', 'ΜΑΘΗΤΗΣΒ', 'ΚΑΤΗΓΟΡΙΑΔΥΑΔΑΣ', 'ΕΠΙΔΟΣΗ']
-        missing = [h for h in required if h not in headers]
+        missing = [h for h in PAIR_COLUMNS if h not in headers]
         if missing:
             print(f"  ⚠️  Missing headers in ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ: {missing}")
             return
         
-        pairs_loaded = 0
+        self._ingest_pairs(self._sheet_records(sheet, headers))
+    
+    def _load_from_single(self, sheet) -> None:
+        """Διάβασμα μονών μαθητών από SINGLE sheet"""
+        headers = self._parse_headers(sheet)
+        
+        missing = [h for h in SINGLE_COLUMNS if h not in headers]
+        if missing:
+            print(f"  ⚠️  Missing headers in SINGLE: {missing}")
+            return
         
+        self._ingest_singles(self._sheet_records(sheet, headers))
+    
+    def _sheet_records(self, sheet, headers: Dict[str, int]):
+        """Γραμμές δεδομένων ως records {header: τιμή} (ίδια κλειδιά με _parse_headers)"""
         for row_idx in range(2, sheet.max_row + 1):
-            name_a = self._get_cell_value(sheet, row_idx, headers.get('ΜΑΘΗΤΗΣΑ'))
-            name_b = self._get_cell_value(sheet, row_idx, headers.get('ΜΑΘΗΤΗΣΒ'))
-            category = self._get_cell_value(sheet, row_idx, headers.get('ΚΑΤΗΓΟΡΙΑΔΥΑΔΑΣ'))
-            epidosh_raw = self._get_cell_value(sheet, row_idx, headers.get('ΕΠΙΔΟΣΗ'))
-            locked_val = self._get_cell_value(sheet, row_idx, headers.get('LOCKED'))
+            yield {key: sheet.cell(row_idx, col).value for key, col in headers.items()}
+    
+    def _record_value(self, record: Dict, key: str, default=''):
+        val = record.get(key)
+        return str(val).strip() if val is not None else default
+    
+    def _ingest_pairs(self, records: Iterable[Dict]) -> None:
+        """Γραμμές ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗΣ (Excel/CSV/JSONL) -> μαθητές δυάδων"""
+        pairs_loaded = 0
+        
+        for record in records:
+            name_a = self._record_value(record, 'ΜΑΘΗΤΗΣΑ')
+            name_b = self._record_value(record, 'ΜΑΘΗΤΗΣΒ')
+            category = self._record_value(record, 'ΚΑΤΗΓΟΡΙΑΔΥΑΔΑΣ')
+            epidosh_raw = self._record_value(record, 'ΕΠΙΔΟΣΗ')
+            locked_val = self._record_value(record, 'LOCKED')
             
             if not name_a or not name_b or not category:
                 continue
@@ -152,38 +584,28 @@ class TeamOptimizer:
         
         print(f"  ✅ Loaded {pairs_loaded} pairs ({pairs_loaded * 2} students)")
     
-    def _load_from_single(self, sheet) -> None:
-        """Διάβασμα μονών μαθητών από SINGLE sheet"""
-        headers = self._parse_headers(sheet)
-        
-        required = ['ΟΝΟΜΑ', 'ΦΥΛΟ', 'ΚΑΛΗΓΝΩΣΗΕΛΛΗΝΙΚΩΝ', 'ΕΠΙΔΟΣΗ']
-        missing = [h for h in required if h not in headers]
-        if missing:
-            print(f"  ⚠️  Missing headers in SINGLE: {missing}")
-            return
-        
+    def _ingest_singles(self, records: Iterable[Dict]) -> None:
+        """Γραμμές SINGLE (Excel/CSV/JSONL) -> μονοί μαθητές (+ φίλοι σε υπάρχοντες)"""
         singles_loaded = 0
         
-        for row_idx in range(2, sheet.max_row + 1):
-            name = self._get_cell_value(sheet, row_idx, headers.get('ΟΝΟΜΑ'))
+        for record in records:
+            name = self._record_value(record, 'ΟΝΟΜΑ')
             if not name:
                 continue
             
-            # Αν ήδη φορτώθηκε από ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ, skip
+            # Φίλοι (π.χ. "Α, Β, Γ") - ομάδες οποιουδήποτε μεγέθους
+            friends = self._parse_friends(self._record_value(record, 'ΦΙΛΟΙ'))
+            
+            # Αν ήδη φορτώθηκε από ΚΑΤΗΓΟΡΙΟΠΟΙΗΣΗ, μόνο συμπλήρωση φίλων
             if name in self.students:
+                existing = self.students[name].friends
+                existing.extend(f for f in friends if f not in existing and f != name)
                 continue
             
-            gender_col = headers.get('ΦΥΛΟ') or headers.get('ΦΥΛΟ')
-            greek_col = (headers.get('ΚΑΛΗΓΝΩΣΗΕΛΛΗΝΙΚΩΝ') or 
-                        headers.get('ΚΑΛΗ_ΓΝΩΣΗ_ΕΛΛΗΝΙΚΩΝ') or
-                        headers.get('ΚΑΛΗΓΝΩΣΗΕΛΛΗΝΙΚΩΝ'))
-            epidosh_col = headers.get('ΕΠΙΔΟΣΗ') or headers.get('ΕΠΙΔΟΣΗ')
-            locked_col = headers.get('LOCKED')
-            
-            gender = self._get_cell_value(sheet, row_idx, gender_col, 'Α')
+            gender = self._record_value(record, 'ΦΥΛΟ', 'Α')
             
             # Greek knowledge
-            raw_greek = sheet.cell(row_idx, greek_col).value if greek_col else 'Ν'
+            raw_greek = record.get('ΚΑΛΗΓΝΩΣΗΕΛΛΗΝΙΚΩΝ', 'Ν')
             if raw_greek and str(raw_greek).strip().upper().startswith('Ν'):
                 greek = 'Ν'
             elif raw_greek and str(raw_greek).strip().upper().startswith('Ο'):
@@ -192,13 +614,13 @@ class TeamOptimizer:
                 greek = 'Ν'
             
             # Επίδοση
-            raw_epidosh = sheet.cell(row_idx, epidosh_col).value if epidosh_col else 1
+            raw_epidosh = record.get('ΕΠΙΔΟΣΗ', 1)
             try:
                 epidosh = int(raw_epidosh) if raw_epidosh else 1
             except:
                 epidosh = 1
             
-            locked_val = self._get_cell_value(sheet, row_idx, locked_col)
+            locked_val = self._record_value(record, 'LOCKED')
             is_locked = (locked_val == 'LOCKED' or locked_val == 'OΧΙ')
             
             self.students[name] = Student(
@@ -206,7 +628,7 @@ class TeamOptimizer:
                 choice=epidosh,
                 gender=gender,
                 greek_knowledge=greek,
-                friends=[],
+                friends=friends,
                 locked=is_locked
             )
             
@@ -239,9 +661,135 @@ class TeamOptimizer:
             return []
         return [f.strip() for f in friends_str.split(',') if f.strip()]
     
+    def save_snapshot(self, applied_swaps: Optional[List[Dict]] = None,
+                      meta: Optional[Dict] = None) -> bytes:
+        """Binary snapshot της κατάστασης (μαθητές, φίλοι, locked, τμήματα, προαιρετικά swaps)
+        
+        meta: επιπλέον JSON πεδία (π.χ. μετρητές iterations ενός checkpoint)
+        """
+        strings: List[str] = []
+        string_ids: Dict[str, int] = {}
+        
+        def intern(value: str) -> int:
+            if value not in string_ids:
+                string_ids[value] = len(strings)
+                strings.append(value)
+            return string_ids[value]
+        
+        # Ένα ενιαίο stream ακεραίων: ids ονομάτων + αριθμητικά πεδία
+        ints = array('i', [len(self.students)])
+        for name, student in self.students.items():
+            ints.extend((intern(name), student.choice, intern(student.gender),
+                         intern(student.greek_knowledge), int(student.locked), len(student.friends)))
+            ints.extend(intern(friend) for friend in student.friends)
+        
+        ints.append(len(self.teams))
+        for team_name, members in self.teams.items():
+            ints.extend((intern(team_name), len(members)))
+            ints.extend(intern(name) for name in members)
+        
+        encoded = [value.encode('utf-8') for value in strings]
+        lengths = array('I', (len(raw) for raw in encoded))
+        blob = b''.join(encoded)
+        swaps_blob = b'' if applied_swaps is None else json.dumps(applied_swaps, ensure_ascii=False).encode('utf-8')
+        meta_blob = b'' if meta is None else json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+            ints.byteswap()
+        
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(strings),
+                                      len(blob), len(ints), len(swaps_blob), len(meta_blob))
+        return b''.join((header, lengths.tobytes(), blob, ints.tobytes(), swaps_blob, meta_blob))
+    
+    def load_snapshot(self, data: bytes) -> Optional[List[Dict]]:
+        """Φόρτωση από save_snapshot() - επιστρέφει τα applied swaps (ή None)"""
+        return self._read_snapshot(data)[0]
+    
+    def _read_snapshot(self, data: bytes) -> Tuple[Optional[List[Dict]], Dict]:
+        """Φόρτωση κατάστασης - επιστρέφει (applied swaps ή None, meta)"""
+        if len(data) < SNAPSHOT_HEADER_V1.size:
+            raise ValueError("Μη έγκυρο snapshot: πολύ μικρό αρχείο")
+        magic, version = data[:4], SNAPSHOT_HEADER_V1.unpack_from(data)[1]
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Μη έγκυρο snapshot: λάθος magic")
+        if version == 1:
+            header = SNAPSHOT_HEADER_V1
+            _, _, n_strings, blob_size, n_ints, swaps_size = header.unpack_from(data)
+            meta_size = 0
+        elif version == SNAPSHOT_VERSION and len(data) >= SNAPSHOT_HEADER.size:
+            header = SNAPSHOT_HEADER
+            _, _, n_strings, blob_size, n_ints, swaps_size, meta_size = header.unpack_from(data)
+        elif version == SNAPSHOT_VERSION:
+            raise ValueError("Μη έγκυρο snapshot: πολύ μικρό αρχείο")
+        else:
+            raise ValueError(f"Μη υποστηριζόμενη έκδοση snapshot: {version} (αναμενόταν ≤ {SNAPSHOT_VERSION})")
+        
+        lengths, ints = array('I'), array('i')
+        expected = (header.size + n_strings * lengths.itemsize + blob_size +
+                    n_ints * ints.itemsize + swaps_size + meta_size)
+        if len(data) != expected:
+            raise ValueError(f"Μη έγκυρο snapshot: {len(data)} bytes (αναμενόταν {expected})")
+        
+        offset = header.size
+        lengths.frombytes(data[offset:offset + n_strings * lengths.itemsize])
+        offset += n_strings * lengths.itemsize
+        blob = data[offset:offset + blob_size]
+        offset += blob_size
+        ints.frombytes(data[offset:offset + n_ints * ints.itemsize])
+        offset += n_ints * ints.itemsize
+        swaps_blob = data[offset:offset + swaps_size]
+        offset += swaps_size
+        meta_blob = data[offset:offset + meta_size]
+        
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+            ints.byteswap()
+        
+        strings = []
+        start = 0
+        for length in lengths:
+            strings.append(sys.intern(blob[start:start + length].decode('utf-8')))
+            start += length
+        
+        students: Dict[str, Student] = {}
+        pos = 1
+        for _ in range(ints[0]):
+            name_id, choice, gender_id, greek_id, locked, n_friends = ints[pos:pos + 6]
+            pos += 6
+            name = strings[name_id]
+            students[name] = Student(
+                name=name,
+                choice=choice,
+                gender=strings[gender_id],
+                greek_knowledge=strings[greek_id],
+                friends=[strings[i] for i in ints[pos:pos + n_friends]],
+                locked=bool(locked)
+            )
+            pos += n_friends
+        
+        teams: Dict[str, List[str]] = {}
+        n_teams = ints[pos]
+        pos += 1
+        for _ in range(n_teams):
+            team_id, size = ints[pos:pos + 2]
+            pos += 2
+            teams[strings[team_id]] = [strings[i] for i in ints[pos:pos + size]]
+            pos += size
+        
+        self.students = students
+        self.teams = teams
+        self._build_friend_groups()
+        
+        applied_swaps = json.loads(swaps_blob.decode('utf-8')) if swaps_size else None
+        return applied_swaps, json.loads(meta_blob.decode('utf-8')) if meta_size else {}
+    
     def calculate_spreads(self) -> Dict[str, int]:
         """Υπολογισμός spreads"""
-        stats = self._get_team_stats()
+        return self._spreads_from_stats(self._get_team_stats())
+    
+    def _spreads_from_stats(self, stats: Dict) -> Dict[str, int]:
+        """Spreads από έτοιμα team stats (χωρίς νέο πέρασμα μαθητών)"""
         if not stats:
             return {'ep3': 0, 'boys': 0, 'girls': 0, 'greek_yes': 0}
         
@@ -257,16 +805,33 @@ class TeamOptimizer:
             'greek_yes': max(greek_yes_vals) - min(greek_yes_vals)
         }
     
+    def _objective_spreads(self, stats: Dict) -> Dict[str, int]:
+        """Spreads + 'size' (spread μεγέθους τμημάτων), η είσοδος του objective"""
+        spreads = self._spreads_from_stats(stats)
+        sizes = [s['size'] for s in stats.values()]
+        spreads['size'] = max(sizes) - min(sizes) if sizes else 0
+        return spreads
+    
+    def _objective_targets(self) -> Dict[str, int]:
+        return {m: self._metric_target(m) for m in METRICS}
+    
+    def objective_value(self, stats: Optional[Dict] = None):
+        """Τιμή του self.objective για την τρέχουσα κατανομή (ή για έτοιμα stats)"""
+        if stats is None:
+            stats = self._get_team_stats()
+        return self.objective.value(self._objective_spreads(stats), self._objective_targets())
+    
     def _get_team_stats(self) -> Dict:
         """FIX: Διορθωμένη μέτρηση γλώσσας"""
         stats = {}
         for team_name, student_names in self.teams.items():
-            boys = girls = greek_yes = greek_no = ep1 = ep2 = ep3 = 0
+            boys = girls = greek_yes = greek_no = ep1 = ep2 = ep3 = size = 0
             
             for name in student_names:
                 if name not in self.students:
                     continue
                 s = self.students[name]
+                size += 1
                 
                 # Gender
                 if s.gender == 'Α':
@@ -291,203 +856,1192 @@ class TeamOptimizer:
             stats[team_name] = {
                 'boys': boys, 'girls': girls,
                 'greek_yes': greek_yes, 'greek_no': greek_no,
-                'ep1': ep1, 'ep2': ep2, 'ep3': ep3
+                'ep1': ep1, 'ep2': ep2, 'ep3': ep3,
+                'size': size
             }
         
         return stats
     
-    def optimize(self, max_iterations: int = 100) -> Tuple[List[Dict], Dict]:
-        """Asymmetric optimization"""
-        applied_swaps = []
-        
-        for iteration in range(max_iterations):
+    def set_moves(self, moves: Dict) -> None:
+        """Επιπλέον κινήσεις από options / checkpoint meta - μόνο ονόματα του MOVE_OPTIONS"""
+        unknown = [name for name in moves if name not in MOVE_OPTIONS]
+        if unknown:
+            raise ValueError(f"Άγνωστες κινήσεις {', '.join(map(str, unknown))} "
+                             f"(διαθέσιμες: {', '.join(MOVE_OPTIONS)})")
+        for name, value in moves.items():
+            setattr(self, name, value)
+    
+    def optimize(self, max_iterations: int = 100, engine: str = 'asymmetric',
+                 deadline: Optional[float] = None,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: float = 5.0,
+                 checkpoint_meta: Optional[Dict] = None) -> Tuple[List[Dict], Dict]:
+        """Asymmetric optimization
+        
+        engine='asymmetric': max/min τμήμα μόνο βάσει ep3 (αρχικός αλγόριθμος)
+        engine='multi_metric': κάθε iteration στοχεύει τη μετρική με τη
+        μεγαλύτερη υπέρβαση στόχου, χωρίς να χαλάει όσες ήδη ικανοποιούνται
+        engine='batched': κάθε iteration εφαρμόζει πολλά συμβατά swaps σε
+        ξένα μεταξύ τους ζεύγη τμημάτων (matching)
+        
+        deadline: time.time() μετά το οποίο σταματάμε (με ό,τι έχει εφαρμοστεί ως τότε)
+        progress_callback(iteration, max_iterations): μετά από κάθε iteration
+        checkpoint_path: atomic checkpoint κάθε checkpoint_interval δευτερόλεπτα και
+        στο τέλος - συνέχεια με resume_optimize()
+        checkpoint_meta: επιπλέον JSON πεδία σε κάθε checkpoint (π.χ. ό,τι εφαρμόστηκε
+        πριν το optimize), διαθέσιμα μετά το resume στο self.checkpoint_meta
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Άγνωστο engine '{engine}' (διαθέσιμα: {', '.join(ENGINES)})")
+        
+        self.checkpoint_meta = checkpoint_meta
+        return self._run_engine(engine, max_iterations, 0, [], deadline, progress_callback,
+                                checkpoint_path, checkpoint_interval)
+    
+    def resume_optimize(self, checkpoint_path: str, deadline: Optional[float] = None,
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        checkpoint_interval: float = 5.0) -> Tuple[List[Dict], Dict]:
+        """Συνέχεια από το τελευταίο checkpoint του optimize()
+        
+        Τα engines είναι ντετερμινιστικά (χωρίς RNG) και εφαρμόζουν μόνο swaps που
+        βελτιώνουν, άρα η τρέχουσα κατανομή είναι και η καλύτερη ως τώρα: το resume
+        δίνει τα ίδια (applied_swaps, final_spreads) με ένα αδιάκοπο run.
+        """
+        with open(checkpoint_path, 'rb') as f:
+            applied_swaps, meta = self._read_snapshot(f.read())
+        if 'iteration' not in meta:
+            raise ValueError(f"Το {checkpoint_path} δεν είναι checkpoint του optimize()")
+        
+        self.target_ep3, self.target_gender, self.target_greek = meta['targets']
+        if 'objective' in meta:
+            self.objective = Objective(**meta['objective'])
+        self.set_moves(meta.get('moves', {}))
+        self.checkpoint_meta = meta.get('extra')
+        print(f"\n♻️ Resume: {meta['engine']} από iteration {meta['iteration']}/{meta['max_iterations']} "
+              f"({len(applied_swaps or [])} swaps)")
+        return self._run_engine(meta['engine'], meta['max_iterations'], meta['iteration'],
+                                applied_swaps or [], deadline, progress_callback,
+                                checkpoint_path, checkpoint_interval)
+    
+    def _run_engine(self, engine: str, max_iterations: int, start_iteration: int,
+                    applied_swaps: List[Dict], deadline: Optional[float],
+                    progress_callback: Optional[Callable[[int, int], None]],
+                    checkpoint_path: Optional[str], checkpoint_interval: float) -> Tuple[List[Dict], Dict]:
+        step = {
+            'asymmetric': self._step_asymmetric,
+            'multi_metric': self._step_multi_metric,
+            'batched': self._step_batched,
+        }[engine]
+        # Το iteration από το οποίο συνεχίζει ένα resume
+        next_iteration = start_iteration
+        if checkpoint_path is not None:
+            self._write_checkpoint(checkpoint_path, engine, max_iterations, next_iteration, applied_swaps)
+        last_checkpoint = time.monotonic()
+        
+        for iteration in range(start_iteration, max_iterations):
+            next_iteration = iteration
             spreads = self.calculate_spreads()
             
-            if (spreads['ep3'] <= self.target_ep3 and
-                spreads['boys'] <= self.target_gender and
-                spreads['girls'] <= self.target_gender and
-                spreads['greek_yes'] <= self.target_greek):
+            if self._targets_met(spreads):
                 break
             
-            stats = self._get_team_stats()
-            ep3_counts = {team: stats[team]['ep3'] for team in stats.keys()}
-            
-            max_team = max(ep3_counts.items(), key=lambda x: x[1])[0]
-            min_team = min(ep3_counts.items(), key=lambda x: x[1])[0]
-            
-            if ep3_counts[max_team] - ep3_counts[min_team] <= self.target_ep3:
+            if deadline is not None and time.time() >= deadline:
+                print(f"\n⏱️ Time limit: διακοπή μετά από {iteration} iterations")
                 break
             
-            all_swaps = self._generate_asymmetric_swaps(max_team, min_team)
+            swaps = step()
             
-            if not all_swaps:
+            if not swaps:
                 break
             
-            best_swap = self._select_best_swap(all_swaps)
+            applied_swaps.extend(swaps)
+            next_iteration = iteration + 1
             
-            if not best_swap:
-                break
+            if checkpoint_path is not None and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                self._write_checkpoint(checkpoint_path, engine, max_iterations, next_iteration, applied_swaps)
+                last_checkpoint = time.monotonic()
             
-            self._apply_swap(best_swap)
-            applied_swaps.append(best_swap)
+            if progress_callback is not None:
+                progress_callback(iteration + 1, max_iterations)
+        
+        if checkpoint_path is not None:
+            self._write_checkpoint(checkpoint_path, engine, max_iterations, next_iteration, applied_swaps)
         
         final_spreads = self.calculate_spreads()
+        print(f"\n🧮 Objective ({self.objective.mode}): {self.objective.format(self.objective_value())}")
         return applied_swaps, final_spreads
     
-    def _generate_asymmetric_swaps(self, max_team: str, min_team: str) -> List[Dict]:
-        """Γέννηση asymmetric swaps με 8 priorities"""
-        swaps = []
+    def _write_checkpoint(self, path: str, engine: str, max_iterations: int, iteration: int,
+                          applied_swaps: List[Dict]) -> None:
+        """Checkpoint σε snapshot format - atomic (μοναδικό temp αρχείο + os.replace)"""
+        meta = {
+            'engine': engine,
+            'max_iterations': max_iterations,
+            'iteration': iteration,
+            'targets': [self.target_ep3, self.target_gender, self.target_greek],
+            'objective': asdict(self.objective),
+            'moves': {name: getattr(self, name) for name in MOVE_OPTIONS},
+        }
+        if self.checkpoint_meta is not None:
+            meta['extra'] = self.checkpoint_meta
+        data = self.save_snapshot(applied_swaps, meta)
+        # Μοναδικό temp αρχείο στον ίδιο φάκελο (το os.replace είναι atomic μόνο εντός filesystem)
+        fd, tmp_path = tempfile.mkstemp(prefix='.checkpoint-', suffix='.tmp',
+                                        dir=os.path.dirname(path) or '.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def optimize_sharded(self, shard_size: int = 8, max_iterations: int = 100,
+                         engine: str = 'multi_metric', reconcile_iterations: int = 100,
+                         max_workers: Optional[int] = None,
+                         deadline: Optional[float] = None) -> Tuple[List[Dict], Dict]:
+        """Sharded optimization για πολύ μεγάλα σύνολα τμημάτων (π.χ. όλη η περιφέρεια)
+        
+        1. Τα τμήματα χωρίζονται σε shards των ~shard_size, ισορροπημένα σε ep3/φύλο/γνώση
+        2. Κάθε shard βελτιστοποιείται ανεξάρτητα σε process pool
+        3. Reconciliation μόνο ανάμεσα σε ακραία τμήματα διαφορετικών shards
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Άγνωστο engine '{engine}' (διαθέσιμα: {', '.join(ENGINES)})")
+        
+        n_shards = max(1, math.ceil(len(self.teams) / max(1, shard_size)))
+        shards = self._partition_teams(n_shards)
+        print(f"\n🧩 Sharded run: {len(self.teams)} teams σε {len(shards)} shards")
+        
+        applied_swaps = self._run_shards(shards, engine, max_iterations, max_workers, deadline)
+        applied_swaps.extend(self._reconcile_shards(shards, reconcile_iterations, deadline))
         
-        max_solos_ep3 = self._get_solos_with_ep3(max_team)
-        max_pairs_ep3 = self._get_pairs_with_ep3(max_team)
-        min_solos_non_ep3 = self._get_solos_without_ep3(min_team)
-        min_pairs_non_ep3 = self._get_pairs_without_ep3(min_team)
+        final_spreads = self.calculate_spreads()
+        return applied_swaps, final_spreads
+    
+    def _run_shards(self, shards: List[List[str]], engine: str, max_iterations: int,
+                    max_workers: Optional[int], deadline: Optional[float]) -> List[Dict]:
+        """Ανεξάρτητο optimize κάθε shard (process pool) - τα swaps σημειώνονται με το shard τους"""
+        targets = (self.target_ep3, self.target_gender, self.target_greek)
+        moves = {name: getattr(self, name) for name in MOVE_OPTIONS}
+        
+        payloads = []
+        for shard_teams in shards:
+            teams = {team: list(self.teams[team]) for team in shard_teams}
+            students = {name: self.students[name]
+                        for names in teams.values() for name in names if name in self.students}
+            payloads.append((students, teams, targets, self.objective, moves, engine, max_iterations, deadline))
+        
+        if len(payloads) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = list(pool.map(_optimize_shard, payloads))
+        else:
+            results = [_optimize_shard(payload) for payload in payloads]
         
-        # P1: Solo(ep3) ↔ Solo(ep1/2), ίδιο φύλο+γλώσσα
-        for solo_max in max_solos_ep3:
-            for solo_min in min_solos_non_ep3:
-                if (solo_max['student'].gender == solo_min['student'].gender and
-                    solo_max['student'].greek_knowledge == solo_min['student'].greek_knowledge):
-                    
-                    improvement = self._calc_asymmetric_improvement(
-                        max_team, [solo_max['name']],
-                        min_team, [solo_min['name']]
-                    )
-                    
-                    if improvement['improves']:
-                        swaps.append({
-                            'type': 'Solo(ep3)↔Solo(ep1/2)-P1',
-                            'from_team': max_team,
-                            'students_out': [solo_max['name']],
-                            'to_team': min_team,
-                            'students_in': [solo_min['name']],
-                            'improvement': improvement,
-                            'priority': 1
-                        })
+        applied_swaps = []
+        for shard_idx, (teams, swaps) in enumerate(results, start=1):
+            self.teams.update(teams)
+            for swap in swaps:
+                swap['shard'] = shard_idx
+            applied_swaps.extend(swaps)
+        return applied_swaps
+    
+    def _reconcile_shards(self, shards: List[List[str]], max_iterations: int,
+                          deadline: Optional[float]) -> List[Dict]:
+        """Cross-shard reconciliation: swaps μόνο ανάμεσα σε ακραία τμήματα διαφορετικών shards
+        
+        Τα ζεύγη μέσα σε ένα shard έχουν ήδη βελτιστοποιηθεί, και ένα swap μειώνει το spread
+        μιας μετρικής μόνο αν αγγίζει το συνολικό max ή min της. Κάθε iteration εξετάζει
+        λοιπόν O(shards) ζεύγη (_cross_shard_pairs) αντί για όλα τα τμήματα.
+        """
+        applied_swaps = []
+        for iteration in range(max_iterations):
+            stats = self._get_team_stats()
+            spreads = self._objective_spreads(stats)
+            
+            if self._targets_met(spreads):
+                break
+            
+            if deadline is not None and time.time() >= deadline:
+                print(f"\n⏱️ Time limit: διακοπή reconciliation μετά από {iteration} iterations")
+                break
+            
+            swap = self._step_reconcile(shards, stats, spreads)
+            if swap is None:
+                break
+            applied_swaps.append(swap)
         
-        # P2: Δυάδα(ep3) ↔ Δυάδα(ep1/2), ίδιο φύλο+γλώσσα
-        for pair_max in max_pairs_ep3:
-            for pair_min in min_pairs_non_ep3:
-                ep3_count_max = sum(1 for s in [pair_max['student_a'], pair_max['student_b']] if s.choice == 3)
-                ep3_count_min = sum(1 for s in [pair_min['student_a'], pair_min['student_b']] if s.choice == 3)
-                
-                if ep3_count_max <= ep3_count_min:
-                    continue
-                
-                genders_max = {pair_max['student_a'].gender, pair_max['student_b'].gender}
-                genders_min = {pair_min['student_a'].gender, pair_min['student_b'].gender}
-                greeks_max = {pair_max['student_a'].greek_knowledge, pair_max['student_b'].greek_knowledge}
-                greeks_min = {pair_min['student_a'].greek_knowledge, pair_min['student_b'].greek_knowledge}
-                
-                if (len(genders_max) == 1 and len(genders_min) == 1 and genders_max == genders_min and
-                    len(greeks_max) == 1 and len(greeks_min) == 1 and greeks_max == greeks_min):
-                    
-                    improvement = self._calc_asymmetric_improvement(
-                        max_team, [pair_max['name_a'], pair_max['name_b']],
-                        min_team, [pair_min['name_a'], pair_min['name_b']]
-                    )
-                    
-                    if improvement['improves']:
-                        swaps.append({
-                            'type': f"Δυάδα({pair_max['ep_combo']})↔Δυάδα({pair_min['ep_combo']})-P2",
-                            'from_team': max_team,
-                            'students_out': [pair_max['name_a'], pair_max['name_b']],
-                            'to_team': min_team,
-                            'students_in': [pair_min['name_a'], pair_min['name_b']],
-                            'improvement': improvement,
-                            'priority': 2
-                        })
+        print(f"\n🔗 Reconciliation: {len(applied_swaps)} cross-shard swaps")
+        return applied_swaps
+    
+    def _step_reconcile(self, shards: List[List[str]], stats: Dict,
+                        spreads: Dict[str, int]) -> Optional[Dict]:
+        """Ένα iteration reconciliation, με τη σειρά μετρικών του multi-metric engine"""
+        violated = sorted(
+            (m for m in METRICS if spreads[m] > self._metric_target(m)),
+            key=lambda m: (-(spreads[m] - self._metric_target(m)), METRICS.index(m))
+        )
         
-        # P3-8: Χαλάρωση περιορισμών (όπως πριν)
-        for solo_max in max_solos_ep3:
-            for solo_min in min_solos_non_ep3:
-                if solo_max['student'].gender == solo_min['student'].gender:
-                    improvement = self._calc_asymmetric_improvement(
-                        max_team, [solo_max['name']],
-                        min_team, [solo_min['name']]
-                    )
-                    if improvement['improves']:
-                        swaps.append({
-                            'type': 'Solo(ep3)↔Solo(ep1/2)-P3',
-                            'from_team': max_team,
-                            'students_out': [solo_max['name']],
-                            'to_team': min_team,
-                            'students_in': [solo_min['name']],
-                            'improvement': improvement,
-                            'priority': 3
-                        })
+        for metric in violated:
+            for max_team, min_team in self._cross_shard_pairs(shards, stats, metric):
+                swaps = self._generate_metric_swaps(metric, max_team, min_team, stats, spreads)
+                best_swap = self._select_best_metric_swap(swaps)
+                if best_swap:
+                    self._apply_swap(best_swap)
+                    return best_swap
         
-        for pair_max in max_pairs_ep3:
-            for pair_min in min_pairs_non_ep3:
-                ep3_count_max = sum(1 for s in [pair_max['student_a'], pair_max['student_b']] if s.choice == 3)
-                ep3_count_min = sum(1 for s in [pair_min['student_a'], pair_min['student_b']] if s.choice == 3)
-                if ep3_count_max <= ep3_count_min:
-                    continue
-                genders_max = {pair_max['student_a'].gender, pair_max['student_b'].gender}
-                genders_min = {pair_min['student_a'].gender, pair_min['student_b'].gender}
-                if len(genders_max) == 1 and len(genders_min) == 1 and genders_max == genders_min:
-                    improvement = self._calc_asymmetric_improvement(
-                        max_team, [pair_max['name_a'], pair_max['name_b']],
-                        min_team, [pair_min['name_a'], pair_min['name_b']]
-                    )
-                    if improvement['improves']:
-                        swaps.append({
-                            'type': f"Δυάδα({pair_max['ep_combo']})↔Δυάδα({pair_min['ep_combo']})-P4",
-                            'from_team': max_team,
-                            'students_out': [pair_max['name_a'], pair_max['name_b']],
-                            'to_team': min_team,
-                            'students_in': [pair_min['name_a'], pair_min['name_b']],
-                            'improvement': improvement,
-                            'priority': 4
-                        })
+        return None
+    
+    def _cross_shard_pairs(self, shards: List[List[str]], stats: Dict, metric: str) -> List[Tuple[str, str]]:
+        """Ζεύγη (max ενός shard, min άλλου shard) με ένα από τα δύο στο συνολικό άκρο
+        
+        Ταξινομημένα κατά φθίνουσα διαφορά· διαφορά < 2 δεν έχει κίνηση.
+        """
+        extremes = [
+            (max(shard, key=lambda team: stats[team][metric]),
+             min(shard, key=lambda team: stats[team][metric]))
+            for shard in shards
+        ]
+        top = max(stats[high][metric] for high, _ in extremes)
+        bottom = min(stats[low][metric] for _, low in extremes)
+        
+        pairs = [
+            (high, low)
+            for i, (high, _) in enumerate(extremes)
+            for j, (_, low) in enumerate(extremes)
+            if i != j and (stats[high][metric] == top or stats[low][metric] == bottom)
+            and stats[high][metric] - stats[low][metric] >= 2
+        ]
+        pairs.sort(key=lambda pair: stats[pair[1]][metric] - stats[pair[0]][metric])
+        return pairs
+    
+    def _partition_teams(self, n_shards: int) -> List[List[str]]:
+        """Χωρισμός τμημάτων σε n_shards ομάδες με ισορροπημένα σύνολα ep3/φύλου/γνώσης
         
-        for solo_max in max_solos_ep3:
-            for solo_min in min_solos_non_ep3:
-                if solo_max['student'].greek_knowledge == solo_min['student'].greek_knowledge:
-                    improvement = self._calc_asymmetric_improvement(
-                        max_team, [solo_max['name']],
-                        min_team, [solo_min['name']]
-                    )
-                    if improvement['improves']:
-                        swaps.append({
-                            'type': 'Solo(ep3)↔Solo(ep1/2)-P5',
-                            'from_team': max_team,
-                            'students_out': [solo_max['name']],
-                            'to_team': min_team,
-                            'students_in': [solo_min['name']],
-                            'improvement': improvement,
-                            'priority': 5
-                        })
+        Greedy: τα "βαρύτερα" τμήματα πρώτα, το καθένα στο shard που κρατά
+        πιο κοντά στο ίδιο μερίδιο κάθε μετρικής (άθροισμα τετραγώνων).
+        """
+        stats = self._get_team_stats()
+        totals = {m: max(1, sum(s[m] for s in stats.values())) for m in METRICS}
+        capacity = math.ceil(len(stats) / n_shards)
         
-        for pair_max in max_pairs_ep3:
-            for pair_min in min_pairs_non_ep3:
-                ep3_count_max = sum(1 for s in [pair_max['student_a'], pair_max['student_b']] if s.choice == 3)
-                ep3_count_min = sum(1 for s in [pair_min['student_a'], pair_min['student_b']] if s.choice == 3)
-                if ep3_count_max <= ep3_count_min:
-                    continue
-                greeks_max = {pair_max['student_a'].greek_knowledge, pair_max['student_b'].greek_knowledge}
-                greeks_min = {pair_min['student_a'].greek_knowledge, pair_min['student_b'].greek_knowledge}
-                if len(greeks_max) == 1 and len(greeks_min) == 1 and greeks_max == greeks_min:
-                    improvement = self._calc_asymmetric_improvement(
-                        max_team, [pair_max['name_a'], pair_max['name_b']],
-                        min_team, [pair_min['name_a'], pair_min['name_b']]
-                    )
-                    if improvement['improves']:
-                        swaps.append({
-                            'type': f"Δυάδα({pair_max['ep_combo']})↔Δυάδα({pair_min['ep_combo']})-P6",
-                            'from_team': max_team,
-                            'students_out': [pair_max['name_a'], pair_max['name_b']],
-                            'to_team': min_team,
-                            'students_in': [pair_min['name_a'], pair_min['name_b']],
-                            'improvement': improvement,
-                            'priority': 6
-                        })
+        order = sorted(
+            stats.keys(),
+            key=lambda team: -sum(stats[team][m] / totals[m] for m in METRICS)
+        )
         
-        for solo_max in max_solos_ep3:
-            for solo_min in min_solos_non_ep3:
-                improvement = self._calc_asymmetric_improvement(
-                    max_team, [solo_max['name']],
-                    min_team, [solo_min['name']]
+        shards: List[List[str]] = [[] for _ in range(n_shards)]
+        shard_totals = [{m: 0 for m in METRICS} for _ in range(n_shards)]
+        
+        for team in order:
+            best_idx = min(
+                (idx for idx in range(n_shards) if len(shards[idx]) < capacity),
+                key=lambda idx: (
+                    sum(((shard_totals[idx][m] + stats[team][m]) / totals[m]) ** 2 for m in METRICS),
+                    len(shards[idx]), idx
+                )
+            )
+            shards[best_idx].append(team)
+            for m in METRICS:
+                shard_totals[best_idx][m] += stats[team][m]
+        
+        # Σειρά τμημάτων όπως στο workbook μέσα σε κάθε shard
+        position = {team: idx for idx, team in enumerate(self.teams)}
+        return [sorted(shard, key=position.get) for shard in shards if shard]
+    
+    def read_team_assignments(self, file_bytes: bytes) -> Dict[str, List[str]]:
+        """Κατανομή τμήμα -> μαθητές από τα sheets τμημάτων ενός workbook (π.χ. της εξόδου
+        ενός run), μόνο με μαθητές του τρέχοντος roster"""
+        wb = openpyxl.load_workbook(io.BytesIO(file_bytes), data_only=True)
+        teams = {}
+        for sheet_name in wb.sheetnames:
+            if sheet_name in NON_TEAM_SHEETS:
+                continue
+            names = self._read_team_sheet(wb[sheet_name])
+            if names is not None:
+                teams[sheet_name] = [name for name in names if name and name in self.students]
+        wb.close()
+        return teams
+    
+    def reoptimize(self, previous_teams: Dict[str, List[str]], diff: RosterDiff,
+                   max_iterations: int = 100, engine: str = 'multi_metric') -> Tuple[List[Dict], Dict]:
+        """Warm-start: συνέχεια από βελτιστοποιημένη κατανομή μετά από αλλαγές roster
+        
+        Το self.students πρέπει να είναι το roster του προηγούμενου run.
+        Επιδιορθώνονται μόνο όσα αγγίζει το diff και μετά τρέχει το optimize
+        από αυτή την κατάσταση, ώστε τα swaps που έγιναν ήδη να μένουν.
+        """
+        self.teams = {team: list(names) for team, names in previous_teams.items()}
+        affected = self.apply_roster_diff(diff)
+        print(f"\n♻️  Warm start: {len(diff.added)} νέοι, {len(diff.removed)} αποχωρήσεις, "
+              f"{len(diff.changed)} αλλαγές (τμήματα: {', '.join(sorted(affected)) or '-'})")
+        return self.optimize(max_iterations=max_iterations, engine=engine)
+    
+    def apply_roster_diff(self, diff: RosterDiff) -> set:
+        """Εφαρμογή diff στο τρέχον roster/κατανομή - επιστρέφει τα τμήματα που άλλαξαν
+        
+        Τα Student objects μπορεί να είναι κοινά με τον caller (π.χ. το παλιό roster
+        του diff_rosters): αντικαθίστανται με αντίγραφα, ποτέ δεν αλλάζουν επιτόπου.
+        """
+        affected = set()
+        team_of = {name: team for team, names in self.teams.items() for name in names}
+        self.students = dict(self.students)
+        
+        for name in diff.removed:
+            team = team_of.pop(name, None)
+            if team is not None:
+                self.teams[team].remove(name)
+                affected.add(team)
+            self.students.pop(name, None)
+        
+        removed = set(diff.removed)
+        if removed:
+            for name, student in self.students.items():
+                if removed.intersection(student.friends):
+                    self.students[name] = replace(student, friends=[f for f in student.friends if f not in removed])
+        
+        for student in diff.changed:
+            self.students[student.name] = student
+            if student.name in team_of:
+                affected.add(team_of[student.name])
+        
+        for student in diff.added:
+            self.students[student.name] = student
+        
+        # Νέοι φίλοι μπορεί να ενώνουν ομάδες: ξαναχτίζουμε τις ομάδες πριν την τοποθέτηση
+        self._build_friend_groups()
+        
+        for student in diff.added:
+            if student.name in team_of:
+                continue
+            team = self._place_new_student(student, diff.placements.get(student.name), team_of)
+            self.teams[team].append(student.name)
+            team_of[student.name] = team
+            affected.add(team)
+        
+        return affected
+    
+    def _place_new_student(self, student: Student, hint: Optional[str],
+                           team_of: Dict[str, str]) -> str:
+        """Τμήμα για νέο μαθητή: hint, αλλιώς μαζί με φίλους, αλλιώς το καλύτερο για τα spreads
+        
+        Φίλοι: πρώτα όσοι δηλώνει ο ίδιος (με τη σειρά τους), μετά όσοι τον δηλώνουν
+        (αλφαβητικά) - το αποτέλεσμα δεν εξαρτάται από τη σειρά ενός set. Χωρίς φίλους
+        επιλέγονται μόνο τμήματα που δεν μεγαλώνουν το spread μεγέθους πέρα από το
+        τρέχον (ή 1, αν τα μεγέθη είναι ίσα).
+        """
+        if not self.teams:
+            raise ValueError(f"Δεν υπάρχουν τμήματα για τον νέο μαθητή {student.name}")
+        if hint in self.teams:
+            return hint
+        
+        declared = [friend for friend in student.friends if friend != student.name]
+        reverse = sorted(set(self._friend_adj.get(student.name, ())) - set(declared))
+        for friend in declared + reverse:
+            if friend in team_of:
+                return team_of[friend]
+        
+        stats = self._get_team_stats()
+        sizes = {team: len(names) for team, names in self.teams.items()}
+        smallest = min(sizes.values())
+        size_cap = smallest + max(1, max(sizes.values()) - smallest)
+        
+        def cost(team: str) -> Tuple:
+            stats_after = dict(stats)
+            stats_after[team] = stats[team].copy()
+            for metric in METRICS:
+                stats_after[team][metric] += self._metric_hit(student, metric)
+            return self._batch_key(self._spreads_from_stats(stats_after)) + (sizes[team],)
+        
+        return min((team for team in self.teams if sizes[team] + 1 <= size_cap), key=cost)
+    
+    def sweep(self, ep3_targets: Iterable[int] = (2, 3, 4), gender_targets: Iterable[int] = (3, 4, 5),
+              greek_targets: Iterable[int] = (3, 4, 5), engines: Iterable[str] = ENGINES,
+              max_iterations: int = 100, max_workers: Optional[int] = None) -> List[Dict]:
+        """Scenario sweep: optimize σε πλέγμα στόχων × engines, παράλληλα
+        
+        Η κατανομή του self δεν αλλάζει. Το parsed input στέλνεται μία φορά
+        ανά worker (initializer) και όχι ανά σενάριο. Κάθε αποτέλεσμα έχει
+        'pareto'=True αν κανένα άλλο δεν είναι καλύτερο ή ίσο σε όλα
+        (τέσσερα spreads + πλήθος swaps).
+        """
+        configs = [
+            (engine, ep3, gender, greek, max_iterations)
+            for engine, ep3, gender, greek in itertools.product(
+                engines, ep3_targets, gender_targets, greek_targets
+            )
+        ]
+        for config in configs:
+            if config[0] not in ENGINES:
+                raise ValueError(f"Άγνωστο engine '{config[0]}' (διαθέσιμα: {', '.join(ENGINES)})")
+        
+        print(f"\n🔬 Sweep: {len(configs)} σενάρια")
+        moves = {name: getattr(self, name) for name in MOVE_OPTIONS}
+        
+        if max_workers == 1 or len(configs) <= 1:
+            _init_sweep_worker(self.students, self.teams, self.objective, moves)
+            results = [_run_sweep_config(config) for config in configs]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sweep_worker,
+                                     initargs=(self.students, self.teams, self.objective, moves)) as pool:
+                results = list(pool.map(_run_sweep_config, configs))
+        
+        for result in results:
+            point = self._sweep_point(result)
+            result['pareto'] = not any(
+                other is not result and
+                all(a <= b for a, b in zip(self._sweep_point(other), point)) and
+                self._sweep_point(other) != point
+                for other in results
+            )
+        
+        return results
+    
+    def _sweep_point(self, result: Dict) -> Tuple:
+        return tuple(result['spreads'][m] for m in METRICS) + (result['swaps'],)
+    
+    def _targets_met(self, spreads: Dict[str, int]) -> bool:
+        return all(spreads[m] <= self._metric_target(m) for m in METRICS)
+    
+    def _metric_target(self, metric: str) -> int:
+        if metric == 'ep3':
+            return self.target_ep3
+        if metric in ('boys', 'girls'):
+            return self.target_gender
+        return self.target_greek
+    
+    def _step_asymmetric(self) -> List[Dict]:
+        """Ένα iteration του αρχικού αλγορίθμου (max/min βάσει ep3)"""
+        stats = self._get_team_stats()
+        ep3_counts = {team: stats[team]['ep3'] for team in stats.keys()}
+        
+        max_team = max(ep3_counts.items(), key=lambda x: x[1])[0]
+        min_team = min(ep3_counts.items(), key=lambda x: x[1])[0]
+        
+        if ep3_counts[max_team] - ep3_counts[min_team] <= self.target_ep3:
+            return []
+        
+        all_swaps = self._generate_asymmetric_swaps(max_team, min_team)
+        
+        if not all_swaps:
+            return []
+        
+        best_swap = self._select_best_swap(all_swaps)
+        
+        if not best_swap:
+            return []
+        
+        self._apply_swap(best_swap)
+        return [best_swap]
+    
+    def _step_multi_metric(self) -> List[Dict]:
+        """Ένα iteration multi-metric: η χειρότερη μετρική ορίζει το ζεύγος τμημάτων"""
+        stats = self._get_team_stats()
+        spreads = self._objective_spreads(stats)
+        
+        # Μετρικές εκτός στόχου, με σειρά υπέρβασης (ισοπαλία: σειρά METRICS)
+        violated = sorted(
+            (m for m in METRICS if spreads[m] > self._metric_target(m)),
+            key=lambda m: (-(spreads[m] - self._metric_target(m)), METRICS.index(m))
+        )
+        
+        for metric in violated:
+            counts = {team: stats[team][metric] for team in stats.keys()}
+            max_team = max(counts.items(), key=lambda x: x[1])[0]
+            min_team = min(counts.items(), key=lambda x: x[1])[0]
+            
+            swaps = self._generate_metric_swaps(metric, max_team, min_team, stats, spreads)
+            best_swap = self._select_best_metric_swap(swaps)
+            
+            # Αν η χειρότερη μετρική δεν έχει κίνηση, δοκίμασε την επόμενη
+            if best_swap:
+                self._apply_swap(best_swap)
+                return [best_swap]
+        
+        return []
+    
+    def _metric_hit(self, student: Student, metric: str) -> int:
+        """1 αν ο μαθητής μετράει στη μετρική, αλλιώς 0"""
+        if metric == 'ep3':
+            return int(student.choice == 3)
+        if metric == 'boys':
+            return int(student.gender == 'Α')
+        if metric == 'girls':
+            return int(student.gender == 'Κ')
+        return int(student.greek_knowledge == 'Ν')
+    
+    def _student_attr(self, student: Student, attr: str):
+        if attr == 'ep3':
+            return student.choice == 3
+        if attr == 'gender':
+            return student.gender
+        return student.greek_knowledge
+    
+    def _metric_label(self, student: Student, metric: str) -> str:
+        if metric == 'ep3':
+            return str(student.choice)
+        if metric in ('boys', 'girls'):
+            return student.gender
+        return student.greek_knowledge
+    
+    def _get_solos(self, team_name: str) -> List[Dict]:
+        """Όλοι οι μη κλειδωμένοι μαθητές χωρίς φίλο στο τμήμα"""
+        solos = []
+        for unit in self._get_team_units(team_name):
+            if len(unit) != 1:
+                continue
+            student = self.students[unit[0]]
+            if not student.locked:
+                solos.append({'name': unit[0], 'student': student})
+        return solos
+    
+    def _get_team_units(self, team_name: str) -> List[List[str]]:
+        """Συνεκτικές συνιστώσες φίλων μέσα στο τμήμα (index ανά τμήμα)
+        
+        Κάθε συνιστώσα είναι λίστα ονομάτων με τη σειρά του τμήματος και οι
+        συνιστώσες ταξινομούνται κατά τη θέση του πρώτου μέλους τους.
+        Το index ξαναχτίζεται μόνο όταν αλλάξει η σύνθεση του τμήματος.
+        """
+        members = tuple(self.teams[team_name])
+        cached = self._unit_index.get(team_name)
+        if cached is not None and cached[0] == members:
+            return cached[1]
+        
+        if self._friend_adj is None:
+            self._build_friend_groups()
+        
+        present = [name for name in members if name in self.students]
+        in_team = set(present)
+        uf = UnionFind()
+        for name in present:
+            uf.add(name)
+        for name in present:
+            for friend in self._friend_adj.get(name, ()):
+                if friend in in_team:
+                    uf.union(name, friend)
+        
+        units = list(uf.groups().values())
+        self._unit_index[team_name] = (members, units)
+        return units
+    
+    def _build_friend_groups(self) -> None:
+        """Union-find των φίλων σε ομάδες (μία φορά μετά τη φόρτωση)"""
+        adj: Dict[str, set] = {name: set() for name in self.students}
+        uf = UnionFind()
+        for name in self.students:
+            uf.add(name)
+        for name, student in self.students.items():
+            for friend in student.friends:
+                if friend in self.students and friend != name:
+                    adj[name].add(friend)
+                    adj[friend].add(name)
+                    uf.union(name, friend)
+        
+        self._friend_adj = adj
+        self.friend_groups = {root: members for root, members in uf.groups().items() if len(members) > 1}
+        self._unit_index = {}
+        self._batch_units = {}
+        self._batch_pairs = {}
+    
+    def _generate_metric_swaps(self, metric: str, max_team: str, min_team: str,
+                               stats: Dict, spreads: Dict[str, int]) -> List[Dict]:
+        """Γέννηση swaps για οποιαδήποτε μετρική, με την κλιμάκωση P1-P8"""
+        swaps = []
+        for swap in self._iter_metric_moves(metric, max_team, min_team):
+            improvement = self._calc_metric_improvement(
+                metric, stats, spreads,
+                max_team, swap['students_out'], min_team, swap['students_in']
+            )
+            if improvement['improves']:
+                swap['improvement'] = improvement
+                swaps.append(swap)
+        return swaps
+    
+    def _iter_metric_moves(self, metric: str, max_team: str, min_team: str):
+        """Υποψήφια swaps (χωρίς αξιολόγηση) για μια μετρική, P1-P8"""
+        units = {team: (self._get_solos(team), self._get_groups(team)) for team in (max_team, min_team)}
+        
+        first_attr, second_attr = PROTECTED_ATTRS[metric]
+        
+        # Ίδια φίλτρα με τα ep3 helpers: το max τμήμα δίνει "hits", το min δίνει "non-hits"
+        max_solos = [s for s in units[max_team][0] if self._metric_hit(s['student'], metric)]
+        min_solos = [s for s in units[min_team][0] if not self._metric_hit(s['student'], metric)]
+        max_pairs = [g for g in units[max_team][1]
+                     if any(self._metric_hit(s, metric) for s in g['students'])]
+        min_pairs_by_size = self._groups_by_size(units[min_team][1])
+        
+        tiers = [
+            (1, 2, (first_attr, second_attr)),
+            (3, 4, (first_attr,)),
+            (5, 6, (second_attr,)),
+            (7, 8, ()),
+        ]
+        
+        seen = set()
+        
+        def candidate(priority: int, label: str, names_out: List[str], names_in: List[str]) -> Optional[Dict]:
+            key = (tuple(names_out), tuple(names_in))
+            if key in seen:
+                return None
+            seen.add(key)
+            return {
+                'type': f"{label}-P{priority}",
+                'from_team': max_team,
+                'students_out': names_out,
+                'to_team': min_team,
+                'students_in': names_in,
+                'priority': priority,
+                'metric': metric
+            }
+        
+        for solo_priority, pair_priority, attrs in tiers:
+            for solo_max in max_solos:
+                for solo_min in min_solos:
+                    s_max, s_min = solo_max['student'], solo_min['student']
+                    if all(self._student_attr(s_max, a) == self._student_attr(s_min, a) for a in attrs):
+                        swap = candidate(
+                            solo_priority,
+                            f"Solo({self._metric_label(s_max, metric)})↔Solo({self._metric_label(s_min, metric)})",
+                            [solo_max['name']], [solo_min['name']]
+                        )
+                        if swap:
+                            yield swap
+            
+            for pair_max in max_pairs:
+                for pair_min in min_pairs_by_size.get(len(pair_max['names']), []):
+                    members_max = pair_max['students']
+                    members_min = pair_min['students']
+                    hits_max = sum(self._metric_hit(s, metric) for s in members_max)
+                    hits_min = sum(self._metric_hit(s, metric) for s in members_min)
+                    if hits_max <= hits_min:
+                        continue
+                    
+                    compatible = True
+                    for a in attrs:
+                        values_max = {self._student_attr(s, a) for s in members_max}
+                        values_min = {self._student_attr(s, a) for s in members_min}
+                        if len(values_max) != 1 or values_max != values_min:
+                            compatible = False
+                            break
+                    
+                    if compatible:
+                        combo_max = ','.join(self._metric_label(s, metric) for s in members_max)
+                        combo_min = ','.join(self._metric_label(s, metric) for s in members_min)
+                        swap = candidate(
+                            pair_priority,
+                            f"{self._unit_label(pair_max)}({combo_max})↔{self._unit_label(pair_min)}({combo_min})",
+                            list(pair_max['names']),
+                            list(pair_min['names'])
+                        )
+                        if swap:
+                            yield swap
+    
+    def _step_batched(self) -> List[Dict]:
+        """Ένας γύρος batched: ένα swap ανά ζεύγος τμημάτων, ξένα μεταξύ τους
+        
+        Κάθε swap αξιολογείται με τη μείωση του αθροίσματος τετραγωνικών
+        αποκλίσεων των counts, που αφορά μόνο τα δύο τμήματα του swap -
+        έτσι τα κέρδη swaps σε ξένα ζεύγη προστίθενται ακριβώς.
+        
+        Κανένα swap του batch δεν χειροτερεύει το objective ή το _batch_key, και
+        το batch εφαρμόζεται μόνο αν συνολικά βελτιώνει (improves) την κατάσταση
+        πριν τον γύρο· αλλιώς το καλύτερο μεμονωμένο swap που βελτιώνει, ή τίποτα.
+        """
+        stats = self._get_team_stats()
+        spreads = self._objective_spreads(stats)
+        edges = [swap for swap in self._batch_edges(stats) if self._batch_accepts(spreads, stats, swap)]
+        
+        if not edges:
+            return []
+        
+        edges.sort(key=lambda x: (-x['pair_score'], x['priority']))
+        batch = self._match_team_pairs(edges)
+        best_single = edges[0]
+        
+        # Έλεγχος: το batch δεν πρέπει να είναι χειρότερο από το καλύτερο μεμονωμένο swap
+        stats_batch = stats
+        for swap in batch:
+            stats_batch = self._stats_after_swap(stats_batch, swap)
+        stats_single = self._stats_after_swap(stats, best_single)
+        
+        if (self._batch_key(self._spreads_from_stats(stats_batch)) >
+                self._batch_key(self._spreads_from_stats(stats_single))):
+            batch = [best_single]
+        
+        applied = self._build_batch(stats, spreads, batch)
+        if not applied:
+            # Το batch δεν βελτιώνει συνολικά: το καλύτερο μεμονωμένο swap που βελτιώνει
+            for swap in edges:
+                applied = self._build_batch(stats, spreads, [swap])
+                if applied:
+                    break
+        
+        for swap in applied:
+            swap['improvement']['pair_score'] = swap.pop('pair_score')
+            self._apply_swap(swap)
+        return applied
+    
+    def _build_batch(self, stats: Dict, spreads: Dict[str, int], batch: List[Dict]) -> List[Dict]:
+        """Τα swaps του batch που δεν χειροτερεύουν την ενημερωμένη κατάσταση
+        
+        Κάθε swap κρατά το πραγματικό του improvement (απέναντι στην κατάσταση πριν
+        από αυτό). Κενή λίστα αν το σύνολο δεν βελτιώνει την κατάσταση πριν τον γύρο.
+        """
+        spreads_round = spreads
+        kept = []
+        for swap in batch:
+            stats_after = self._stats_after_swap(stats, swap)
+            spreads_after = self._objective_spreads(stats_after)
+            improvement = self._improvement_from_spreads(spreads, spreads_after)
+            # Τα spreads είναι κοινά για όλο το batch: έλεγχος πάνω στην ενημερωμένη κατάσταση
+            if not self._not_worse(improvement, spreads, spreads_after):
+                continue
+            swap['improvement'] = improvement
+            kept.append(swap)
+            stats, spreads = stats_after, spreads_after
+        
+        if not kept or not self._improvement_from_spreads(spreads_round, spreads)['improves']:
+            return []
+        return kept
+    
+    def _not_worse(self, improvement: Dict, spreads: Dict[str, int], spreads_after: Dict[str, int]) -> bool:
+        return (improvement['objective_after'] <= improvement['objective_before'] and
+                self._batch_key(spreads_after) <= self._batch_key(spreads))
+    
+    def _batch_accepts(self, spreads: Dict[str, int], stats: Dict, swap: Dict) -> bool:
+        """Το swap μόνο του δεν χειροτερεύει ούτε το objective ούτε το _batch_key"""
+        stats_after = self._stats_after_swap(stats, swap)
+        spreads_after = self._objective_spreads(stats_after)
+        return self._not_worse(self._improvement_from_spreads(spreads, spreads_after), spreads, spreads_after)
+    
+    def _batch_edges(self, stats: Dict) -> List[Dict]:
+        """Καλύτερο swap ανά ζεύγος τμημάτων (ακμή του γράφου)
+        
+        Μόνο μετρικές εκτός στόχου και ζεύγη όπου το ένα τμήμα είναι max ή min της
+        μετρικής και η διαφορά τους ξεπερνά τον στόχο, με έως BATCH_PARTNERS εταίρους
+        ανά ακραίο τμήμα: O(ακραία τμήματα) ζεύγη ανά γύρο αντί για όλα. Τα swaps ζευγών που δεν άλλαξαν από τον προηγούμενο γύρο έρχονται από
+        το cache (_pair_metric_swap).
+        """
+        team_names = list(self.teams.keys())
+        best_by_pair: Dict[FrozenSet[str], Dict] = {}
+        for metric in METRICS:
+            counts = {team: stats[team][metric] for team in team_names}
+            hi, lo = max(counts.values()), min(counts.values())
+            # Με διαφορά < 2 κανένα swap δεν μειώνει την απόκλιση της μετρικής
+            min_diff = max(2, self._metric_target(metric) + 1)
+            if hi - lo < min_diff:
+                continue
+            for team_x in team_names:
+                if counts[team_x] != hi and counts[team_x] != lo:
+                    continue
+                # Το τμήμα μπαίνει σε ένα μόνο swap του γύρου: αρκούν οι πιο μακρινοί εταίροι
+                partners = sorted(
+                    (team_y for team_y in team_names if abs(counts[team_x] - counts[team_y]) >= min_diff),
+                    key=lambda team_y: -abs(counts[team_x] - counts[team_y])
+                )[:BATCH_PARTNERS]
+                for team_y in partners:
+                    diff = counts[team_x] - counts[team_y]
+                    high, low = (team_x, team_y) if diff > 0 else (team_y, team_x)
+                    swap = self._pair_metric_swap(metric, high, low, stats)
+                    if swap is None:
+                        continue
+                    pair = frozenset((high, low))
+                    best = best_by_pair.get(pair)
+                    if best is None or (swap['pair_score'], -swap['priority']) > (best['pair_score'], -best['priority']):
+                        best_by_pair[pair] = swap
+        return list(best_by_pair.values())
+    
+    def _pair_metric_swap(self, metric: str, high: str, low: str, stats: Dict) -> Optional[Dict]:
+        """Το swap με τη μεγαλύτερη μείωση τετραγωνικών αποκλίσεων για (μετρική, high, low)
+        
+        Ίδιες κινήσεις και priorities με το _iter_metric_moves, αλλά αξιολογείται μία
+        μονάδα ανά κλάση (_batch_team_units) αντί για κάθε ζεύγος μαθητών. Ισοπαλίες:
+        το μικρότερο priority και μετά η σειρά των τμημάτων, όπως στην απαρίθμηση.
+        Το pair_score εξαρτάται μόνο από τα δύο τμήματα, άρα το αποτέλεσμα μένει έγκυρο
+        όσο δεν αλλάζει η σύνθεσή τους - επιστρέφεται αντίγραφο του cached swap.
+        """
+        members = (tuple(self.teams[high]), tuple(self.teams[low]))
+        cached = self._batch_pairs.get((metric, high, low))
+        if cached is None or cached[0] != members:
+            cached = self._batch_pairs[(metric, high, low)] = (members, self._best_class_swap(metric, high, low, stats))
+        return dict(cached[1]) if cached[1] is not None else None
+    
+    def _best_class_swap(self, metric: str, high: str, low: str, stats: Dict) -> Optional[Dict]:
+        hit = METRICS.index(metric)
+        attrs = [UNIT_ATTRS.index(a) for a in PROTECTED_ATTRS[metric]]
+        tiers = [(0, attrs), (2, attrs[:1]), (4, attrs[1:]), (6, [])]
+        solos_high, groups_high = self._batch_team_units(high)
+        solos_low, groups_low = self._batch_team_units(low)
+        
+        best = None
+        best_key = None
+        
+        def consider(priority: int, sig_out: Tuple[int, ...], sig_in: Tuple[int, ...], unit_out, unit_in) -> None:
+            nonlocal best, best_key
+            score = self._pair_swap_score(stats, high, sig_out, low, sig_in)
+            if score > 0 and (best_key is None or (score, -priority) > best_key):
+                best_key = (score, -priority)
+                best = (priority, unit_out, unit_in)
+        
+        for (sig_out, values_out), solo_out in solos_high.items():
+            if not sig_out[hit]:
+                continue
+            for (sig_in, values_in), solo_in in solos_low.items():
+                if sig_in[hit]:
+                    continue
+                # Solo↔Solo: P1/P3/P5/P7, το πρώτο tier με ίδιες τις προστατευμένες ιδιότητες
+                priority = next(base + 1 for base, tier in tiers
+                                if all(values_out[a] == values_in[a] for a in tier))
+                consider(priority, sig_out, sig_in, solo_out, solo_in)
+        
+        for (size, sig_out, values_out), group_out in groups_high.items():
+            if not sig_out[hit]:
+                continue
+            for (size_in, sig_in, values_in), group_in in groups_low.items():
+                if size_in != size or sig_in[hit] >= sig_out[hit]:
+                    continue
+                # Ομάδα↔Ομάδα: P2/P4/P6/P8, κάθε προστατευμένη ιδιότητα μία και ίδια τιμή
+                priority = next(base + 2 for base, tier in tiers
+                                if all(len(values_out[a]) == 1 and values_out[a] == values_in[a] for a in tier))
+                consider(priority, sig_out, sig_in, group_out, group_in)
+        
+        if best is None:
+            return None
+        priority, unit_out, unit_in = best
+        if 'name' in unit_out:
+            s_out, s_in = unit_out['student'], unit_in['student']
+            label = f"Solo({self._metric_label(s_out, metric)})↔Solo({self._metric_label(s_in, metric)})"
+            names_out, names_in = [unit_out['name']], [unit_in['name']]
+        else:
+            combo_out = ','.join(self._metric_label(s, metric) for s in unit_out['students'])
+            combo_in = ','.join(self._metric_label(s, metric) for s in unit_in['students'])
+            label = f"{self._unit_label(unit_out)}({combo_out})↔{self._unit_label(unit_in)}({combo_in})"
+            names_out, names_in = list(unit_out['names']), list(unit_in['names'])
+        return {
+            'type': f"{label}-P{priority}",
+            'from_team': high,
+            'students_out': names_out,
+            'to_team': low,
+            'students_in': names_in,
+            'priority': priority,
+            'metric': metric,
+            'pair_score': best_key[0]
+        }
+    
+    def _batch_team_units(self, team: str) -> Tuple[Dict[Tuple, Dict], Dict[Tuple, Dict]]:
+        """Κλάσεις solos και ομάδων ενός τμήματος για το batched engine
+        
+        Κλειδί: υπογραφή counts (σειρά METRICS) + τιμές των UNIT_ATTRS (σύνολα τιμών για
+        ομάδες, μαζί με το μέγεθος)· τιμή: η πρώτη μονάδα της κλάσης, με τη σειρά του
+        τμήματος. Ξαναχτίζονται μόνο όταν αλλάξει η σύνθεση του τμήματος.
+        """
+        members = tuple(self.teams[team])
+        cached = self._batch_units.get(team)
+        if cached is None or cached[0] != members:
+            solos: Dict[Tuple, Dict] = {}
+            for solo in self._get_solos(team):
+                values = tuple(self._student_attr(solo['student'], a) for a in UNIT_ATTRS)
+                solos.setdefault((self._unit_signature([solo['name']]), values), solo)
+            groups: Dict[Tuple, Dict] = {}
+            for group in self._get_groups(team):
+                values = tuple(frozenset(self._student_attr(s, a) for s in group['students']) for a in UNIT_ATTRS)
+                groups.setdefault((len(group['names']), self._unit_signature(group['names']), values), group)
+            cached = self._batch_units[team] = (members, (solos, groups))
+        return cached[1]
+    
+    def _pair_swap_score(self, stats: Dict, team_high: str, sig_out: Tuple[int, ...],
+                         team_low: str, sig_in: Tuple[int, ...]) -> int:
+        """Μείωση του Σ(count - μέσος)^2 σε όλες τις μετρικές (υπογραφές σε σειρά METRICS)
+        
+        Για μεταβολή d στο team_high (και -d στο team_low) η μείωση είναι
+        2d(low - high - d), ανεξάρτητη από τον μέσο όρο.
+        """
+        score = 0
+        for metric, out, into in zip(METRICS, sig_out, sig_in):
+            d = into - out
+            if d:
+                score += 2 * d * (stats[team_low][metric] - stats[team_high][metric] - d)
+        return score
+    
+    def _match_team_pairs(self, edges: List[Dict]) -> List[Dict]:
+        """Greedy matching βάρους: κάθε τμήμα συμμετέχει σε ένα μόνο swap του γύρου
+        
+        Οι ακμές έρχονται ταξινομημένες κατά φθίνον pair_score (1/2-προσέγγιση
+        του maximum-weight matching).
+        """
+        used = set()
+        batch = []
+        for swap in edges:
+            teams = {move['from_team'] for move in self._swap_moves(swap)}
+            if teams & used:
+                continue
+            used |= teams
+            batch.append(swap)
+        return batch
+    
+    def _batch_key(self, spreads: Dict[str, int]) -> Tuple:
+        return (self._total_excess(spreads), spreads['ep3'],
+                spreads['boys'] + spreads['girls'], spreads['greek_yes'])
+    
+    def _stats_after_move(self, stats: Dict, team_high: str, names_out: List[str],
+                          team_low: str, names_in: List[str]) -> Dict:
+        """Νέα stats μετά το swap - αντιγράφονται μόνο τα δύο τμήματα"""
+        stats_after = dict(stats)
+        high = stats_after[team_high] = stats[team_high].copy()
+        low = stats_after[team_low] = stats[team_low].copy()
+        
+        for name, sign in [(n, -1) for n in names_out] + [(n, 1) for n in names_in]:
+            if name not in self.students:
+                continue
+            s = self.students[name]
+            for metric in METRICS:
+                hit = self._metric_hit(s, metric)
+                high[metric] += sign * hit
+                low[metric] -= sign * hit
+            high['size'] += sign
+            low['size'] -= sign
+        
+        return stats_after
+    
+    def _swap_moves(self, swap: Dict) -> List[Dict]:
+        """Οι μετακινήσεις ενός swap: οι κύκλοι τις έχουν έτοιμες, τα swaps δύο τμημάτων δίνουν δύο"""
+        if 'moves' in swap:
+            return swap['moves']
+        return [
+            {'from_team': swap['from_team'], 'to_team': swap['to_team'], 'students': swap['students_out']},
+            {'from_team': swap['to_team'], 'to_team': swap['from_team'], 'students': swap['students_in']},
+        ]
+    
+    def _stats_after_swap(self, stats: Dict, swap: Dict) -> Dict:
+        """Νέα stats μετά από swap δύο τμημάτων ή κύκλο"""
+        for move in self._swap_moves(swap):
+            stats = self._stats_after_move(stats, move['from_team'], move['students'], move['to_team'], [])
+        return stats
+    
+    def _extreme_count(self, stats: Dict, metric: str) -> int:
+        """Πόσα τμήματα βρίσκονται στο max ή στο min της μετρικής"""
+        values = [s[metric] for s in stats.values()]
+        hi, lo = max(values), min(values)
+        return sum(1 for v in values if v == hi or v == lo)
+    
+    def _total_excess(self, spreads: Dict[str, int]) -> int:
+        return sum(max(0, spreads[m] - self._metric_target(m)) for m in METRICS)
+    
+    def _calc_metric_improvement(self, metric: str, stats_before: Dict, spreads_before: Dict[str, int],
+                                 team_high: str, names_out: List[str],
+                                 team_low: str, names_in: List[str]) -> Dict:
+        """Λεξικογραφικός κανόνας αποδοχής για multi-metric swaps
+        
+        1. Καμία μετρική που ήδη ικανοποιεί τον στόχο δεν βγαίνει εκτός
+        2. Η συνολική υπέρβαση στόχων δεν αυξάνεται
+        3. Η στοχευμένη μετρική βελτιώνεται (spread, ή λιγότερα τμήματα στα άκρα)
+        """
+        stats_after = self._stats_after_move(stats_before, team_high, names_out, team_low, names_in)
+        spreads_after = self._objective_spreads(stats_after)
+        
+        protects = all(
+            spreads_after[m] <= self._metric_target(m)
+            for m in METRICS if spreads_before[m] <= self._metric_target(m)
+        )
+        delta_excess = self._total_excess(spreads_before) - self._total_excess(spreads_after)
+        key_before = (spreads_before[metric], self._extreme_count(stats_before, metric))
+        key_after = (spreads_after[metric], self._extreme_count(stats_after, metric))
+        
+        improves = protects and delta_excess >= 0 and key_after < key_before
+        # Το objective εδώ μόνο αναφέρεται - η αποδοχή μένει ο κανόνας του multi-metric
+        objective = self.objective.evaluate(spreads_before, spreads_after, self._objective_targets())
+        
+        return {
+            'improves': improves,
+            'delta_ep3': spreads_before['ep3'] - spreads_after['ep3'],
+            'delta_boys': spreads_before['boys'] - spreads_after['boys'],
+            'delta_girls': spreads_before['girls'] - spreads_after['girls'],
+            'delta_greek': spreads_before['greek_yes'] - spreads_after['greek_yes'],
+            'ep3_before': spreads_before['ep3'],
+            'ep3_after': spreads_after['ep3'],
+            'delta_metric': spreads_before[metric] - spreads_after[metric],
+            'delta_excess': delta_excess,
+            'objective_before': objective['objective_before'],
+            'objective_after': objective['objective_after']
+        }
+    
+    def _select_best_metric_swap(self, swaps: List[Dict]) -> Optional[Dict]:
+        if not swaps:
+            return None
+        
+        swaps.sort(
+            key=lambda x: (
+                -x['improvement']['delta_metric'],
+                -x['improvement']['delta_excess'],
+                -(x['improvement']['delta_ep3'] + x['improvement']['delta_boys'] +
+                  x['improvement']['delta_girls'] + x['improvement']['delta_greek']),
+                x['priority']
+            )
+        )
+        
+        return swaps[0]
+    
+    def _generate_asymmetric_swaps(self, max_team: str, min_team: str) -> List[Dict]:
+        """Γέννηση asymmetric swaps με 8 priorities"""
+        swaps = []
+        # Stats μία φορά ανά βήμα - κάθε υποψήφιο αξιολογείται από τα deltas του
+        context = self._pair_context(self._get_team_stats(), max_team, min_team)
+        
+        max_solos_ep3 = self._get_solos_with_ep3(max_team)
+        max_pairs_ep3 = self._get_groups_with_ep3(max_team)
+        min_solos_non_ep3 = self._get_solos_without_ep3(min_team)
+        # Ομάδες του min τμήματος ανά μέγεθος: ανταλλαγή μόνο ισομεγεθών ομάδων
+        min_groups_by_size = self._groups_by_size(self._get_groups(min_team))
+        
+        # P1: Solo(ep3) ↔ Solo(ep1/2), ίδιο φύλο+γλώσσα
+        for solo_max in max_solos_ep3:
+            for solo_min in min_solos_non_ep3:
+                if (solo_max['student'].gender == solo_min['student'].gender and
+                    solo_max['student'].greek_knowledge == solo_min['student'].greek_knowledge):
+                    
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, [solo_max['name']],
+                        min_team, [solo_min['name']], context
+                    )
+                    
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': 'Solo(ep3)↔Solo(ep1/2)-P1',
+                            'from_team': max_team,
+                            'students_out': [solo_max['name']],
+                            'to_team': min_team,
+                            'students_in': [solo_min['name']],
+                            'improvement': improvement,
+                            'priority': 1
+                        })
+        
+        # P2: Δυάδα(ep3) ↔ Δυάδα(ep1/2), ίδιο φύλο+γλώσσα
+        for pair_max in max_pairs_ep3:
+            for pair_min in min_groups_by_size.get(len(pair_max['names']), []):
+                ep3_count_max = sum(1 for s in pair_max['students'] if s.choice == 3)
+                ep3_count_min = sum(1 for s in pair_min['students'] if s.choice == 3)
+                
+                if ep3_count_max <= ep3_count_min:
+                    continue
+                
+                genders_max = {s.gender for s in pair_max['students']}
+                genders_min = {s.gender for s in pair_min['students']}
+                greeks_max = {s.greek_knowledge for s in pair_max['students']}
+                greeks_min = {s.greek_knowledge for s in pair_min['students']}
+                
+                if (len(genders_max) == 1 and len(genders_min) == 1 and genders_max == genders_min and
+                    len(greeks_max) == 1 and len(greeks_min) == 1 and greeks_max == greeks_min):
+                    
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, list(pair_max['names']),
+                        min_team, list(pair_min['names']), context
+                    )
+                    
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': f"{self._unit_label(pair_max)}({pair_max['ep_combo']})↔{self._unit_label(pair_min)}({pair_min['ep_combo']})-P2",
+                            'from_team': max_team,
+                            'students_out': list(pair_max['names']),
+                            'to_team': min_team,
+                            'students_in': list(pair_min['names']),
+                            'improvement': improvement,
+                            'priority': 2
+                        })
+        
+        # P3-8: Χαλάρωση περιορισμών (όπως πριν)
+        for solo_max in max_solos_ep3:
+            for solo_min in min_solos_non_ep3:
+                if solo_max['student'].gender == solo_min['student'].gender:
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, [solo_max['name']],
+                        min_team, [solo_min['name']], context
+                    )
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': 'Solo(ep3)↔Solo(ep1/2)-P3',
+                            'from_team': max_team,
+                            'students_out': [solo_max['name']],
+                            'to_team': min_team,
+                            'students_in': [solo_min['name']],
+                            'improvement': improvement,
+                            'priority': 3
+                        })
+        
+        for pair_max in max_pairs_ep3:
+            for pair_min in min_groups_by_size.get(len(pair_max['names']), []):
+                ep3_count_max = sum(1 for s in pair_max['students'] if s.choice == 3)
+                ep3_count_min = sum(1 for s in pair_min['students'] if s.choice == 3)
+                if ep3_count_max <= ep3_count_min:
+                    continue
+                genders_max = {s.gender for s in pair_max['students']}
+                genders_min = {s.gender for s in pair_min['students']}
+                if len(genders_max) == 1 and len(genders_min) == 1 and genders_max == genders_min:
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, list(pair_max['names']),
+                        min_team, list(pair_min['names']), context
+                    )
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': f"{self._unit_label(pair_max)}({pair_max['ep_combo']})↔{self._unit_label(pair_min)}({pair_min['ep_combo']})-P4",
+                            'from_team': max_team,
+                            'students_out': list(pair_max['names']),
+                            'to_team': min_team,
+                            'students_in': list(pair_min['names']),
+                            'improvement': improvement,
+                            'priority': 4
+                        })
+        
+        for solo_max in max_solos_ep3:
+            for solo_min in min_solos_non_ep3:
+                if solo_max['student'].greek_knowledge == solo_min['student'].greek_knowledge:
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, [solo_max['name']],
+                        min_team, [solo_min['name']], context
+                    )
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': 'Solo(ep3)↔Solo(ep1/2)-P5',
+                            'from_team': max_team,
+                            'students_out': [solo_max['name']],
+                            'to_team': min_team,
+                            'students_in': [solo_min['name']],
+                            'improvement': improvement,
+                            'priority': 5
+                        })
+        
+        for pair_max in max_pairs_ep3:
+            for pair_min in min_groups_by_size.get(len(pair_max['names']), []):
+                ep3_count_max = sum(1 for s in pair_max['students'] if s.choice == 3)
+                ep3_count_min = sum(1 for s in pair_min['students'] if s.choice == 3)
+                if ep3_count_max <= ep3_count_min:
+                    continue
+                greeks_max = {s.greek_knowledge for s in pair_max['students']}
+                greeks_min = {s.greek_knowledge for s in pair_min['students']}
+                if len(greeks_max) == 1 and len(greeks_min) == 1 and greeks_max == greeks_min:
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, list(pair_max['names']),
+                        min_team, list(pair_min['names']), context
+                    )
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': f"{self._unit_label(pair_max)}({pair_max['ep_combo']})↔{self._unit_label(pair_min)}({pair_min['ep_combo']})-P6",
+                            'from_team': max_team,
+                            'students_out': list(pair_max['names']),
+                            'to_team': min_team,
+                            'students_in': list(pair_min['names']),
+                            'improvement': improvement,
+                            'priority': 6
+                        })
+        
+        for solo_max in max_solos_ep3:
+            for solo_min in min_solos_non_ep3:
+                improvement = self._calc_asymmetric_improvement(
+                    max_team, [solo_max['name']],
+                    min_team, [solo_min['name']], context
                 )
                 if improvement['improves']:
                     swaps.append({
@@ -501,214 +2055,561 @@ class TeamOptimizer:
                     })
         
         for pair_max in max_pairs_ep3:
-            for pair_min in min_pairs_non_ep3:
-                ep3_count_max = sum(1 for s in [pair_max['student_a'], pair_max['student_b']] if s.choice == 3)
-                ep3_count_min = sum(1 for s in [pair_min['student_a'], pair_min['student_b']] if s.choice == 3)
+            for pair_min in min_groups_by_size.get(len(pair_max['names']), []):
+                ep3_count_max = sum(1 for s in pair_max['students'] if s.choice == 3)
+                ep3_count_min = sum(1 for s in pair_min['students'] if s.choice == 3)
                 if ep3_count_max <= ep3_count_min:
                     continue
                 improvement = self._calc_asymmetric_improvement(
-                    max_team, [pair_max['name_a'], pair_max['name_b']],
-                    min_team, [pair_min['name_a'], pair_min['name_b']]
+                    max_team, list(pair_max['names']),
+                    min_team, list(pair_min['names']), context
                 )
                 if improvement['improves']:
                     swaps.append({
-                        'type': f"Δυάδα({pair_max['ep_combo']})↔Δυάδα({pair_min['ep_combo']})-P8",
+                        'type': f"{self._unit_label(pair_max)}({pair_max['ep_combo']})↔{self._unit_label(pair_min)}({pair_min['ep_combo']})-P8",
                         'from_team': max_team,
-                        'students_out': [pair_max['name_a'], pair_max['name_b']],
+                        'students_out': list(pair_max['names']),
                         'to_team': min_team,
-                        'students_in': [pair_min['name_a'], pair_min['name_b']],
+                        'students_in': list(pair_min['names']),
                         'improvement': improvement,
                         'priority': 8
                     })
         
+        if self.mixed_moves:
+            swaps.extend(self._generate_mixed_swaps(max_team, min_team, context))
+        if self.transfer_size_tolerance is not None:
+            swaps.extend(self._generate_transfers(max_team, min_team, context))
+        # P12 μόνο ως fallback, όταν καμία κίνηση P1-P11 δεν βελτιώνει: οι κύκλοι
+        # ψάχνουν σε όλα τα τρίτα τμήματα και είναι η ακριβότερη γεννήτρια
+        if self.rotations and not swaps:
+            swaps.extend(self._generate_rotations(max_team, min_team, context))
+        
         return swaps
     
-    def _get_solos_with_ep3(self, team_name: str) -> List[Dict]:
-        solos = []
-        student_names = self.teams[team_name]
-        for name in student_names:
-            if name not in self.students:
-                continue
-            student = self.students[name]
-            if student.locked or student.choice != 3:
+    def _generate_mixed_swaps(self, max_team: str, min_team: str, context: Dict) -> List[Dict]:
+        """P9/P10: Δυάδα ↔ Solo+Solo και Solo+Solo ↔ Δυάδα (ίδιο πλήθος μαθητών)"""
+        swaps = []
+        max_pairs_ep3 = [g for g in self._get_groups_with_ep3(max_team) if len(g['names']) == 2]
+        max_solos = self._get_solos(max_team)
+        min_solos_non_ep3 = self._get_solos_without_ep3(min_team)
+        min_pairs = self._groups_by_size(self._get_groups(min_team)).get(2, [])
+        
+        # P9: Δυάδα(με ep3) ↔ δύο Solo(ep1/2)
+        for pair_max in max_pairs_ep3:
+            for solo_a, solo_b in itertools.combinations(min_solos_non_ep3, 2):
+                names_in = [solo_a['name'], solo_b['name']]
+                improvement = self._calc_asymmetric_improvement(
+                    max_team, list(pair_max['names']),
+                    min_team, names_in, context
+                )
+                if improvement['improves']:
+                    swaps.append({
+                        'type': f"Δυάδα({pair_max['ep_combo']})↔Solo+Solo({solo_a['student'].choice},{solo_b['student'].choice})-P9",
+                        'from_team': max_team,
+                        'students_out': list(pair_max['names']),
+                        'to_team': min_team,
+                        'students_in': names_in,
+                        'improvement': improvement,
+                        'priority': 9
+                    })
+        
+        # P10: δύο Solo (τουλάχιστον ένα ep3) ↔ Δυάδα με λιγότερα ep3
+        for solo_a, solo_b in itertools.combinations(max_solos, 2):
+            ep3_out = (solo_a['student'].choice == 3) + (solo_b['student'].choice == 3)
+            if not ep3_out:
                 continue
-            has_friend = any(f in student_names for f in student.friends)
-            if not has_friend:
-                solos.append({'name': name, 'student': student})
-        return solos
+            names_out = [solo_a['name'], solo_b['name']]
+            for pair_min in min_pairs:
+                if sum(1 for s in pair_min['students'] if s.choice == 3) >= ep3_out:
+                    continue
+                improvement = self._calc_asymmetric_improvement(
+                    max_team, names_out,
+                    min_team, list(pair_min['names']), context
+                )
+                if improvement['improves']:
+                    swaps.append({
+                        'type': f"Solo+Solo({solo_a['student'].choice},{solo_b['student'].choice})↔Δυάδα({pair_min['ep_combo']})-P10",
+                        'from_team': max_team,
+                        'students_out': names_out,
+                        'to_team': min_team,
+                        'students_in': list(pair_min['names']),
+                        'improvement': improvement,
+                        'priority': 10
+                    })
+        
+        return swaps
     
-    def _get_pairs_with_ep3(self, team_name: str) -> List[Dict]:
-        pairs = []
-        processed = set()
-        student_names = self.teams[team_name]
-        for name_a in student_names:
-            if name_a in processed or name_a not in self.students:
-                continue
-            student_a = self.students[name_a]
-            if student_a.locked:
+    def _generate_transfers(self, max_team: str, min_team: str, context: Dict) -> List[Dict]:
+        """P11: μεταφορά Solo(ep3) από το max στο min χωρίς αντάλλαγμα
+        
+        Μόνο αν το spread μεγέθους μετά δεν ξεπερνά το transfer_size_tolerance
+        (ή το τρέχον spread μεγέθους, αν είναι ήδη μεγαλύτερο).
+        """
+        limit = max(self.transfer_size_tolerance, context['spreads']['size'])
+        # Το μέγεθος αλλάζει ίδια για κάθε μεταφορά: ένας έλεγχος για όλες
+        if self._spreads_after_pair(context, {'size': -1})['size'] > limit:
+            return []
+        
+        swaps = []
+        for solo in self._get_solos_with_ep3(max_team):
+            improvement = self._calc_asymmetric_improvement(
+                max_team, [solo['name']],
+                min_team, [], context
+            )
+            if improvement['improves']:
+                swaps.append({
+                    'type': 'Solo(3)→-P11',
+                    'from_team': max_team,
+                    'students_out': [solo['name']],
+                    'to_team': min_team,
+                    'students_in': [],
+                    'improvement': improvement,
+                    'priority': 11
+                })
+        
+        return swaps
+    
+    def _generate_rotations(self, max_team: str, min_team: str, context: Dict) -> List[Dict]:
+        """P12: κύκλος σε τρία τμήματα, max → Γ → min → max ή max → min → Γ → max
+        
+        Καλείται μόνο όταν δεν υπάρχει βελτιωτική κίνηση P1-P11 για το ζεύγος max/min.
+        Κάθε τμήμα δίνει μία μονάδα ίδιου μεγέθους (solo ή δυάδα) στο επόμενο, άρα τα
+        μεγέθη δεν αλλάζουν. Οι μονάδες κάθε τμήματος ομαδοποιούνται ανά υπογραφή counts
+        και αξιολογείται μία φορά κάθε συνδυασμός υπογραφών (όχι κάθε τριάδα μαθητών).
+        Κόβονται όσοι δεν μειώνουν τα ep3 του max και όσοι αφήνουν ένα τμήμα
+        αμετάβλητο (ισοδύναμοι με swap δύο τμημάτων).
+        """
+        stats = context['stats']
+        spreads_before = context['spreads']
+        ordered = {m: sorted((s[m], team) for team, s in stats.items()) for m in METRICS}
+        classes: Dict[str, Dict[int, Dict[Tuple[int, ...], List[str]]]] = {}
+        
+        def unit_classes(team: str) -> Dict[int, Dict[Tuple[int, ...], List[str]]]:
+            """{μέγεθος: {υπογραφή: ονόματα της πρώτης μονάδας}}"""
+            if team not in classes:
+                by_size: Dict[int, Dict[Tuple[int, ...], List[str]]] = {}
+                units = [[solo['name']] for solo in self._get_solos(team)]
+                units += [list(g['names']) for g in self._get_groups(team) if len(g['names']) == 2]
+                for names in units:
+                    by_size.setdefault(len(names), {}).setdefault(self._unit_signature(names), names)
+                classes[team] = by_size
+            return classes[team]
+        
+        swaps = []
+        for third in self.teams:
+            if third == max_team or third == min_team:
                 continue
-            for name_b in student_names:
-                if name_b == name_a or name_b in processed or name_b not in self.students:
-                    continue
-                student_b = self.students[name_b]
-                if student_b.locked:
-                    continue
-                if name_b in student_a.friends or name_a in student_b.friends:
-                    if student_a.choice == 3 or student_b.choice == 3:
-                        pairs.append({
-                            'name_a': name_a, 'name_b': name_b,
-                            'student_a': student_a, 'student_b': student_b,
-                            'ep_combo': f"{student_a.choice},{student_b.choice}"
-                        })
-                        processed.add(name_a)
-                        processed.add(name_b)
-                        break
-        return pairs
+            for cycle in ((max_team, third, min_team), (max_team, min_team, third)):
+                team_0, team_1, team_2 = cycle
+                classes_0, classes_1, classes_2 = (unit_classes(team) for team in cycle)
+                
+                for size in (1, 2):
+                    for sig_0, names_0 in classes_0.get(size, {}).items():
+                        # Το max πρέπει να δίνει ep3 (METRICS[0])
+                        if not sig_0[0]:
+                            continue
+                        for sig_2, names_2 in classes_2.get(size, {}).items():
+                            if sig_2[0] >= sig_0[0]:
+                                continue
+                            for sig_1, names_1 in classes_1.get(size, {}).items():
+                                if sig_1 == sig_0 or sig_1 == sig_2:
+                                    continue
+                                deltas = {
+                                    team_0: [b - a for a, b in zip(sig_0, sig_2)],
+                                    team_1: [b - a for a, b in zip(sig_1, sig_0)],
+                                    team_2: [b - a for a, b in zip(sig_2, sig_1)],
+                                }
+                                spreads_after = self._spreads_after_cycle(stats, ordered, deltas, spreads_before)
+                                improvement = self._improvement_from_spreads(spreads_before, spreads_after)
+                                if not improvement['improves']:
+                                    continue
+                                
+                                combos = '|'.join(','.join(str(self.students[n].choice) for n in names)
+                                                  for names in (names_0, names_1, names_2))
+                                swaps.append({
+                                    'type': f"Κύκλος({combos})-P12",
+                                    # Μόνο η διαδρομή: κάθε τμήμα δίνει στο επόμενο
+                                    'moves': [
+                                        {'from_team': team_0, 'to_team': team_1, 'students': list(names_0)},
+                                        {'from_team': team_1, 'to_team': team_2, 'students': list(names_1)},
+                                        {'from_team': team_2, 'to_team': team_0, 'students': list(names_2)},
+                                    ],
+                                    'improvement': improvement,
+                                    'priority': 12
+                                })
+        
+        return swaps
+    
+    def _unit_signature(self, names: List[str]) -> Tuple[int, ...]:
+        """Counts μιας μονάδας ανά μετρική (σειρά METRICS)"""
+        return tuple(sum(self._metric_hit(self.students[n], metric) for n in names) for metric in METRICS)
+    
+    def _spreads_after_cycle(self, stats: Dict, ordered: Dict[str, List[Tuple[int, str]]],
+                             deltas: Dict[str, List[int]], spreads_before: Dict[str, int]) -> Dict[str, int]:
+        """Spreads όταν αλλάζουν λίγα τμήματα (deltas σε σειρά METRICS), χωρίς σάρωση όλων
+        
+        ordered: (count, τμήμα) ταξινομημένα ανά μετρική - τα άκρα των υπόλοιπων
+        τμημάτων βρίσκονται στις πρώτες θέσεις από κάθε άκρη.
+        """
+        spreads = {'size': spreads_before['size']}
+        for idx, metric in enumerate(METRICS):
+            values = [stats[team][metric] + delta[idx] for team, delta in deltas.items()]
+            hi, lo = max(values), min(values)
+            for value, team in reversed(ordered[metric]):
+                if team not in deltas:
+                    hi = max(hi, value)
+                    break
+            for value, team in ordered[metric]:
+                if team not in deltas:
+                    lo = min(lo, value)
+                    break
+            spreads[metric] = hi - lo
+        return spreads
+    
+    def _get_solos_with_ep3(self, team_name: str) -> List[Dict]:
+        return [s for s in self._get_solos(team_name) if s['student'].choice == 3]
     
     def _get_solos_without_ep3(self, team_name: str) -> List[Dict]:
-        solos = []
-        student_names = self.teams[team_name]
-        for name in student_names:
-            if name not in self.students:
-                continue
-            student = self.students[name]
-            if student.locked or student.choice == 3:
-                continue
-            has_friend = any(f in student_names for f in student.friends)
-            if not has_friend:
-                solos.append({'name': name, 'student': student})
-        return solos
+        return [s for s in self._get_solos(team_name) if s['student'].choice != 3]
+    
+    def _get_groups_with_ep3(self, team_name: str) -> List[Dict]:
+        return [g for g in self._get_groups(team_name)
+                if any(s.choice == 3 for s in g['students'])]
     
-    def _get_pairs_without_ep3(self, team_name: str) -> List[Dict]:
-        pairs = []
-        processed = set()
-        student_names = self.teams[team_name]
-        for name_a in student_names:
-            if name_a in processed or name_a not in self.students:
+    def _get_groups(self, team_name: str) -> List[Dict]:
+        """Μετακινούμενες ομάδες φίλων (μέγεθος >= 2) του τμήματος"""
+        groups = []
+        for unit in self._get_team_units(team_name):
+            if len(unit) < 2:
                 continue
-            student_a = self.students[name_a]
-            if student_a.locked:
+            students = [self.students[name] for name in unit]
+            if any(s.locked for s in students):
                 continue
-            for name_b in student_names:
-                if name_b == name_a or name_b in processed or name_b not in self.students:
-                    continue
-                student_b = self.students[name_b]
-                if student_b.locked:
-                    continue
-                if name_b in student_a.friends or name_a in student_b.friends:
-                    pairs.append({
-                        'name_a': name_a, 'name_b': name_b,
-                        'student_a': student_a, 'student_b': student_b,
-                        'ep_combo': f"{student_a.choice},{student_b.choice}"
-                    })
-                    processed.add(name_a)
-                    processed.add(name_b)
-                    break
-        return pairs
+            groups.append({
+                'names': unit,
+                'students': students,
+                'ep_combo': ','.join(str(s.choice) for s in students)
+            })
+        return groups
+    
+    def _groups_by_size(self, groups: List[Dict]) -> Dict[int, List[Dict]]:
+        by_size: Dict[int, List[Dict]] = {}
+        for group in groups:
+            by_size.setdefault(len(group['names']), []).append(group)
+        return by_size
+    
+    def _unit_label(self, group: Dict) -> str:
+        return 'Δυάδα' if len(group['names']) == 2 else 'Ομάδα'
     
     def _calc_asymmetric_improvement(self, team_high: str, names_out: List[str],
-                                      team_low: str, names_in: List[str]) -> Dict:
-        """FIX: Διορθωμένος υπολογισμός με 'Ν'/'Ο'"""
-        stats_before = self._get_team_stats()
-        stats_after = {k: v.copy() for k, v in stats_before.items()}
-        
-        for name in names_out:
-            if name in self.students:
-                s = self.students[name]
-                if s.choice == 3: stats_after[team_high]['ep3'] -= 1
-                if s.gender == 'Α': stats_after[team_high]['boys'] -= 1
-                elif s.gender == 'Κ': stats_after[team_high]['girls'] -= 1
-                if s.greek_knowledge == 'Ν': stats_after[team_high]['greek_yes'] -= 1
-        
-        for name in names_in:
-            if name in self.students:
-                s = self.students[name]
-                if s.choice == 3: stats_after[team_high]['ep3'] += 1
-                if s.gender == 'Α': stats_after[team_high]['boys'] += 1
-                elif s.gender == 'Κ': stats_after[team_high]['girls'] += 1
-                if s.greek_knowledge == 'Ν': stats_after[team_high]['greek_yes'] += 1
-        
-        for name in names_in:
-            if name in self.students:
-                s = self.students[name]
-                if s.choice == 3: stats_after[team_low]['ep3'] -= 1
-                if s.gender == 'Α': stats_after[team_low]['boys'] -= 1
-                elif s.gender == 'Κ': stats_after[team_low]['girls'] -= 1
-                if s.greek_knowledge == 'Ν': stats_after[team_low]['greek_yes'] -= 1
-        
-        for name in names_out:
-            if name in self.students:
+                                      team_low: str, names_in: List[str],
+                                      context: Optional[Dict] = None) -> Dict:
+        """Βελτίωση swap από τα deltas των counts, χωρίς νέο πέρασμα μαθητών
+        
+        context: από _pair_context (μία φορά ανά ζεύγος τμημάτων)
+        """
+        if context is None:
+            context = self._pair_context(self._get_team_stats(), team_high, team_low)
+        spreads_after = self._spreads_after_pair(context, self._move_delta(names_out, names_in))
+        return self._improvement_from_spreads(context['spreads'], spreads_after)
+    
+    def _pair_context(self, stats: Dict, team_a: str, team_b: str) -> Dict:
+        """max/min κάθε μετρικής (και μεγέθους) στα υπόλοιπα τμήματα
+        
+        Με αυτά τα spreads μετά από κίνηση μεταξύ team_a/team_b βγαίνουν σε O(1).
+        """
+        others = [s for team, s in stats.items() if team != team_a and team != team_b]
+        rest = {}
+        for key in METRICS + ('size',):
+            values = [s[key] for s in others]
+            rest[key] = (max(values), min(values)) if values else None
+        return {'stats': stats, 'teams': (team_a, team_b), 'rest': rest,
+                'spreads': self._objective_spreads(stats)}
+    
+    def _spreads_after_pair(self, context: Dict, delta: Dict[str, int]) -> Dict[str, int]:
+        """Spreads όταν το team_a του context αλλάζει κατά delta και το team_b κατά -delta"""
+        team_a, team_b = context['teams']
+        stats_a, stats_b = context['stats'][team_a], context['stats'][team_b]
+        spreads = {}
+        for key, d in delta.items():
+            value_a = stats_a[key] + d
+            value_b = stats_b[key] - d
+            rest = context['rest'][key]
+            if rest is None:
+                spreads[key] = abs(value_a - value_b)
+            else:
+                spreads[key] = max(value_a, value_b, rest[0]) - min(value_a, value_b, rest[1])
+        return spreads
+    
+    def _move_delta(self, names_out: List[str], names_in: List[str]) -> Dict[str, int]:
+        """Μεταβολή των counts του τμήματος που δίνει names_out και παίρνει names_in"""
+        delta = dict.fromkeys(METRICS + ('size',), 0)
+        for names, sign in ((names_in, 1), (names_out, -1)):
+            for name in names:
+                if name not in self.students:
+                    continue
                 s = self.students[name]
-                if s.choice == 3: stats_after[team_low]['ep3'] += 1
-                if s.gender == 'Α': stats_after[team_low]['boys'] += 1
-                elif s.gender == 'Κ': stats_after[team_low]['girls'] += 1
-                if s.greek_knowledge == 'Ν': stats_after[team_low]['greek_yes'] += 1
-        
-        ep3_before = max(s['ep3'] for s in stats_before.values()) - min(s['ep3'] for s in stats_before.values())
-        ep3_after = max(s['ep3'] for s in stats_after.values()) - min(s['ep3'] for s in stats_after.values())
-        
-        boys_before = max(s['boys'] for s in stats_before.values()) - min(s['boys'] for s in stats_before.values())
-        boys_after = max(s['boys'] for s in stats_after.values()) - min(s['boys'] for s in stats_after.values())
-        
-        girls_before = max(s['girls'] for s in stats_before.values()) - min(s['girls'] for s in stats_before.values())
-        girls_after = max(s['girls'] for s in stats_after.values()) - min(s['girls'] for s in stats_after.values())
-        
-        greek_before = max(s['greek_yes'] for s in stats_before.values()) - min(s['greek_yes'] for s in stats_before.values())
-        greek_after = max(s['greek_yes'] for s in stats_after.values()) - min(s['greek_yes'] for s in stats_after.values())
+                for metric in METRICS:
+                    delta[metric] += sign * self._metric_hit(s, metric)
+                delta['size'] += sign
+        return delta
+    
+    def _select_best_swap(self, swaps: List[Dict]) -> Optional[Dict]:
+        if not swaps:
+            return None
         
-        delta_ep3 = ep3_before - ep3_after
-        delta_boys = boys_before - boys_after
-        delta_girls = girls_before - girls_after
-        delta_greek = greek_before - greek_after
+        # Ίδια κατάσταση πριν για όλα τα υποψήφια: αρκεί η τιμή του objective μετά
+        swaps.sort(key=lambda x: (x['improvement']['objective_after'], x['priority']))
         
-        improves = delta_ep3 > 0 or (delta_ep3 == 0 and (delta_boys > 0 or delta_girls > 0 or delta_greek > 0))
+        return swaps[0]
+    
+    def _apply_swap(self, swap: Dict) -> None:
+        # Πρώτα φεύγουν όλοι, μετά μπαίνουν στο τμήμα προορισμού
+        moves = self._swap_moves(swap)
+        for move in moves:
+            for name in move['students']:
+                if name in self.teams[move['from_team']]:
+                    self.teams[move['from_team']].remove(name)
+        for move in moves:
+            self.teams[move['to_team']].extend(move['students'])
+    
+    def preview_swap(self, team_a: str, names_a: List[str], team_b: str, names_b: List[str],
+                     stats: Optional[Dict] = None) -> Dict:
+        """What-if: αποτέλεσμα swap χωρίς εφαρμογή, μόνο από team counts
+        
+        Με έτοιμα stats (π.χ. από session state) το κόστος είναι O(τμήματα),
+        χωρίς νέο πέρασμα όλων των μαθητών.
+        """
+        if stats is None:
+            stats = self._get_team_stats()
+        spreads_before = self._objective_spreads(stats)
+        stats_after = self._stats_after_move(stats, team_a, names_a, team_b, names_b)
+        spreads_after = self._objective_spreads(stats_after)
+        
+        warnings = []
+        locked = []
+        for team, names in ((team_a, names_a), (team_b, names_b)):
+            members = set(self.teams[team])
+            for name in names:
+                if name not in members:
+                    warnings.append(f"{name} δεν ανήκει στο {team}")
+                elif self.students[name].locked:
+                    warnings.append(f"{name} είναι LOCKED")
+                    locked.append(name)
+            # Ομάδα φίλων που σπάει (μετακινείται μόνο μέρος της)
+            moving = set(names)
+            for unit in self._get_team_units(team):
+                if len(unit) > 1 and moving & set(unit) and not set(unit) <= moving:
+                    warnings.append(f"Σπάει η ομάδα φίλων: {', '.join(unit)}")
         
         return {
-            'improves': improves,
+            'spreads_before': spreads_before,
+            'spreads_after': spreads_after,
+            'stats_after': stats_after,
+            'warnings': warnings,
+            'locked': locked,
+            'improvement': self._improvement_from_spreads(spreads_before, spreads_after)
+        }
+    
+    def _improvement_from_spreads(self, spreads_before: Dict[str, int],
+                                  spreads_after: Dict[str, int]) -> Dict:
+        """Πεδία βελτίωσης + objective (τα spreads περιέχουν και το 'size')"""
+        delta_ep3 = spreads_before['ep3'] - spreads_after['ep3']
+        delta_boys = spreads_before['boys'] - spreads_after['boys']
+        delta_girls = spreads_before['girls'] - spreads_after['girls']
+        delta_greek = spreads_before['greek_yes'] - spreads_after['greek_yes']
+        
+        improvement = {
+            'improves': False,
             'delta_ep3': delta_ep3,
             'delta_boys': delta_boys,
             'delta_girls': delta_girls,
             'delta_greek': delta_greek,
-            'ep3_before': ep3_before,
-            'ep3_after': ep3_after
+            'ep3_before': spreads_before['ep3'],
+            'ep3_after': spreads_after['ep3']
         }
+        improvement.update(self.objective.evaluate(spreads_before, spreads_after, self._objective_targets()))
+        return improvement
     
-    def _select_best_swap(self, swaps: List[Dict]) -> Optional[Dict]:
-        if not swaps:
-            return None
+    def _reverse_swap(self, swap: Dict) -> Dict:
+        """Το αντίστροφο swap δύο τμημάτων (για undo των χειροκίνητων swaps)"""
+        return {
+            'type': f"Undo {swap['type']}",
+            'from_team': swap['to_team'],
+            'students_out': list(swap['students_out']),
+            'to_team': swap['from_team'],
+            'students_in': list(swap['students_in']),
+            'priority': swap['priority']
+        }
+    
+    def iter_swap_suggestions(self, file_bytes: bytes):
+        """Streaming ανάγνωση προτάσεων από SWAP_SUGGESTIONS / ΑΝΤΑΛΛΑΓΕΣ_ΑΝΑ_ΤΜΗΜΑ"""
+        wb = openpyxl.load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+        try:
+            for sheet_name in SUGGESTION_SHEETS:
+                if sheet_name not in wb.sheetnames:
+                    continue
+                
+                rows = wb[sheet_name].iter_rows(values_only=True)
+                header_row = next(rows, None)
+                if not header_row:
+                    continue
+                
+                columns = self._match_suggestion_columns(header_row)
+                missing = [key for key in SUGGESTION_COLUMNS if key not in columns]
+                if missing:
+                    print(f"  ⚠️  Missing columns in {sheet_name}: {missing}")
+                    continue
+                
+                for row_idx, values in enumerate(rows, start=2):
+                    def value(key: str) -> str:
+                        col = columns[key]
+                        val = values[col] if col < len(values) else None
+                        return str(val).strip() if val is not None else ''
+                    
+                    if not any(value(key) for key in SUGGESTION_COLUMNS):
+                        continue
+                    
+                    yield {
+                        'sheet': sheet_name,
+                        'row': row_idx,
+                        'from_team': value('from_team'),
+                        'students_out': self._parse_friends(value('students_out')),
+                        'to_team': value('to_team'),
+                        'students_in': self._parse_friends(value('students_in')),
+                    }
+        finally:
+            wb.close()
+    
+    def _match_suggestion_columns(self, header_row: Tuple) -> Dict[str, int]:
+        """Αντιστοίχιση στηλών: πρώτα ακριβές ταίριασμα, μετά prefix (π.χ. 'Μαθητές OUT (ep3)')"""
+        normalized = [self._normalize_header(h) if h is not None else '' for h in header_row]
+        columns: Dict[str, int] = {}
+        
+        for exact in (True, False):
+            for key, aliases in SUGGESTION_COLUMNS.items():
+                if key in columns:
+                    continue
+                for alias in aliases:
+                    if not exact and len(alias) < 4:
+                        continue
+                    matches = [
+                        idx for idx, header in enumerate(normalized)
+                        if idx not in columns.values() and
+                        (header == alias if exact else header.startswith(alias))
+                    ]
+                    if matches:
+                        columns[key] = matches[0]
+                        break
+        return columns
+    
+    def _normalize_header(self, value) -> str:
+        text = unicodedata.normalize('NFD', str(value).strip())
+        text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn')
+        return text.upper().replace(' ', '').replace('_', '')
+    
+    def score_swap_suggestions(self, suggestions: Iterable[Dict]) -> List[Dict]:
+        """Αξιολόγηση όλων των προτάσεων σε ένα πέρασμα, απέναντι στην τρέχουσα κατανομή
         
-        swaps.sort(
-            key=lambda x: (
-                -x['improvement']['delta_ep3'],
-                -(x['improvement']['delta_boys'] + x['improvement']['delta_girls']),
-                -x['improvement']['delta_greek'],
-                x['priority']
-            )
-        )
+        Τα team stats υπολογίζονται μία φορά· κάθε πρόταση κοστίζει O(τμήματα).
+        """
+        stats = self._get_team_stats()
+        spreads = self._objective_spreads(stats)
+        team_of = {name: team for team, names in self.teams.items() for name in names}
+        scored = []
         
-        return swaps[0]
+        for suggestion in suggestions:
+            entry = dict(suggestion, valid=False, reason='', improvement=None, applied=False)
+            entry['reason'] = self._validate_suggestion(entry, team_of)
+            
+            if not entry['reason']:
+                stats_after = self._stats_after_move(
+                    stats, entry['from_team'], entry['students_out'],
+                    entry['to_team'], entry['students_in']
+                )
+                entry['valid'] = True
+                entry['improvement'] = self._improvement_from_spreads(
+                    spreads, self._objective_spreads(stats_after)
+                )
+            scored.append(entry)
+        
+        valid = sum(1 for entry in scored if entry['valid'])
+        improving = sum(1 for entry in scored if entry['valid'] and entry['improvement']['improves'])
+        print(f"\n📋 Suggestions: {len(scored)} συνολικά, {valid} έγκυρες, {improving} βελτιώνουν")
+        return scored
     
-    def _apply_swap(self, swap: Dict) -> None:
-        from_team = swap['from_team']
-        to_team = swap['to_team']
-        students_out = swap['students_out']
-        students_in = swap['students_in']
+    def _validate_suggestion(self, entry: Dict, team_of: Dict[str, str]) -> str:
+        """Κενό string αν η πρόταση είναι εφαρμόσιμη, αλλιώς ο λόγος απόρριψης"""
+        if entry['from_team'] not in self.teams or entry['to_team'] not in self.teams:
+            return 'Άγνωστο τμήμα'
+        if entry['from_team'] == entry['to_team']:
+            return 'Ίδιο τμήμα'
+        if not entry['students_out'] and not entry['students_in']:
+            return 'Χωρίς μαθητές'
+        
+        names = entry['students_out'] + entry['students_in']
+        if len(set(names)) != len(names):
+            return 'Διπλός μαθητής'
+        for name in names:
+            if name not in self.students:
+                return f'Άγνωστος μαθητής: {name}'
+            if self.students[name].locked:
+                return f'LOCKED: {name}'
+        for name in entry['students_out']:
+            if team_of.get(name) != entry['from_team']:
+                return f"{name} δεν είναι στο {entry['from_team']}"
+        for name in entry['students_in']:
+            if team_of.get(name) != entry['to_team']:
+                return f"{name} δεν είναι στο {entry['to_team']}"
+        return ''
+    
+    def apply_best_suggestions(self, scored: List[Dict]) -> List[Dict]:
+        """Εφαρμογή του καλύτερου μη συγκρουόμενου υποσυνόλου προτάσεων
         
-        for name in students_out:
-            if name in self.teams[from_team]:
-                self.teams[from_team].remove(name)
+        Σειρά όπως στο _select_best_swap· κάθε πρόταση ξαναελέγχεται πάνω στην
+        ενημερωμένη κατανομή και εφαρμόζεται μόνο αν ακόμα βελτιώνει.
+        """
+        candidates = [entry for entry in scored if entry['valid'] and entry['improvement']['improves']]
+        candidates.sort(key=lambda x: (x['improvement']['objective_after'], x['row']))
         
-        for name in students_in:
-            if name in self.teams[to_team]:
-                self.teams[to_team].remove(name)
+        stats = self._get_team_stats()
+        spreads = self._objective_spreads(stats)
+        used = set()
+        applied = []
         
-        for name in students_out:
-            self.teams[to_team].append(name)
+        for entry in candidates:
+            names = set(entry['students_out']) | set(entry['students_in'])
+            if names & used:
+                continue
+            
+            stats_after = self._stats_after_move(
+                stats, entry['from_team'], entry['students_out'],
+                entry['to_team'], entry['students_in']
+            )
+            spreads_after = self._objective_spreads(stats_after)
+            improvement = self._improvement_from_spreads(spreads, spreads_after)
+            if not improvement['improves']:
+                continue
+            
+            swap = {
+                'type': f"{entry['sheet']}#{entry['row']}",
+                'from_team': entry['from_team'],
+                'students_out': list(entry['students_out']),
+                'to_team': entry['to_team'],
+                'students_in': list(entry['students_in']),
+                'improvement': improvement,
+                'priority': 0
+            }
+            self._apply_swap(swap)
+            applied.append(swap)
+            entry['applied'] = True
+            used |= names
+            stats, spreads = stats_after, spreads_after
         
-        for name in students_in:
-            self.teams[from_team].append(name)
+        return applied
     
-    def export_to_excel(self, applied_swaps: List[Dict], final_spreads: Dict) -> bytes:
+    def export_to_excel(self, applied_swaps: List[Dict], final_spreads: Dict,
+                        scored_suggestions: Optional[List[Dict]] = None) -> bytes:
         wb = openpyxl.Workbook()
         wb.remove(wb.active)
         
@@ -718,6 +2619,21 @@ class TeamOptimizer:
         self._create_statistics_sheet(wb, final_spreads)
         self._create_swaps_log_sheet(wb, applied_swaps)
         
+        if scored_suggestions is not None:
+            self._create_suggestions_sheet(wb, scored_suggestions)
+        
+        output = io.BytesIO()
+        wb.save(output)
+        wb.close()
+        output.seek(0)
+        
+        return output.getvalue()
+    
+    def export_sweep_to_excel(self, results: List[Dict]) -> bytes:
+        wb = openpyxl.Workbook()
+        wb.remove(wb.active)
+        self._create_sweep_sheet(wb, results)
+        
         output = io.BytesIO()
         wb.save(output)
         wb.close()
@@ -725,36 +2641,159 @@ class TeamOptimizer:
         
         return output.getvalue()
     
-    def _create_team_sheet(self, wb, team_name: str) -> None:
-        sheet = wb.create_sheet(team_name)
+    def _create_sweep_sheet(self, wb, results: List[Dict]) -> None:
+        sheet = wb.create_sheet('SWEEP_PARETO')
+        
+        headers = ['Pareto', 'Engine', 'Στόχος Επ3', 'Στόχος Φύλου', 'Στόχος Γνώσης',
+                   'Spread Επ3', 'Spread Αγόρια', 'Spread Κορίτσια', 'Spread Γνώση',
+                   'Swaps', 'Στόχοι OK']
         
-        headers = ['ΟΝΟΜΑ', 'ΦΥΛΟ', 'ΚΑΛΗ_ΓΝΩΣΗ_ΕΛΛΗΝΙΚΩΝ', 'ΕΠΙΔΟΣΗ', 'ΦΙΛΟΙ']
         for col_idx, header in enumerate(headers, start=1):
             cell = sheet.cell(1, col_idx)
             cell.value = header
             cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color='DDEBF7', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+            cell.fill = PatternFill(start_color='E2EFDA', fill_type='solid')
+            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
         
-        row_idx = 2
+        # Πρώτα τα Pareto-optimal, μετά τα υπόλοιπα
+        ordered = sorted(results, key=lambda r: (not r['pareto'], self._sweep_point(r)))
+        for row_idx, result in enumerate(ordered, start=2):
+            values = [
+                '⭐' if result['pareto'] else '', result['engine'],
+                result['target_ep3'], result['target_gender'], result['target_greek'],
+                result['spreads']['ep3'], result['spreads']['boys'],
+                result['spreads']['girls'], result['spreads']['greek_yes'],
+                result['swaps'], '✅' if result['targets_met'] else '❌'
+            ]
+            for col_idx, value in enumerate(values, start=1):
+                sheet.cell(row_idx, col_idx).value = value
+                sheet.cell(row_idx, col_idx).alignment = Alignment(horizontal='center', vertical='center')
+            
+            if result['pareto']:
+                sheet.cell(row_idx, 1).fill = PatternFill(start_color='C6EFCE', fill_type='solid')
+        
+        for col in 'ABCDEFGHIJK':
+            sheet.column_dimensions[col].width = 14
+    
+    def export_to_csv(self, applied_swaps: List[Dict], final_spreads: Dict, assignments: TextIO,
+                      statistics: TextIO, swaps: TextIO) -> None:
+        """Οι τρεις πίνακες εξόδου σε CSV (streaming, χωρίς openpyxl)
+        
+        assignments: ΤΜΗΜΑ + στήλες των sheets τμημάτων (ξαναφορτώνεται με load_from_csv).
+        statistics: ίδια διάταξη με το ΒΕΛΤΙΩΜΕΝΗ_ΣΤΑΤΙΣΤΙΚΗ. swaps: ΕΦΑΡΜΟΣΜΕΝΑ_SWAPS.
+        """
+        writer = csv.writer(assignments)
+        writer.writerow(('ΤΜΗΜΑ',) + TEAM_SHEET_COLUMNS)
+        for team_name in sorted(self.teams.keys()):
+            writer.writerows([team_name] + values for values in self._team_rows(team_name))
+        
+        writer = csv.writer(statistics)
+        writer.writerow(STATISTICS_COLUMNS)
+        writer.writerows(self._statistics_rows())
+        writer.writerows([[], [], ['ΤΕΛΙΚΑ SPREADS'], SUMMARY_COLUMNS])
+        writer.writerows(self._summary_rows(final_spreads))
+        
+        writer = csv.writer(swaps)
+        writer.writerow(SWAPS_LOG_COLUMNS)
+        writer.writerows(self._swaps_log_rows(applied_swaps))
+    
+    def export_to_jsonl(self, applied_swaps: List[Dict], final_spreads: Dict, assignments: TextIO,
+                        statistics: TextIO, swaps: TextIO) -> None:
+        """Οι τρεις πίνακες εξόδου σε JSON Lines (ένα object ανά γραμμή, κλειδιά = headers)"""
+        for team_name in sorted(self.teams.keys()):
+            self._write_jsonl(assignments, ('ΤΜΗΜΑ',) + TEAM_SHEET_COLUMNS,
+                              ([team_name] + values for values in self._team_rows(team_name)))
+        self._write_jsonl(statistics, STATISTICS_COLUMNS, self._statistics_rows())
+        self._write_jsonl(statistics, SUMMARY_COLUMNS, self._summary_rows(final_spreads))
+        self._write_jsonl(swaps, SWAPS_LOG_COLUMNS, self._swaps_log_rows(applied_swaps))
+    
+    def _write_jsonl(self, stream: TextIO, columns: Tuple[str, ...], rows: Iterable[List]) -> None:
+        for values in rows:
+            stream.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False) + '\n')
+    
+    def _team_rows(self, team_name: str):
+        """Γραμμές ενός τμήματος (στήλες TEAM_SHEET_COLUMNS), αλφαβητικά"""
         for name in sorted(self.teams[team_name]):
             if name not in self.students:
                 continue
             
             student = self.students[name]
-            sheet.cell(row_idx, 1).value = student.name
-            sheet.cell(row_idx, 2).value = student.gender
-            sheet.cell(row_idx, 3).value = student.greek_knowledge
-            sheet.cell(row_idx, 4).value = student.choice
-            sheet.cell(row_idx, 5).value = ', '.join(student.friends)
-            
-            for col in range(1, 6):
+            yield [student.name, student.gender, student.greek_knowledge, student.choice,
+                   ', '.join(student.friends)]
+    
+    def _statistics_rows(self):
+        """Γραμμές στατιστικών ανά τμήμα (στήλες STATISTICS_COLUMNS)"""
+        stats = self._get_team_stats()
+        for team_name in sorted(self.teams.keys()):
+            if team_name not in stats:
+                continue
+            s = stats[team_name]
+            yield [team_name, len(self.teams[team_name]), s['boys'], s['girls'],
+                   s['greek_yes'], s['greek_no'], s['ep1'], s['ep2'], s['ep3']]
+    
+    def _summary_rows(self, spreads: Dict):
+        """Τελικά spreads (στήλες SUMMARY_COLUMNS)"""
+        # Στόχοι από τις πραγματικές παραμέτρους του run
+        for label, metric in [
+            ('Spread Επίδοσης 3', 'ep3'),
+            ('Spread Αγοριών', 'boys'),
+            ('Spread Κοριτσιών', 'girls'),
+            ('Spread Γνώσης', 'greek_yes')
+        ]:
+            target = self._metric_target(metric)
+            yield [label, spreads[metric], f'≤ {target}', '✅' if spreads[metric] <= target else '❌']
+        # Τιμή του objective για την τελική κατανομή (χωρίς στόχο/status)
+        yield [f'Objective ({self.objective.mode})', self.objective.format(self.objective_value()), '', '']
+    
+    def _swaps_log_rows(self, swaps: List[Dict]):
+        """Γραμμές του log των swaps (στήλες SWAPS_LOG_COLUMNS)
+        
+        Κύκλοι: τα τρία τμήματα με τη σειρά του κύκλου, OUT/IN ανά τμήμα χωρισμένα με ';'.
+        """
+        for idx, swap in enumerate(swaps, start=1):
+            imp = swap['improvement']
+            delta_gender = imp['delta_boys'] + imp['delta_girls']
+            if 'moves' in swap:
+                moves = swap['moves']
+                teams = [
+                    ' → '.join(move['from_team'] for move in moves),
+                    '; '.join(', '.join(move['students']) for move in moves),
+                    ' → '.join(move['to_team'] for move in moves),
+                    # Ό,τι μπαίνει σε κάθε τμήμα = ό,τι έδωσε το προηγούμενο του κύκλου
+                    '; '.join(', '.join(moves[i - 1]['students']) for i in range(len(moves))),
+                ]
+            else:
+                teams = [swap['from_team'], ', '.join(swap['students_out']),
+                         swap['to_team'], ', '.join(swap['students_in'])]
+            yield [
+                idx,
+                swap['type'],
+                *teams,
+                f"+{imp['delta_ep3']}" if imp['delta_ep3'] > 0 else str(imp['delta_ep3']),
+                f"+{delta_gender}" if delta_gender > 0 else str(delta_gender),
+                f"+{imp['delta_greek']}" if imp['delta_greek'] > 0 else str(imp['delta_greek']),
+                swap['priority'],
+                swap.get('metric', 'ep3'),
+                self.objective.format(imp['objective_after']) if 'objective_after' in imp else ''
+            ]
+    
+    def _create_team_sheet(self, wb, team_name: str) -> None:
+        sheet = wb.create_sheet(team_name)
+        
+        for col_idx, header in enumerate(TEAM_SHEET_COLUMNS, start=1):
+            cell = sheet.cell(1, col_idx)
+            cell.value = header
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color='DDEBF7', fill_type='solid')
+            cell.alignment = Alignment(horizontal='center', vertical='center')
+        
+        for row_idx, values in enumerate(self._team_rows(team_name), start=2):
+            for col, value in enumerate(values, start=1):
+                sheet.cell(row_idx, col).value = value
                 sheet.cell(row_idx, col).alignment = Alignment(
                     horizontal='left' if col in [1,5] else 'center', 
                     vertical='center'
                 )
-            
-            row_idx += 1
         
         sheet.column_dimensions['A'].width = 30
         sheet.column_dimensions['B'].width = 12
@@ -765,34 +2804,17 @@ class TeamOptimizer:
     def _create_statistics_sheet(self, wb, spreads: Dict) -> None:
         sheet = wb.create_sheet('ΒΕΛΤΙΩΜΕΝΗ_ΣΤΑΤΙΣΤΙΚΗ')
         
-        headers = ['Τμήμα', 'Σύνολο', 'Αγόρια', 'Κορίτσια', 
-                   'Γνώση (ΝΑΙ)', 'Γνώση (ΟΧΙ)', 'Επ1', 'Επ2', 'Επ3']
-        
-        for col_idx, header in enumerate(headers, start=1):
+        for col_idx, header in enumerate(STATISTICS_COLUMNS, start=1):
             cell = sheet.cell(1, col_idx)
             cell.value = header
             cell.font = Font(bold=True)
             cell.fill = PatternFill(start_color='C6E0B4', fill_type='solid')
             cell.alignment = Alignment(horizontal='center', vertical='center')
         
-        stats = self._get_team_stats()
         row_idx = 2
-        for team_name in sorted(self.teams.keys()):
-            if team_name not in stats:
-                continue
-            s = stats[team_name]
-            
-            sheet.cell(row_idx, 1).value = team_name
-            sheet.cell(row_idx, 2).value = len(self.teams[team_name])
-            sheet.cell(row_idx, 3).value = s['boys']
-            sheet.cell(row_idx, 4).value = s['girls']
-            sheet.cell(row_idx, 5).value = s['greek_yes']
-            sheet.cell(row_idx, 6).value = s['greek_no']
-            sheet.cell(row_idx, 7).value = s['ep1']
-            sheet.cell(row_idx, 8).value = s['ep2']
-            sheet.cell(row_idx, 9).value = s['ep3']
-            
-            for col in range(1, 10):
+        for values in self._statistics_rows():
+            for col, value in enumerate(values, start=1):
+                sheet.cell(row_idx, col).value = value
                 sheet.cell(row_idx, col).alignment = Alignment(horizontal='center', vertical='center')
             
             row_idx += 1
@@ -802,22 +2824,14 @@ class TeamOptimizer:
         sheet.cell(row_idx, 1).font = Font(bold=True, size=12)
         row_idx += 1
         
-        summary_headers = ['Μετρική', 'Spread', 'Στόχος', 'Status']
-        for col_idx, header in enumerate(summary_headers, start=1):
+        for col_idx, header in enumerate(SUMMARY_COLUMNS, start=1):
             cell = sheet.cell(row_idx, col_idx)
             cell.value = header
             cell.font = Font(bold=True)
             cell.fill = PatternFill(start_color='FFF2CC', fill_type='solid')
         row_idx += 1
         
-        summary_data = [
-            ('Spread Επίδοσης 3', spreads['ep3'], '≤ 3', '✅' if spreads['ep3'] <= 3 else '❌'),
-            ('Spread Αγοριών', spreads['boys'], '≤ 4', '✅' if spreads['boys'] <= 4 else '❌'),
-            ('Spread Κοριτσιών', spreads['girls'], '≤ 4', '✅' if spreads['girls'] <= 4 else '❌'),
-            ('Spread Γνώσης', spreads['greek_yes'], '≤ 4', '✅' if spreads['greek_yes'] <= 4 else '❌')
-        ]
-        
-        for label, value, target, status in summary_data:
+        for label, value, target, status in self._summary_rows(spreads):
             sheet.cell(row_idx, 1).value = label
             sheet.cell(row_idx, 2).value = value
             sheet.cell(row_idx, 3).value = target
@@ -825,7 +2839,7 @@ class TeamOptimizer:
             
             if '✅' in status:
                 sheet.cell(row_idx, 2).fill = PatternFill(start_color='C6EFCE', fill_type='solid')
-            else:
+            elif status:
                 sheet.cell(row_idx, 2).fill = PatternFill(start_color='FFC7CE', fill_type='solid')
             
             row_idx += 1
@@ -836,31 +2850,16 @@ class TeamOptimizer:
     def _create_swaps_log_sheet(self, wb, swaps: List[Dict]) -> None:
         sheet = wb.create_sheet('ΕΦΑΡΜΟΣΜΕΝΑ_SWAPS')
         
-        headers = ['#', 'Τύπος', 'Από Τμήμα', 'Μαθητές OUT (ep3)', 
-                   'Προς Τμήμα', 'Μαθητές IN (ep1/2)', 'Δ_ep3', 'Δ_φύλου', 'Δ_γνώσης', 'Priority']
-        
-        for col_idx, header in enumerate(headers, start=1):
+        for col_idx, header in enumerate(SWAPS_LOG_COLUMNS, start=1):
             cell = sheet.cell(1, col_idx)
             cell.value = header
             cell.font = Font(bold=True)
             cell.fill = PatternFill(start_color='D9E1F2', fill_type='solid')
             cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
         
-        for idx, swap in enumerate(swaps, start=1):
-            imp = swap['improvement']
-            
-            sheet.cell(idx + 1, 1).value = idx
-            sheet.cell(idx + 1, 2).value = swap['type']
-            sheet.cell(idx + 1, 3).value = swap['from_team']
-            sheet.cell(idx + 1, 4).value = ', '.join(swap['students_out'])
-            sheet.cell(idx + 1, 5).value = swap['to_team']
-            sheet.cell(idx + 1, 6).value = ', '.join(swap['students_in'])
-            sheet.cell(idx + 1, 7).value = f"+{imp['delta_ep3']}" if imp['delta_ep3'] > 0 else str(imp['delta_ep3'])
-            sheet.cell(idx + 1, 8).value = f"+{imp['delta_boys'] + imp['delta_girls']}" if imp['delta_boys'] + imp['delta_girls'] > 0 else str(imp['delta_boys'] + imp['delta_girls'])
-            sheet.cell(idx + 1, 9).value = f"+{imp['delta_greek']}" if imp['delta_greek'] > 0 else str(imp['delta_greek'])
-            sheet.cell(idx + 1, 10).value = swap['priority']
-            
-            for col in range(1, 11):
+        for idx, values in enumerate(self._swaps_log_rows(swaps), start=1):
+            for col, value in enumerate(values, start=1):
+                sheet.cell(idx + 1, col).value = value
                 sheet.cell(idx + 1, col).alignment = Alignment(horizontal='center', vertical='center')
         
         sheet.column_dimensions['A'].width = 8
@@ -873,6 +2872,509 @@ class TeamOptimizer:
         sheet.column_dimensions['H'].width = 10
         sheet.column_dimensions['I'].width = 10
         sheet.column_dimensions['J'].width = 10
+        sheet.column_dimensions['K'].width = 12
+        sheet.column_dimensions['L'].width = 30
+    
+    def _create_suggestions_sheet(self, wb, scored: List[Dict]) -> None:
+        sheet = wb.create_sheet('ΑΞΙΟΛΟΓΗΣΗ_ΠΡΟΤΑΣΕΩΝ')
+        
+        headers = ['#', 'Πηγή', 'Γραμμή', 'Από Τμήμα', 'Μαθητές OUT', 'Προς Τμήμα', 'Μαθητές IN',
+                   'Έγκυρη', 'Βελτιώνει', 'Δ_ep3', 'Δ_αγοριών', 'Δ_κοριτσιών', 'Δ_γνώσης',
+                   'Εφαρμόστηκε', 'Σχόλιο']
+        
+        for col_idx, header in enumerate(headers, start=1):
+            cell = sheet.cell(1, col_idx)
+            cell.value = header
+            cell.font = Font(bold=True)
+            cell.fill = PatternFill(start_color='FCE4D6', fill_type='solid')
+            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        
+        for idx, entry in enumerate(scored, start=1):
+            imp = entry['improvement'] or {}
+            values = [
+                idx, entry['sheet'], entry['row'], entry['from_team'],
+                ', '.join(entry['students_out']), entry['to_team'], ', '.join(entry['students_in']),
+                '✅' if entry['valid'] else '❌',
+                ('✅' if imp.get('improves') else '❌') if entry['valid'] else '',
+                imp.get('delta_ep3'), imp.get('delta_boys'), imp.get('delta_girls'), imp.get('delta_greek'),
+                '✅' if entry['applied'] else '', entry['reason']
+            ]
+            for col_idx, value in enumerate(values, start=1):
+                sheet.cell(idx + 1, col_idx).value = value
+                sheet.cell(idx + 1, col_idx).alignment = Alignment(
+                    horizontal='left' if col_idx in [5, 7, 15] else 'center', vertical='center'
+                )
+            
+            if entry['applied']:
+                sheet.cell(idx + 1, 14).fill = PatternFill(start_color='C6EFCE', fill_type='solid')
+        
+        for col, width in zip('ABCDEFGHIJKLMNO', [8, 24, 8, 12, 30, 12, 30, 8, 10, 8, 10, 10, 10, 12, 30]):
+            sheet.column_dimensions[col].width = width
+
+
+def _optimize_shard(payload: Tuple) -> Tuple[Dict[str, List[str]], List[Dict]]:
+    """Worker για optimize_sharded (module-level ώστε να γίνεται pickle)"""
+    students, teams, targets, objective, moves, engine, max_iterations, deadline = payload
+    optimizer = TeamOptimizer()
+    optimizer.students = students
+    optimizer.teams = teams
+    optimizer.target_ep3, optimizer.target_gender, optimizer.target_greek = targets
+    optimizer.objective = objective
+    optimizer.set_moves(moves)
+    optimizer._build_friend_groups()
+    swaps, _ = optimizer.optimize(max_iterations=max_iterations, engine=engine, deadline=deadline)
+    return optimizer.teams, swaps
+
+
+# Το xlsx και τα shared strings κάθε worker του parallel_sheets (από τον initializer)
+_SHEET_ARCHIVE: Optional[zipfile.ZipFile] = None
+_SHEET_STRINGS: List[str] = []
+
+
+def _xlsx_worksheet_parts(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Όνομα sheet -> XML part μέσα στο xlsx (μόνο worksheets, σειρά workbook)"""
+    rel_ns = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+    targets = {}
+    for rel in ET.fromstring(archive.read('xl/_rels/workbook.xml.rels')):
+        if rel.get('Type', '').endswith('/worksheet'):
+            target = rel.get('Target')
+            targets[rel.get('Id')] = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+    
+    parts = {}
+    for node in ET.fromstring(archive.read('xl/workbook.xml')).iter():
+        if node.tag.endswith('}sheet') and node.get(rel_ns + 'id') in targets:
+            parts[node.get('name')] = targets[node.get(rel_ns + 'id')]
+    return parts
+
+
+def _xlsx_shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    root = ET.fromstring(archive.read('xl/sharedStrings.xml'))
+    ns = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+    return [''.join(t.text or '' for t in si.iter(ns + 't')) for si in root.iter(ns + 'si')]
+
+
+def _xlsx_cell_value(cell, ns: str, shared: List[str]):
+    """Τιμή cell όπως θα την έδινε το openpyxl (data_only)"""
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        inline = cell.find(ns + 'is')
+        return ''.join(t.text or '' for t in inline.iter(ns + 't')) if inline is not None else None
+    
+    raw = cell.findtext(ns + 'v')
+    if raw is None:
+        return None
+    if cell_type == 's':
+        return shared[int(raw)]
+    if cell_type == 'b':
+        return bool(int(raw))
+    if cell_type == 'n':
+        return float(raw) if any(c in raw for c in '.eE') else int(raw)
+    return raw
+
+
+def _init_sheet_worker(file_bytes: bytes) -> None:
+    """Initializer: κάθε worker ανοίγει το xlsx και τα shared strings μία φορά"""
+    global _SHEET_ARCHIVE, _SHEET_STRINGS
+    _SHEET_ARCHIVE = zipfile.ZipFile(io.BytesIO(file_bytes))
+    _SHEET_STRINGS = _xlsx_shared_strings(_SHEET_ARCHIVE)
+
+
+def _parse_team_sheet_xml(task: Tuple[str, str]) -> Tuple[str, Optional[List[str]]]:
+    """Worker του parallel_sheets: archive και shared strings από τον initializer"""
+    return _parse_sheet_xml(_SHEET_ARCHIVE, _SHEET_STRINGS, *task)
+
+
+def _parse_sheet_xml(archive: zipfile.ZipFile, shared: List[str], sheet_name: str,
+                     part: str) -> Tuple[str, Optional[List[str]]]:
+    """Στήλη ΟΝΟΜΑ ενός sheet τμήματος από το XML του (ίδια λογική με _read_team_sheet)"""
+    root = ET.fromstring(archive.read(part))
+    ns = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+    
+    rows: Dict[int, Dict[int, object]] = {}
+    max_row = 0
+    for row_idx, row in enumerate(root.iter(ns + 'row'), start=1):
+        row_idx = int(row.get('r', row_idx))
+        max_row = max(max_row, row_idx)
+        cells = rows.setdefault(row_idx, {})
+        for col_idx, cell in enumerate(row.iter(ns + 'c'), start=1):
+            if cell.get('r'):
+                col_idx = coordinate_to_tuple(cell.get('r'))[1]
+            cells[col_idx] = _xlsx_cell_value(cell, ns, shared)
+    
+    # Όπως στο _parse_headers: η τελευταία στήλη που ταιριάζει κερδίζει
+    name_col = None
+    for col_idx, value in sorted(rows.get(1, {}).items()):
+        if value:
+            raw_header = str(value).strip()
+            if 'ΟΝΟΜΑ' in (raw_header, raw_header.upper().replace(' ', '').replace('_', '')):
+                name_col = col_idx
+    
+    if name_col is None:
+        return sheet_name, None
+    
+    names = []
+    for row_idx in range(2, max_row + 1):
+        value = rows.get(row_idx, {}).get(name_col)
+        names.append(str(value).strip() if value is not None else '')
+    return sheet_name, names
+
+
+# Κοινό parsed input για τους workers του sweep (ορίζεται από τον initializer)
+_SWEEP_INPUT: Optional[Tuple[Dict[str, Student], Dict[str, List[str]], Objective, Dict]] = None
+
+
+def _init_sweep_worker(students: Dict[str, Student], teams: Dict[str, List[str]],
+                       objective: Objective, moves: Dict) -> None:
+    global _SWEEP_INPUT
+    _SWEEP_INPUT = (students, teams, objective, moves)
+
+
+def _run_sweep_config(config: Tuple) -> Dict:
+    """Worker για TeamOptimizer.sweep: ένα σενάριο (engine + στόχοι)"""
+    engine, target_ep3, target_gender, target_greek, max_iterations = config
+    students, teams, objective, moves = _SWEEP_INPUT
+    
+    optimizer = TeamOptimizer()
+    optimizer.students = students
+    optimizer.teams = {team: list(names) for team, names in teams.items()}
+    optimizer.objective = objective
+    optimizer.set_moves(moves)
+    optimizer.target_ep3 = target_ep3
+    optimizer.target_gender = target_gender
+    optimizer.target_greek = target_greek
+    
+    swaps, spreads = optimizer.optimize(max_iterations=max_iterations, engine=engine)
+    return {
+        'engine': engine,
+        'target_ep3': target_ep3,
+        'target_gender': target_gender,
+        'target_greek': target_greek,
+        'spreads': spreads,
+        'swaps': len(swaps),
+        'targets_met': optimizer._targets_met(spreads)
+    }
+
+
+# Κανάλι status/progress από τους workers του JobRunner (ορίζεται από τον initializer)
+_JOB_EVENTS = None
+
+
+def _init_job_worker(events) -> None:
+    global _JOB_EVENTS
+    _JOB_EVENTS = events
+
+
+def _report_job(job_id: str, status: str, progress: float, message: str = '') -> None:
+    if _JOB_EVENTS is not None:
+        _JOB_EVENTS.put((job_id, status, progress, message))
+
+
+def _job_checkpoint_path(file_bytes: bytes, options: Dict) -> str:
+    """Checkpoint ανά job: ίδιο Excel + ίδιες ρυθμίσεις -> ίδιο αρχείο (συνέχεια μετά από timeout/crash)"""
+    key = hashlib.sha1(file_bytes)
+    key.update(json.dumps(options, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return os.path.join(CHECKPOINT_DIR, f"{key.hexdigest()}.tosn")
+
+
+def _configure_optimizer(optimizer: TeamOptimizer, options: Dict) -> TeamOptimizer:
+    """Στόχοι, objective και κινήσεις ενός job (options του main) στον optimizer"""
+    optimizer.target_ep3, optimizer.target_gender, optimizer.target_greek = options['targets']
+    if options.get('objective'):
+        optimizer.objective = Objective(**options['objective'])
+    optimizer.set_moves(options.get('moves', {}))
+    return optimizer
+
+
+def _acquire_checkpoint_lock(path: str) -> bool:
+    """Αποκλειστικό lock ενός checkpoint (lock αρχείο με O_CREAT|O_EXCL και το pid μέσα)
+    
+    False όταν το κρατά άλλο ζωντανό process - π.χ. ίδιο Excel με ίδιες ρυθμίσεις
+    ανέβηκε δύο φορές. Lock από process που δεν υπάρχει πια (crash) αφαιρείται.
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            if _checkpoint_lock_alive(lock_path):
+                return False
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+
+def _checkpoint_lock_alive(lock_path: str) -> bool:
+    """Ζει ακόμα το process που πήρε το lock;"""
+    try:
+        with open(lock_path) as f:
+            pid = int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError):
+        return True
+    # Κενό αρχείο: το lock μόλις δημιουργήθηκε και το pid δεν έχει γραφτεί ακόμα
+    if pid <= 0:
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _release_checkpoint_lock(path: str) -> None:
+    try:
+        os.remove(f"{path}.lock")
+    except FileNotFoundError:
+        pass
+
+
+def _run_job(job_id: str, file_bytes: bytes, options: Dict, time_limit: Optional[float]) -> Dict:
+    """Worker του JobRunner: load -> (προτάσεις) -> optimize -> export, με progress
+    
+    Με options['checkpoint_path'] το optimize γράφει checkpoints· αν το αρχείο υπάρχει
+    ήδη (π.χ. job που έληξε σε timeout) το job συνεχίζει από εκεί με resume_optimize().
+    Το checkpoint το χρησιμοποιεί μόνο το job που κρατά το lock του· ένα ταυτόσημο job
+    που τρέχει ταυτόχρονα δουλεύει χωρίς checkpoint (ούτε συνέχεια ούτε εγγραφή).
+    
+    Το όριο χρόνου ελέγχεται και ανάμεσα στις φάσεις: αν λήξει στη φόρτωση ή στις
+    προτάσεις, το optimize και το export παραλείπονται ('output' = None) και το
+    'timed_out_phase' λέει πού σταμάτησε το job.
+    """
+    # Το sharded optimization δεν γράφει checkpoints
+    checkpoint_path = None if options.get('sharded') else options.get('checkpoint_path')
+    locked = checkpoint_path is not None and _acquire_checkpoint_lock(checkpoint_path)
+    if checkpoint_path is not None and not locked:
+        print(f"⚠️ Το checkpoint {checkpoint_path} χρησιμοποιείται από άλλο job - χωρίς checkpoint")
+    try:
+        return _execute_job(job_id, file_bytes, options, time_limit,
+                            checkpoint_path if locked else None)
+    finally:
+        if locked:
+            _release_checkpoint_lock(checkpoint_path)
+
+
+def _execute_job(job_id: str, file_bytes: bytes, options: Dict, time_limit: Optional[float],
+                 checkpoint_path: Optional[str]) -> Dict:
+    """Οι φάσεις του _run_job - το checkpoint_path (αν δοθεί) ανήκει αποκλειστικά σε αυτό το job"""
+    started = time.time()
+    deadline = started + time_limit if time_limit else None
+    # Φάση στην οποία έληξε το όριο χρόνου (None = το job ολοκληρώθηκε)
+    stopped = None
+    
+    def expired() -> bool:
+        return deadline is not None and time.time() >= deadline
+    _report_job(job_id, 'running', 0.0, 'Φόρτωση Excel...')
+    
+    optimizer = _configure_optimizer(TeamOptimizer(), options)
+    
+    def on_progress(iteration: int, max_iterations: int) -> None:
+        _report_job(job_id, 'running', 0.1 + 0.8 * iteration / max_iterations,
+                    f'Iteration {iteration}/{max_iterations}')
+    
+    resumed = None
+    if checkpoint_path is not None and os.path.exists(checkpoint_path):
+        _report_job(job_id, 'running', 0.1, 'Συνέχεια από checkpoint...')
+        try:
+            resumed = optimizer.resume_optimize(checkpoint_path, deadline=deadline,
+                                                progress_callback=on_progress)
+            if optimizer.checkpoint_meta is None:
+                raise ValueError("δεν είναι checkpoint job")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Αγνοήθηκε το checkpoint {checkpoint_path}: {e}")
+            resumed = None
+            optimizer = _configure_optimizer(TeamOptimizer(), options)
+    
+    if resumed is not None:
+        # Η κατάσταση πριν το optimize και οι προτάσεις που εφαρμόστηκαν ζουν στο checkpoint
+        job = optimizer.checkpoint_meta
+        spreads_before, stats_before = job['spreads_before'], job['stats_before']
+        objective_before = job['objective_before']
+        scored_suggestions, suggestion_swaps = job['suggestions'], job['suggestion_swaps']
+        applied_swaps, spreads_after = resumed
+    else:
+        optimizer.load_from_excel(file_bytes)
+        spreads_before = optimizer.calculate_spreads()
+        stats_before = optimizer._get_team_stats()
+        objective_before = optimizer.objective_value(stats_before)
+        if expired():
+            stopped = 'load'
+        
+        scored_suggestions = None
+        suggestion_swaps = []
+        if stopped is None and options.get('evaluate_suggestions'):
+            _report_job(job_id, 'running', 0.05, 'Αξιολόγηση προτάσεων...')
+            scored_suggestions = optimizer.score_swap_suggestions(optimizer.iter_swap_suggestions(file_bytes))
+            if options.get('apply_suggestions'):
+                suggestion_swaps = optimizer.apply_best_suggestions(scored_suggestions)
+            if expired():
+                stopped = 'suggestions'
+        
+        max_iterations = options.get('max_iterations', 100)
+        if stopped is not None:
+            applied_swaps, spreads_after = [], optimizer.calculate_spreads()
+        elif options.get('sharded'):
+            _report_job(job_id, 'running', 0.1, 'Optimization...')
+            applied_swaps, spreads_after = optimizer.optimize_sharded(
+                max_iterations=max_iterations, engine=options['engine'], deadline=deadline)
+        else:
+            job = {
+                'spreads_before': spreads_before,
+                'stats_before': stats_before,
+                'objective_before': objective_before,
+                'suggestions': scored_suggestions,
+                'suggestion_swaps': suggestion_swaps
+            }
+            _report_job(job_id, 'running', 0.1, 'Optimization...')
+            if checkpoint_path is not None:
+                os.makedirs(os.path.dirname(checkpoint_path) or '.', exist_ok=True)
+            applied_swaps, spreads_after = optimizer.optimize(
+                max_iterations=max_iterations, engine=options['engine'],
+                deadline=deadline, progress_callback=on_progress,
+                checkpoint_path=checkpoint_path, checkpoint_meta=job)
+    applied_swaps = suggestion_swaps + applied_swaps
+    if stopped is None and expired():
+        stopped = 'optimize'
+    
+    # Μετά από timeout στο optimize το μερικό αποτέλεσμα εξάγεται κανονικά
+    output = None
+    if stopped in (None, 'optimize'):
+        _report_job(job_id, 'running', 0.9, 'Export...')
+        output = optimizer.export_to_excel(applied_swaps, spreads_after, scored_suggestions)
+    timed_out = stopped is not None
+    
+    result = {
+        'output': output,
+        # Κατάσταση + swaps για το what-if panel χωρίς νέο parsing
+        'snapshot': optimizer.save_snapshot(applied_swaps),
+        'targets': options['targets'],
+        'spreads_before': spreads_before,
+        'spreads_after': spreads_after,
+        'stats_before': stats_before,
+        'stats_after': optimizer._get_team_stats(),
+        'objective': (optimizer.objective.format(objective_before),
+                      optimizer.objective.format(optimizer.objective_value())),
+        # Ρυθμίσεις objective / κινήσεων για τον what-if optimizer
+        'objective_options': asdict(optimizer.objective),
+        'moves': {name: getattr(optimizer, name) for name in MOVE_OPTIONS},
+        'n_swaps': len(applied_swaps),
+        'suggestions': (len(scored_suggestions), len(suggestion_swaps)) if scored_suggestions is not None else None,
+        'resumed': resumed is not None,
+        'resumable': stopped == 'optimize' and checkpoint_path is not None,
+        'timed_out': timed_out,
+        'timed_out_phase': stopped,
+        'elapsed': time.time() - started
+    }
+    # Ολοκληρωμένο job: το checkpoint δεν χρειάζεται πια (σε timeout μένει για συνέχεια)
+    if checkpoint_path is not None and not timed_out and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return result
+
+
+class JobRunner:
+    """Τοπική ουρά εργασιών: pool από worker processes, job ids, polling για status/progress
+    
+    max_workers: πόσα jobs τρέχουν ταυτόχρονα (τα υπόλοιπα περιμένουν στην ουρά).
+    time_limit: δευτερόλεπτα ανά job από την έναρξή του (cooperative - ελέγχεται μετά τη
+    φόρτωση, μετά τις προτάσεις και σε κάθε iteration του optimize· το job τελειώνει
+    με status 'timeout').
+    job_ttl: δευτερόλεπτα που κρατιέται ένα τελειωμένο job (και τα Excel bytes του)
+    χωρίς forget() - π.χ. όταν η session εγκαταλείφθηκε πριν πάρει το αποτέλεσμα.
+    """
+    
+    def __init__(self, max_workers: int = 2, time_limit: Optional[float] = None,
+                 job_ttl: float = 3600.0):
+        self.max_workers = max_workers
+        self.time_limit = time_limit
+        self.job_ttl = job_ttl
+        self._events = multiprocessing.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_job_worker,
+                                         initargs=(self._events,))
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, file_bytes: bytes, options: Dict, time_limit: Optional[float] = None) -> str:
+        """Νέο job - επιστρέφει το job id"""
+        job_id = uuid.uuid4().hex
+        limit = time_limit if time_limit is not None else self.time_limit
+        with self._lock:
+            self._evict_expired()
+            job = {
+                'status': 'queued', 'progress': 0.0, 'message': 'Σε αναμονή...',
+                'submitted': time.time(),
+                'future': self._pool.submit(_run_job, job_id, file_bytes, options, limit)
+            }
+            self._jobs[job_id] = job
+        job['future'].add_done_callback(lambda _: job.setdefault('finished', time.time()))
+        return job_id
+    
+    def status(self, job_id: str) -> Optional[Dict]:
+        """{'status', 'progress', 'message', 'error'} - None για άγνωστο job"""
+        with self._lock:
+            self._drain_events()
+            self._evict_expired()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            
+            future = job['future']
+            if future.cancelled():
+                job.update(status='cancelled', message='Ακυρώθηκε')
+            elif future.done():
+                error = future.exception()
+                if error is not None:
+                    job.update(status='failed', message=str(error),
+                               error=''.join(traceback.format_exception(type(error), error, error.__traceback__)))
+                else:
+                    job.update(status='timeout' if future.result()['timed_out'] else 'done',
+                               progress=1.0, message='')
+            return {key: job.get(key) for key in ('status', 'progress', 'message', 'error')}
+    
+    def result(self, job_id: str) -> Optional[Dict]:
+        """Αποτέλεσμα (output bytes, snapshot, spreads...) όταν το job έχει τελειώσει"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        future = None if job is None else job['future']
+        if future is None or not future.done() or future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+    
+    def forget(self, job_id: str) -> None:
+        """Αποδέσμευση ενός job (π.χ. αφού πάρει το αποτέλεσμα η session)"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+    
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _evict_expired(self) -> None:
+        """Αφαίρεση τελειωμένων jobs παλαιότερων από job_ttl (κλήση με το lock)"""
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['future'].done() and now - job.get('finished', now) > self.job_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    def _drain_events(self) -> None:
+        while True:
+            try:
+                job_id, status, progress, message = self._events.get_nowait()
+            except queue.Empty:
+                return
+            job = self._jobs.get(job_id)
+            if job is not None and not job['future'].done():
+                job.update(status=status, progress=progress, message=message)
 
 
 def main():
@@ -904,13 +3406,27 @@ def main():
         1. Solo(ep3) ↔ Solo(ep1/2) - Ίδιο φύλο + γλώσσα
         2. Δυάδα(ep3) ↔ Δυάδα(ep1/2) - Ίδιο φύλο + γλώσσα
         3-8. Χαλάρωση περιορισμών
+        9-10. (προαιρετικά) Δυάδα ↔ Solo+Solo και αντίστροφα
+        11. (προαιρετικά) Μεταφορά Solo(ep3) χωρίς αντάλλαγμα, εντός ανοχής μεγέθους
+        12. (προαιρετικά) Κύκλος σε τρία τμήματα (A → B → Γ → A)
+        
+        **Engine:**
+        - `asymmetric`: max/min τμήμα μόνο βάσει ep3
+        - `multi_metric`: στοχεύει κάθε φορά τη μετρική με τη μεγαλύτερη υπέρβαση
+        - `batched`: πολλά ανεξάρτητα swaps ανά γύρο (ένα ανά ζεύγος τμημάτων)
         
-        **Στόχοι:**
+        **Objective (κατάταξη swaps του asymmetric):**
+        - `lexicographic`: ep3 → φύλο → γνώση (προεπιλογή, ρυθμιζόμενη σειρά)
+        - `weighted`: βάρη ανά όρο + ποινές υπέρβασης στόχων / μεγέθους τμημάτων
+        
+        **Στόχοι (προεπιλογή, ρυθμίζονται παρακάτω):**
         - Spread Επίδοσης 3: ≤ 3 ✅
         - Spread Φύλου: ≤ 4 ✅
         - Spread Γνώσης: ≤ 4 ✅
         """)
     
+    polling = False
+    
     st.subheader("📥 Upload Completed Excel")
     completed_file = st.file_uploader(
         "Ανέβασε το STEP7_COMPLETED.xlsx",
@@ -921,122 +3437,112 @@ def main():
     if completed_file:
         st.success(f"✅ {completed_file.name}")
         
+        engine = st.selectbox("⚙️ Engine", ENGINES, index=0)
+        sharded = st.checkbox(
+            "🧩 Sharded mode (για εκατοντάδες τμήματα)",
+            value=False,
+            help="Τα τμήματα χωρίζονται σε ισορροπημένα shards που βελτιστοποιούνται παράλληλα"
+        )
+        evaluate_suggestions = st.checkbox(
+            "📋 Αξιολόγηση προτάσεων από SWAP_SUGGESTIONS / ΑΝΤΑΛΛΑΓΕΣ_ΑΝΑ_ΤΜΗΜΑ",
+            value=False
+        )
+        apply_suggestions = st.checkbox(
+            "✅ Εφαρμογή των καλύτερων μη συγκρουόμενων προτάσεων",
+            value=False,
+            disabled=not evaluate_suggestions
+        )
+        
+        with st.expander("🎯 Στόχοι", expanded=False):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                target_ep3 = int(st.number_input("Spread Επ3 ≤", min_value=0, value=3, step=1))
+            with col2:
+                target_gender = int(st.number_input("Spread Φύλου ≤", min_value=0, value=4, step=1))
+            with col3:
+                target_greek = int(st.number_input("Spread Γνώσης ≤", min_value=0, value=4, step=1))
+        
+        with st.expander("🧮 Objective", expanded=False):
+            objective_mode = st.selectbox("Σύγκριση swaps", OBJECTIVE_MODES, index=0)
+            if objective_mode == 'lexicographic':
+                objective_order = st.multiselect(
+                    "Σειρά όρων", list(OBJECTIVE_TERMS), default=list(Objective().order),
+                    help="Ο πρώτος όρος αποφασίζει· με ισοπαλία μετράει ο επόμενος"
+                )
+                objective = {'mode': objective_mode, 'order': objective_order or list(Objective().order)}
+            else:
+                col1, col2, col3, col4, col5 = st.columns(5)
+                with col1:
+                    weight_ep3 = st.number_input("Βάρος Επ3", min_value=0.0, value=1.0, step=0.5)
+                with col2:
+                    weight_gender = st.number_input("Βάρος Φύλου", min_value=0.0, value=1.0, step=0.5)
+                with col3:
+                    weight_greek = st.number_input("Βάρος Γνώσης", min_value=0.0, value=1.0, step=0.5)
+                with col4:
+                    over_target_penalty = st.number_input("Ποινή υπέρβασης στόχων", min_value=0.0, value=0.0, step=0.5)
+                with col5:
+                    size_penalty = st.number_input("Ποινή μεγέθους τμημάτων", min_value=0.0, value=0.0, step=0.5)
+                objective = {
+                    'mode': objective_mode,
+                    'weights': {'ep3': weight_ep3, 'gender': weight_gender, 'greek': weight_greek},
+                    'over_target_penalty': over_target_penalty,
+                    'size_penalty': size_penalty
+                }
+        
+        with st.expander("🔀 Επιπλέον κινήσεις (asymmetric)", expanded=False):
+            mixed_moves = st.checkbox(
+                "Δυάδα ↔ Solo+Solo και Solo+Solo ↔ Δυάδα (P9/P10)",
+                value=False
+            )
+            transfers = st.checkbox(
+                "Μεταφορές Solo(ep3) χωρίς αντάλλαγμα (P11)",
+                value=False
+            )
+            transfer_size_tolerance = int(st.number_input(
+                "Μέγιστο spread μεγέθους τμημάτων", min_value=0, value=1, step=1,
+                disabled=not transfers
+            ))
+            rotations = st.checkbox(
+                "Κυκλικές μετακινήσεις σε τρία τμήματα (P12)",
+                value=False,
+                help="Μόνο για το asymmetric engine. Δοκιμάζονται μόνο όταν καμία άλλη κίνηση "
+                     "(P1-P11) δεν βελτιώνει - βγάζουν το optimization από αδιέξοδο, με κόστος χρόνου."
+            )
+        
+        options = {
+            'engine': engine,
+            'sharded': sharded,
+            'evaluate_suggestions': evaluate_suggestions,
+            'apply_suggestions': apply_suggestions,
+            'targets': (target_ep3, target_gender, target_greek),
+            'objective': objective,
+            'moves': {
+                'mixed_moves': mixed_moves,
+                'transfer_size_tolerance': transfer_size_tolerance if transfers else None,
+                'rotations': rotations
+            },
+            'max_iterations': 100
+        }
+        
         if st.button("⚡ Εκτέλεση Optimization", type="primary", use_container_width=True):
-            with st.spinner("🔄 Asymmetric swaps σε εξέλιξη..."):
-                try:
-                    optimizer = TeamOptimizer()
-                    optimizer.load_from_excel(completed_file.read())
-                    
-                    # Debug: Εμφάνιση sample students
-                    with st.expander("🔍 Debug: Sample Students", expanded=False):
-                        sample_students = list(optimizer.students.items())[:5]
-                        for name, student in sample_students:
-                            st.text(f"{name}: Greek={student.greek_knowledge}, Gender={student.gender}, Choice={student.choice}")
-                    
-                    spreads_before = optimizer.calculate_spreads()
-                    stats_before = optimizer._get_team_stats()
-                    
-                    st.info("📊 **ΠΡΙΝ την Βελτιστοποίηση:**")
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric("Spread Επ3", spreads_before['ep3'])
-                    with col2:
-                        st.metric("Spread Αγόρια", spreads_before['boys'])
-                    with col3:
-                        st.metric("Spread Κορίτσια", spreads_before['girls'])
-                    with col4:
-                        st.metric("Spread Γνώση", spreads_before['greek_yes'])
-                    
-                    # Debug stats
-                    with st.expander("📊 Detailed Stats BEFORE", expanded=False):
-                        for team, s in stats_before.items():
-                            st.text(f"{team}: ΝΑΙ={s['greek_yes']}, ΟΧΙ={s['greek_no']}, EP3={s['ep3']}")
-                    
-                    # Optimization
-                    applied_swaps, spreads_after = optimizer.optimize(max_iterations=100)
-                    stats_after = optimizer._get_team_stats()
-                    
-                    st.markdown("---")
-                    st.success("✅ **ΜΕΤΑ την Βελτιστοποίηση:**")
-                    
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        st.metric(
-                            "Spread Επ3", 
-                            spreads_after['ep3'],
-                            delta=-(spreads_before['ep3'] - spreads_after['ep3']),
-                            delta_color="inverse"
-                        )
-                        if spreads_after['ep3'] <= 3:
-                            st.success("✅ Στόχος επιτεύχθηκε!")
-                        else:
-                            st.warning(f"⚠️ Στόχος: ≤ 3")
-                    
-                    with col2:
-                        st.metric(
-                            "Spread Αγόρια",
-                            spreads_after['boys'],
-                            delta=-(spreads_before['boys'] - spreads_after['boys']),
-                            delta_color="inverse"
-                        )
-                        if spreads_after['boys'] <= 4:
-                            st.success("✅")
-                        else:
-                            st.warning("⚠️ ≤ 4")
-                    
-                    with col3:
-                        st.metric(
-                            "Spread Κορίτσια",
-                            spreads_after['girls'],
-                            delta=-(spreads_before['girls'] - spreads_after['girls']),
-                            delta_color="inverse"
-                        )
-                        if spreads_after['girls'] <= 4:
-                            st.success("✅")
-                        else:
-                            st.warning("⚠️ ≤ 4")
-                    
-                    with col4:
-                        st.metric(
-                            "Spread Γνώση",
-                            spreads_after['greek_yes'],
-                            delta=-(spreads_before['greek_yes'] - spreads_after['greek_yes']),
-                            delta_color="inverse"
-                        )
-                        if spreads_after['greek_yes'] <= 4:
-                            st.success("✅")
-                        else:
-                            st.warning("⚠️ ≤ 4")
-                    
-                    # Debug stats AFTER
-                    with st.expander("📊 Detailed Stats AFTER", expanded=False):
-                        for team, s in stats_after.items():
-                            st.text(f"{team}: ΝΑΙ={s['greek_yes']}, ΟΧΙ={s['greek_no']}, EP3={s['ep3']}")
-                    
-                    st.markdown("---")
-                    st.info(f"🔄 **Εφαρμόστηκαν {len(applied_swaps)} swaps συνολικά**")
-                    
-                    # Export
-                    output_bytes = optimizer.export_to_excel(applied_swaps, spreads_after)
-                    
-                    st.download_button(
-                        label="📥 Κατέβασε Βελτιωμένη Κατανομή",
-                        data=output_bytes,
-                        file_name="ΒΕΛΤΙΩΜΕΝΗ_ΚΑΤΑΝΟΜΗ_FIXED.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        type="primary",
-                        use_container_width=True
-                    )
-                    
-                    st.balloons()
-                    
-                except Exception as e:
-                    st.error(f"❌ Σφάλμα: {str(e)}")
-                    with st.expander("Λεπτομέρειες"):
-                        import traceback
-                        st.code(traceback.format_exc())
+            options['checkpoint_path'] = _job_checkpoint_path(completed_file.getvalue(), options)
+            # Το optimization τρέχει σε background job - η σελίδα κάνει polling
+            st.session_state['job_id'] = get_job_runner().submit(completed_file.getvalue(), options)
+            st.session_state.pop('job_result', None)
+            st.session_state.pop('optimizer', None)
+        
+        polling = render_job_panel()
+        
+        render_reoptimize_panel(completed_file.getvalue(), options)
+        render_sweep_panel(completed_file.getvalue())
     else:
         st.info("👆 Ανέβασε το completed Excel για να ξεκινήσεις")
+        st.session_state.pop('optimizer', None)
+        st.session_state.pop('job_id', None)
+        st.session_state.pop('job_result', None)
+    
+    if 'optimizer' in st.session_state:
+        render_what_if_panel()
     
     st.markdown("---")
     st.markdown(
@@ -1045,6 +3551,415 @@ def main():
         "</div>",
         unsafe_allow_html=True
     )
+    
+    if polling:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
+
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    """Ένας κοινός JobRunner για όλες τις sessions του server"""
+    time_limit = os.environ.get('TEAM_OPTIMIZER_TIME_LIMIT')
+    return JobRunner(max_workers=int(os.environ.get('TEAM_OPTIMIZER_WORKERS', 2)),
+                     time_limit=float(time_limit) if time_limit else None)
+
+
+def render_job_panel() -> bool:
+    """Status/progress του τρέχοντος job - True όσο χρειάζεται polling"""
+    job_id = st.session_state.get('job_id')
+    if job_id is None:
+        return False
+    
+    if 'job_result' not in st.session_state:
+        runner = get_job_runner()
+        info = runner.status(job_id)
+        if info is None:
+            st.warning("⚠️ Το job δεν βρέθηκε (επανεκκίνηση server;) - τρέξε ξανά")
+            st.session_state.pop('job_id', None)
+            return False
+        
+        if info['status'] in ('queued', 'running'):
+            st.progress(info['progress'], text=f"🔄 {info['message']}")
+            return True
+        
+        if info['status'] == 'failed':
+            st.error(f"❌ Σφάλμα: {info['message']}")
+            with st.expander("Λεπτομέρειες"):
+                st.code(info['error'])
+            runner.forget(job_id)
+            st.session_state.pop('job_id', None)
+            return False
+        
+        if info['status'] == 'cancelled':
+            st.warning("⚠️ Το job ακυρώθηκε - τρέξε ξανά")
+            runner.forget(job_id)
+            st.session_state.pop('job_id', None)
+            return False
+        
+        result = runner.result(job_id)
+        runner.forget(job_id)
+        st.session_state['job_result'] = result
+        
+        # Κράτα τον optimizer για το what-if panel (από το snapshot του job)
+        optimizer = TeamOptimizer()
+        optimizer.target_ep3, optimizer.target_gender, optimizer.target_greek = result['targets']
+        optimizer.objective = Objective(**result['objective_options'])
+        optimizer.set_moves(result['moves'])
+        st.session_state['applied_swaps'] = optimizer.load_snapshot(result['snapshot'])
+        st.session_state['optimizer'] = optimizer
+        st.session_state['whatif_stats'] = result['stats_after']
+        st.session_state['whatif_history'] = []
+        st.session_state.pop('whatif_export', None)
+        st.balloons()
+    
+    render_job_result(st.session_state['job_result'])
+    return False
+
+
+def render_job_result(result: Dict):
+    """Αποτελέσματα ενός ολοκληρωμένου job (πριν/μετά, λεπτομέρειες, download)"""
+    spreads_before, spreads_after = result['spreads_before'], result['spreads_after']
+    stats_before, stats_after = result['stats_before'], result['stats_after']
+    target_ep3, target_gender, target_greek = result['targets']
+    
+    # Debug: Εμφάνιση sample students
+    with st.expander("🔍 Debug: Sample Students", expanded=False):
+        sample_students = list(st.session_state['optimizer'].students.items())[:5]
+        for name, student in sample_students:
+            st.text(f"{name}: Greek={student.greek_knowledge}, Gender={student.gender}, Choice={student.choice}")
+    
+    st.info("📊 **ΠΡΙΝ την Βελτιστοποίηση:**")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Spread Επ3", spreads_before['ep3'])
+    with col2:
+        st.metric("Spread Αγόρια", spreads_before['boys'])
+    with col3:
+        st.metric("Spread Κορίτσια", spreads_before['girls'])
+    with col4:
+        st.metric("Spread Γνώση", spreads_before['greek_yes'])
+    
+    # Debug stats
+    with st.expander("📊 Detailed Stats BEFORE", expanded=False):
+        for team, s in stats_before.items():
+            st.text(f"{team}: ΝΑΙ={s['greek_yes']}, ΟΧΙ={s['greek_no']}, EP3={s['ep3']}")
+    
+    # Εξωτερικές προτάσεις swaps (πριν το optimization)
+    if result['suggestions'] is not None:
+        n_scored, n_applied = result['suggestions']
+        st.info(f"📋 {n_scored} προτάσεις αξιολογήθηκαν, {n_applied} εφαρμόστηκαν")
+    
+    st.markdown("---")
+    st.success("✅ **ΜΕΤΑ την Βελτιστοποίηση:**")
+    if result['output'] is None:
+        phase = JOB_PHASE_LABELS.get(result.get('timed_out_phase'), '')
+        st.warning(f"⏱️ Το όριο χρόνου ({result['elapsed']:.0f}s) έληξε στη φάση '{phase}', πριν το "
+                   f"optimization - δεν υπάρχει αποτέλεσμα. Αύξησε το όριο χρόνου και τρέξε ξανά.")
+    elif result['timed_out']:
+        resume_hint = " Με νέα εκτέλεση συνεχίζει από το checkpoint." if result.get('resumable') else ""
+        st.warning(f"⏱️ Το job σταμάτησε στο όριο χρόνου ({result['elapsed']:.0f}s) - "
+                   f"αποτέλεσμα μέχρι εκείνο το σημείο.{resume_hint}")
+    elif result.get('resumed'):
+        st.info("♻️ Συνέχεια από checkpoint προηγούμενης εκτέλεσης")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(
+            "Spread Επ3", 
+            spreads_after['ep3'],
+            delta=-(spreads_before['ep3'] - spreads_after['ep3']),
+            delta_color="inverse"
+        )
+        if spreads_after['ep3'] <= target_ep3:
+            st.success("✅ Στόχος επιτεύχθηκε!")
+        else:
+            st.warning(f"⚠️ Στόχος: ≤ {target_ep3}")
+    
+    with col2:
+        st.metric(
+            "Spread Αγόρια",
+            spreads_after['boys'],
+            delta=-(spreads_before['boys'] - spreads_after['boys']),
+            delta_color="inverse"
+        )
+        if spreads_after['boys'] <= target_gender:
+            st.success("✅")
+        else:
+            st.warning(f"⚠️ ≤ {target_gender}")
+    
+    with col3:
+        st.metric(
+            "Spread Κορίτσια",
+            spreads_after['girls'],
+            delta=-(spreads_before['girls'] - spreads_after['girls']),
+            delta_color="inverse"
+        )
+        if spreads_after['girls'] <= target_gender:
+            st.success("✅")
+        else:
+            st.warning(f"⚠️ ≤ {target_gender}")
+    
+    with col4:
+        st.metric(
+            "Spread Γνώση",
+            spreads_after['greek_yes'],
+            delta=-(spreads_before['greek_yes'] - spreads_after['greek_yes']),
+            delta_color="inverse"
+        )
+        if spreads_after['greek_yes'] <= target_greek:
+            st.success("✅")
+        else:
+            st.warning(f"⚠️ ≤ {target_greek}")
+    
+    # Debug stats AFTER
+    with st.expander("📊 Detailed Stats AFTER", expanded=False):
+        for team, s in stats_after.items():
+            st.text(f"{team}: ΝΑΙ={s['greek_yes']}, ΟΧΙ={s['greek_no']}, EP3={s['ep3']}")
+    
+    st.markdown("---")
+    st.info(f"🔄 **Εφαρμόστηκαν {result['n_swaps']} swaps συνολικά**")
+    st.caption(f"🧮 Objective: {result['objective'][0]} → {result['objective'][1]}")
+    
+    if result['output'] is None:
+        return
+    st.download_button(
+        label="📥 Κατέβασε Βελτιωμένη Κατανομή",
+        data=result['output'],
+        file_name="ΒΕΛΤΙΩΜΕΝΗ_ΚΑΤΑΝΟΜΗ_FIXED.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        type="primary",
+        use_container_width=True
+    )
+
+
+def load_optimizer(file_bytes: bytes) -> TeamOptimizer:
+    """Parsing του Excel μία φορά ανά αρχείο - στα επόμενα reruns από cached snapshot"""
+    key = hashlib.sha1(file_bytes).hexdigest()
+    cached = st.session_state.get('input_snapshot')
+    optimizer = TeamOptimizer()
+    if cached and cached[0] == key:
+        optimizer.load_snapshot(cached[1])
+    else:
+        optimizer.load_from_excel(file_bytes)
+        st.session_state['input_snapshot'] = (key, optimizer.save_snapshot())
+    return optimizer
+
+
+def render_reoptimize_panel(file_bytes: bytes, options: Dict):
+    """Warm start: προηγούμενη έξοδος + διορθωμένο Excel -> diff_rosters -> reoptimize
+    
+    Το completed Excel του main είναι το roster του προηγούμενου run· η κατανομή του
+    έρχεται από τα sheets τμημάτων της εξόδου του (ΒΕΛΤΙΩΜΕΝΗ_ΚΑΤΑΝΟΜΗ.xlsx).
+    """
+    with st.expander("♻️ Warm start μετά από αλλαγές roster", expanded=False):
+        previous_file = st.file_uploader("Προηγούμενη έξοδος (ΒΕΛΤΙΩΜΕΝΗ_ΚΑΤΑΝΟΜΗ.xlsx)",
+                                         type=['xlsx'], key='reopt_previous')
+        edited_file = st.file_uploader("Διορθωμένο completed Excel (νέοι / αποχωρήσεις / αλλαγές)",
+                                       type=['xlsx'], key='reopt_edited')
+        reopt_engine = st.selectbox("Engine", ENGINES, index=ENGINES.index('multi_metric'), key='reopt_engine')
+        
+        if not st.button("♻️ Warm start", use_container_width=True, key='reopt_run',
+                         disabled=not (previous_file and edited_file)):
+            return
+        
+        with st.spinner("Warm start..."):
+            # Νέο object από το cached snapshot: το roster του session δεν αλλάζει
+            optimizer = _configure_optimizer(TeamOptimizer(), options)
+            optimizer.load_snapshot(load_optimizer(file_bytes).save_snapshot())
+            previous_teams = optimizer.read_team_assignments(previous_file.getvalue())
+            if not previous_teams:
+                st.error("❌ Η προηγούμενη έξοδος δεν έχει sheets τμημάτων με μαθητές του roster")
+                return
+            
+            edited = TeamOptimizer()
+            edited.load_from_excel(edited_file.getvalue())
+            diff = diff_rosters(optimizer.students, edited.students, edited.teams)
+            
+            placed = {name for names in previous_teams.values() for name in names}
+            unplaced = [name for name in optimizer.students if name not in placed and name not in diff.removed]
+            if unplaced:
+                st.warning(f"⚠️ {len(unplaced)} μαθητές του roster δεν βρέθηκαν στην προηγούμενη έξοδο "
+                           f"και μένουν εκτός κατανομής: {', '.join(unplaced[:10])}")
+            if diff.is_empty():
+                st.info("Καμία αλλαγή roster - η προηγούμενη κατανομή ισχύει")
+                return
+            
+            try:
+                applied_swaps, spreads_after = optimizer.reoptimize(
+                    previous_teams, diff, max_iterations=options['max_iterations'], engine=reopt_engine)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                return
+        
+        st.success(f"✅ {len(diff.added)} νέοι, {len(diff.removed)} αποχωρήσεις, {len(diff.changed)} αλλαγές · "
+                   f"{len(applied_swaps)} swaps από την προηγούμενη κατανομή")
+        col1, col2, col3, col4 = st.columns(4)
+        for col, (label, key) in zip(
+            (col1, col2, col3, col4),
+            (("Spread Επ3", 'ep3'), ("Spread Αγόρια", 'boys'),
+             ("Spread Κορίτσια", 'girls'), ("Spread Γνώση", 'greek_yes'))
+        ):
+            with col:
+                st.metric(label, spreads_after[key])
+        st.download_button(
+            label="📥 Κατέβασε Κατανομή μετά τις αλλαγές",
+            data=optimizer.export_to_excel(applied_swaps, spreads_after),
+            file_name="ΒΕΛΤΙΩΜΕΝΗ_ΚΑΤΑΝΟΜΗ_WARM.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True,
+            key='reopt_download'
+        )
+
+
+def render_sweep_panel(file_bytes: bytes):
+    """Scenario sweep σε στόχους × engines με αναφορά Pareto"""
+    with st.expander("🔬 Scenario Sweep (Pareto)", expanded=False):
+        sweep_engines = st.multiselect("Engines", ENGINES, default=list(ENGINES), key='sweep_engines')
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sweep_ep3 = st.multiselect("Στόχοι Επ3", list(range(0, 7)), default=[2, 3, 4], key='sweep_ep3')
+        with col2:
+            sweep_gender = st.multiselect("Στόχοι Φύλου", list(range(0, 9)), default=[3, 4, 5], key='sweep_gender')
+        with col3:
+            sweep_greek = st.multiselect("Στόχοι Γνώσης", list(range(0, 9)), default=[3, 4, 5], key='sweep_greek')
+        
+        if not st.button("🔬 Εκτέλεση Sweep", use_container_width=True, key='sweep_run'):
+            return
+        if not (sweep_engines and sweep_ep3 and sweep_gender and sweep_greek):
+            st.warning("⚠️ Διάλεξε τουλάχιστον μία τιμή σε κάθε πεδίο")
+            return
+        
+        with st.spinner("🔬 Sweep σε εξέλιξη..."):
+            optimizer = load_optimizer(file_bytes)
+            results = optimizer.sweep(sweep_ep3, sweep_gender, sweep_greek, sweep_engines)
+        
+        pareto = [r for r in results if r['pareto']]
+        st.success(f"⭐ {len(pareto)} Pareto-optimal από {len(results)} σενάρια")
+        st.dataframe(
+            [
+                {
+                    'Engine': r['engine'],
+                    'Στόχοι (Επ3/Φύλο/Γνώση)': f"{r['target_ep3']}/{r['target_gender']}/{r['target_greek']}",
+                    'Spread Επ3': r['spreads']['ep3'],
+                    'Spread Αγόρια': r['spreads']['boys'],
+                    'Spread Κορίτσια': r['spreads']['girls'],
+                    'Spread Γνώση': r['spreads']['greek_yes'],
+                    'Swaps': r['swaps'],
+                    'Στόχοι OK': '✅' if r['targets_met'] else '❌'
+                }
+                for r in pareto
+            ],
+            use_container_width=True
+        )
+        st.download_button(
+            label="📥 Κατέβασε Sweep Report",
+            data=optimizer.export_sweep_to_excel(results),
+            file_name="SWEEP_PARETO.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
+
+
+def render_what_if_panel():
+    """Χειροκίνητο what-if swap με άμεση προεπισκόπηση των spreads"""
+    optimizer = st.session_state['optimizer']
+    stats = st.session_state['whatif_stats']
+    history = st.session_state['whatif_history']
+    
+    st.markdown("---")
+    st.subheader("🧪 What-if: Χειροκίνητο Swap")
+    
+    teams = sorted(optimizer.teams.keys())
+    if len(teams) < 2:
+        return
+    
+    col_a, col_b = st.columns(2)
+    with col_a:
+        team_a = st.selectbox("Τμήμα Α", teams, index=0, key='whatif_team_a')
+        names_a = st.multiselect(
+            f"Μαθητές από {team_a}", sorted(optimizer.teams[team_a]), key=f'whatif_names_a_{team_a}'
+        )
+    with col_b:
+        team_b = st.selectbox("Τμήμα Β", teams, index=1, key='whatif_team_b')
+        names_b = st.multiselect(
+            f"Μαθητές από {team_b}", sorted(optimizer.teams[team_b]), key=f'whatif_names_b_{team_b}'
+        )
+    
+    if team_a != team_b and (names_a or names_b):
+        started = time.perf_counter()
+        preview = optimizer.preview_swap(team_a, names_a, team_b, names_b, stats)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        before, after = preview['spreads_before'], preview['spreads_after']
+        col1, col2, col3, col4 = st.columns(4)
+        for col, (label, key) in zip(
+            (col1, col2, col3, col4),
+            (("Spread Επ3", 'ep3'), ("Spread Αγόρια", 'boys'),
+             ("Spread Κορίτσια", 'girls'), ("Spread Γνώση", 'greek_yes'))
+        ):
+            with col:
+                st.metric(label, after[key], delta=after[key] - before[key], delta_color="inverse")
+        
+        for warning in preview['warnings']:
+            st.warning(f"⚠️ {warning}")
+        st.caption(f"⏱️ Προεπισκόπηση σε {elapsed_ms:.1f} ms")
+        
+        # Τα LOCKED μένουν στο τμήμα τους: η προεπισκόπηση φαίνεται, η εφαρμογή όχι
+        if st.button("✅ Εφαρμογή swap", key='whatif_apply', disabled=bool(preview['locked'])):
+            swap = {
+                'type': 'Manual',
+                'from_team': team_a,
+                'students_out': list(names_a),
+                'to_team': team_b,
+                'students_in': list(names_b),
+                'improvement': preview['improvement'],
+                'priority': 0
+            }
+            optimizer._apply_swap(swap)
+            history.append(swap)
+            st.session_state['applied_swaps'].append(swap)
+            st.session_state['whatif_stats'] = preview['stats_after']
+            _reset_what_if_selection(team_a, team_b)
+            st.rerun()
+    elif team_a == team_b:
+        st.info("Διάλεξε δύο διαφορετικά τμήματα")
+    
+    if history:
+        st.caption(f"🔁 Χειροκίνητα swaps: {len(history)}")
+        if st.button("↩️ Undo τελευταίου swap", key='whatif_undo'):
+            swap = history.pop()
+            reverse = optimizer._reverse_swap(swap)
+            preview = optimizer.preview_swap(
+                reverse['from_team'], reverse['students_out'],
+                reverse['to_team'], reverse['students_in'], st.session_state['whatif_stats']
+            )
+            optimizer._apply_swap(reverse)
+            st.session_state['applied_swaps'].remove(swap)
+            st.session_state['whatif_stats'] = preview['stats_after']
+            _reset_what_if_selection(team_a, team_b)
+            st.rerun()
+        
+        # Το Excel χτίζεται μία φορά ανά κατάσταση, όχι σε κάθε rerun
+        cached = st.session_state.get('whatif_export')
+        if cached is None or cached[0] != len(history):
+            cached = (len(history), optimizer.export_to_excel(st.session_state['applied_swaps'],
+                                                              optimizer.calculate_spreads()))
+            st.session_state['whatif_export'] = cached
+        st.download_button(
+            label="📥 Κατέβασε Κατανομή με τα χειροκίνητα swaps",
+            data=cached[1],
+            file_name="ΒΕΛΤΙΩΜΕΝΗ_ΚΑΤΑΝΟΜΗ_WHATIF.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            use_container_width=True
+        )
+
+
+def _reset_what_if_selection(team_a: str, team_b: str) -> None:
+    """Καθαρισμός επιλογών μαθητών και cached export μετά από apply/undo"""
+    st.session_state.pop(f'whatif_names_a_{team_a}', None)
+    st.session_state.pop(f'whatif_names_b_{team_b}', None)
+    st.session_state.pop('whatif_export', None)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Reference-equivalence + performance harness για το asymmetric engine
+
+Τρέχει το frozen reference (reference_engine.py) και το τρέχον TeamOptimizer σε
+corpus από generated rosters + τα recorded rosters του bench_corpus/ και:
+- αποτυγχάνει αν διαφέρει η σειρά των applied_swaps ή τα τελικά spreads
+- αποτυγχάνει αν ένα generated roster δίνει λιγότερα από MIN_SWAPS swaps ή αν
+  κάποιο priority (P1-P8) δεν εμφανίζεται στο generated corpus
+- αναφέρει speedup (χρόνος reference / χρόνος candidate) ανά roster
+- αποτυγχάνει αν το συνολικό speedup στο generated corpus πέσει κάτω από το baseline
+  (λόγος μετρημένος στο ίδιο run, άρα ανεξάρτητος από το μηχάνημα)
+- regression για τις επιπλέον κινήσεις (P9-P11): το objective_after κάθε swap
+  πρέπει να ταιριάζει με την κατάσταση που δίνει το replay των swaps
+- batched engine: πρέπει να είναι ταχύτερο (wall time) από το multi_metric στα ίδια rosters
+- κλιμάκωση του sharded reconciliation: ο χρόνος ανά iteration δεν πρέπει να
+  αυξάνεται ταχύτερα από γραμμικά με το πλήθος τμημάτων
+- ταυτόσημα jobs (ίδιο Excel + ρυθμίσεις -> ίδιο checkpoint) που τρέχουν ταυτόχρονα:
+  κανένα δεν αποτυγχάνει ή κάνει resume από το checkpoint άλλου, ίδιο αποτέλεσμα
+
+Χρήση:
+    python bench.py                                  # έλεγχος (έξοδος και στο bench_output.txt)
+    python bench.py --corpus rosters/                # + επιπλέον recorded STEP7 .xlsx / .tosn
+    python bench.py --update-baseline                # νέο baseline speedup
+    python bench.py --anonymise in.xlsx out.tosn     # ανωνυμοποίηση recorded roster για το bench_corpus/
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import openpyxl
+
+from app import JobRunner, Objective, Student, TeamOptimizer
+from reference_engine import ReferenceOptimizer
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+OUTPUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_output.txt')
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_corpus')
+
+# Generated corpus: (τμήματα, μαθητές ανά τμήμα, seed)
+GENERATED_CORPUS = [
+    (6, 40, 1), (8, 40, 2), (12, 40, 3), (12, 38, 4),
+    (20, 40, 5), (30, 40, 9), (45, 40, 7), (60, 40, 8),
+]
+
+# Κάλυψη: swaps ανά generated roster και priorities του asymmetric engine
+MIN_SWAPS = 20
+PRIORITIES = range(1, 9)
+
+# Επιπλέον κινήσεις: (τμήματα, μαθητές ανά τμήμα, seed, locked τα τμήματα χωρίς ep3)
+# Με locked τα "άδεια" τμήματα δεν υπάρχει swap προς αυτά, μόνο μεταφορές (P11)
+MOVES_CORPUS = [(6, 40, 1, False), (8, 40, 2, False), (8, 40, 2, True)]
+MOVES = {'mixed_moves': True, 'transfer_size_tolerance': 2}
+# Οι μεταφορές αλλάζουν μεγέθη τμημάτων: το objective μετράει και το 'size'
+MOVES_OBJECTIVE = Objective(order=('ep3', 'gender', 'greek', 'size'))
+MOVE_PRIORITIES = (9, 10, 11)
+
+# Batched vs multi_metric: (τμήματα, μαθητές ανά τμήμα, seed)
+BATCHED_CORPUS = [(12, 40, 3), (30, 40, 9), (60, 40, 8)]
+
+# Sharded reconciliation: πλήθη τμημάτων (μαθητές ανά τμήμα, seed) και μέγιστος
+# εκθέτης αύξησης του χρόνου ανά iteration (1 = γραμμικά με τα τμήματα)
+SHARDED_TEAMS = (32, 64, 128, 256)
+SHARDED_ROSTER = (40, 3)
+SHARD_SIZE = 8
+MAX_RECONCILE_EXPONENT = 1.5
+
+# Ταυτόσημα jobs που τρέχουν ταυτόχρονα: roster (τμήματα, μαθητές ανά τμήμα, seed) και πλήθος jobs
+JOBS_ROSTER = (30, 40, 9)
+CONCURRENT_JOBS = 3
+
+
+def ep3_levels(n_teams: int, per_team: int) -> List[int]:
+    """Πλήθος ep3 ανά τμήμα: δύο άδεια, δύο γεμάτα (per_team-1, per_team), τα υπόλοιπα στη μέση
+    
+    Το asymmetric engine σταματά όταν και το max και το min ep3 είναι ισοπαλία σε
+    πολλά τμήματα. Εδώ η μία πλευρά μένει πάντα μοναδική μέχρι το spread να φτάσει
+    τον στόχο, οπότε κάθε roster δίνει περίπου per_team / 2 swaps.
+    """
+    levels = [per_team // 2] * n_teams
+    levels[0] = levels[1] = 0
+    levels[-2], levels[-1] = per_team - 1, per_team
+    return levels
+
+
+def generate_roster(n_teams: int, per_team: int, seed: int) -> Tuple[Dict[str, Student], Dict[str, List[str]]]:
+    """Τυχαίο αλλά ντετερμινιστικό roster με ακριβές πλήθος ep3 ανά τμήμα (ep3_levels),
+    δυάδες/ομάδες φίλων και locked"""
+    rnd = random.Random(seed)
+    students: Dict[str, Student] = {}
+    teams: Dict[str, List[str]] = {}
+    k = 0
+    
+    for t, level in enumerate(ep3_levels(n_teams, per_team)):
+        names: List[str] = []
+        groups: List[List[str]] = []
+        while len(names) < per_team:
+            size = rnd.choice([1, 1, 1, 2, 2, 3]) if len(names) <= per_team - 3 else 1
+            group = [f"S{k + i:05d}" for i in range(size)]
+            k += size
+            groups.append(group)
+            names.extend(group)
+        
+        # Ακριβώς `level` ep3: πρώτα ολόκληρες ομάδες (δυάδες ep3 για P2/P4/P6/P8), μετά μεμονωμένοι
+        ep3 = set()
+        for group in rnd.sample(groups, len(groups)):
+            if len(ep3) + len(group) <= level:
+                ep3.update(group)
+        rest = [name for name in names if name not in ep3]
+        ep3.update(rnd.sample(rest, level - len(ep3)))
+        
+        # Τα τμήματα με πολλά ep3 έχουν και περισσότερα αγόρια / λιγότερη γνώση
+        bias = level / per_team - 0.5
+        for group in groups:
+            gender = 'Α' if rnd.random() < 0.5 + 0.56 * bias else 'Κ'
+            greek = 'Ν' if rnd.random() < 0.85 - 0.4 * max(0.0, bias) else 'Ο'
+            locked = rnd.random() < 0.05
+            for name in group:
+                students[name] = Student(
+                    name=name,
+                    choice=3 if name in ep3 else rnd.choice([1, 2]),
+                    gender=gender,
+                    greek_knowledge=greek,
+                    friends=[other for other in group if other != name],
+                    locked=locked
+                )
+        teams[f"Α{t + 1}"] = names
+    
+    return students, teams
+
+
+def roster_workbook(students: Dict[str, Student], teams: Dict[str, List[str]]) -> bytes:
+    """STEP7 Excel για το roster: όλοι οι μαθητές στο SINGLE (φίλοι στη στήλη ΦΙΛΟΙ) + sheet ανά τμήμα"""
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    single = wb.create_sheet('SINGLE')
+    single.append(['ΟΝΟΜΑ', 'ΦΥΛΟ', 'ΚΑΛΗ_ΓΝΩΣΗ_ΕΛΛΗΝΙΚΩΝ', 'ΕΠΙΔΟΣΗ', 'ΦΙΛΟΙ', 'LOCKED'])
+    for student in students.values():
+        single.append([student.name, student.gender, student.greek_knowledge, student.choice,
+                       ', '.join(student.friends), 'LOCKED' if student.locked else ''])
+    for team, names in teams.items():
+        sheet = wb.create_sheet(team)
+        sheet.append(['ΟΝΟΜΑ'])
+        for name in names:
+            sheet.append([name])
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def load_recorded(path: str) -> Tuple[Dict[str, Student], Dict[str, List[str]]]:
+    optimizer = TeamOptimizer()
+    with open(path, 'rb') as f:
+        data = f.read()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if path.endswith('.xlsx'):
+            optimizer.load_from_excel(data)
+        else:
+            optimizer.load_snapshot(data)
+    return optimizer.students, optimizer.teams
+
+
+def anonymise(source: str, target: str) -> None:
+    """Recorded roster -> snapshot με ονόματα S0001.. και τμήματα Τ1.. (ίδια δομή φίλων/locked)"""
+    students, teams = load_recorded(source)
+    team_names = {team: f"Τ{idx}" for idx, team in enumerate(teams, start=1)}
+    student_names: Dict[str, str] = {}
+    for names in teams.values():
+        for name in names:
+            student_names.setdefault(name, f"S{len(student_names) + 1:04d}")
+    for name in students:
+        student_names.setdefault(name, f"S{len(student_names) + 1:04d}")
+    
+    optimizer = TeamOptimizer()
+    optimizer.students = {
+        student_names[name]: Student(student_names[name], s.choice, s.gender, s.greek_knowledge,
+                                     [student_names[f] for f in s.friends if f in student_names], s.locked)
+        for name, s in students.items()
+    }
+    optimizer.teams = {team_names[team]: [student_names[n] for n in names] for team, names in teams.items()}
+    with open(target, 'wb') as f:
+        f.write(optimizer.save_snapshot())
+    print(f"💾 {len(students)} μαθητές / {len(teams)} τμήματα -> {target}")
+
+
+def build_corpus(corpus_dirs: List[str]) -> List[Tuple[str, Dict[str, Student], Dict[str, List[str]], bool]]:
+    """(label, students, teams, generated) - μόνο τα generated μετράνε για κάλυψη και baseline"""
+    corpus = []
+    for n_teams, per_team, seed in GENERATED_CORPUS:
+        students, teams = generate_roster(n_teams, per_team, seed)
+        corpus.append((f"gen-{n_teams}x{per_team}-s{seed}", students, teams, True))
+    
+    for corpus_dir in [CORPUS_DIR] + corpus_dirs:
+        for file_name in sorted(os.listdir(corpus_dir)):
+            if file_name.endswith(('.xlsx', '.tosn')):
+                students, teams = load_recorded(os.path.join(corpus_dir, file_name))
+                corpus.append((file_name, students, teams, False))
+    return corpus
+
+
+def fresh_optimizer(cls, students: Dict[str, Student], teams: Dict[str, List[str]]) -> TeamOptimizer:
+    """Optimizer σε φρέσκο αντίγραφο του roster"""
+    optimizer = cls()
+    optimizer.students = {
+        name: Student(s.name, s.choice, s.gender, s.greek_knowledge, list(s.friends), s.locked)
+        for name, s in students.items()
+    }
+    optimizer.teams = {team: list(names) for team, names in teams.items()}
+    optimizer._build_friend_groups()
+    return optimizer
+
+
+def run_engine(cls, students: Dict[str, Student], teams: Dict[str, List[str]],
+               max_iterations: int, repeat: int, engine: str = 'asymmetric') -> Tuple[List[Dict], Dict, float]:
+    """Καλύτερος χρόνος από `repeat` runs, κάθε φορά σε φρέσκο αντίγραφο του roster"""
+    best = None
+    for _ in range(repeat):
+        optimizer = fresh_optimizer(cls, students, teams)
+        
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            swaps, spreads = optimizer.optimize(max_iterations=max_iterations, engine=engine)
+            elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[2]:
+            best = (swaps, spreads, elapsed)
+    return best
+
+
+def same_swap(ref_swap: Dict, cand_swap: Dict) -> bool:
+    """Ίδιο swap στα πεδία του reference (το candidate μπορεί να αναφέρει επιπλέον πεδία)"""
+    for key, value in ref_swap.items():
+        if key == 'improvement':
+            if any(cand_swap[key].get(k) != v for k, v in value.items()):
+                return False
+        elif cand_swap.get(key) != value:
+            return False
+    return True
+
+
+def same_swaps(reference: List[Dict], candidate: List[Dict]) -> bool:
+    return len(reference) == len(candidate) and all(map(same_swap, reference, candidate))
+
+
+def first_difference(reference: List[Dict], candidate: List[Dict]) -> str:
+    for idx, (ref_swap, cand_swap) in enumerate(zip(reference, candidate), start=1):
+        if not same_swap(ref_swap, cand_swap):
+            return f"swap #{idx}: reference={ref_swap} candidate={cand_swap}"
+    return f"πλήθος swaps: reference={len(reference)} candidate={len(candidate)}"
+
+
+def check_moves(report, max_iterations: int) -> int:
+    """Regression για mixed_moves + transfer_size_tolerance - επιστρέφει το πλήθος αποτυχιών
+    
+    Κάθε swap αναφέρει objective_after· το replay των swaps σε φρέσκο αντίγραφο
+    του roster πρέπει να δίνει ακριβώς αυτή την τιμή μετά από κάθε swap.
+    """
+    failures = 0
+    priorities: Counter = Counter()
+    for n_teams, per_team, seed, lock_empty in MOVES_CORPUS:
+        students, teams = generate_roster(n_teams, per_team, seed)
+        if lock_empty:
+            for team, level in zip(teams, ep3_levels(n_teams, per_team)):
+                if level == 0:
+                    for name in teams[team]:
+                        students[name].locked = True
+        
+        optimizer = fresh_optimizer(TeamOptimizer, students, teams)
+        optimizer.set_moves(MOVES)
+        optimizer.objective = MOVES_OBJECTIVE
+        with contextlib.redirect_stdout(io.StringIO()):
+            swaps, _ = optimizer.optimize(max_iterations=max_iterations, engine='asymmetric')
+        priorities.update(swap['priority'] for swap in swaps)
+        
+        replay = fresh_optimizer(TeamOptimizer, students, teams)
+        replay.objective = MOVES_OBJECTIVE
+        label = f"moves-{n_teams}x{per_team}-s{seed}{'-locked' if lock_empty else ''}"
+        mismatch = None
+        for idx, swap in enumerate(swaps, start=1):
+            replay._apply_swap(swap)
+            if replay.objective_value() != swap['improvement']['objective_after']:
+                mismatch = (f"swap #{idx} ({swap['type']}): objective_after={swap['improvement']['objective_after']} "
+                            f"replay={replay.objective_value()}")
+                break
+        if mismatch is None and replay.teams != optimizer.teams:
+            mismatch = "διαφορετική τελική κατανομή στο replay"
+        
+        report(f"{label:<28} {len(swaps):>6}  {'OK' if mismatch is None else 'MISMATCH'}")
+        if mismatch is not None:
+            failures += 1
+            report(f"    {mismatch}")
+    
+    report("Κάλυψη επιπλέον κινήσεων: " + ', '.join(f"P{p}={priorities[p]}" for p in MOVE_PRIORITIES))
+    missing = [p for p in MOVE_PRIORITIES if not priorities[p]]
+    if missing:
+        failures += 1
+        report(f"❌ Χωρίς swaps: {', '.join(f'P{p}' for p in missing)}")
+    return failures
+
+
+def check_batched(report, max_iterations: int, repeat: int) -> int:
+    """Batched vs multi_metric σε wall time - επιστρέφει το πλήθος αποτυχιών
+    
+    Το batched υπάρχει για να φτάνει στο αποτέλεσμα σε λιγότερο χρόνο από τα
+    iterations ενός swap του multi_metric· αποτυχία αν είναι πιο αργό σε κάποιο roster.
+    """
+    failures = 0
+    report(f"{'batched':<28} {'swaps':>6} {'multi ms':>10} {'batch ms':>10} {'speedup':>8}  result")
+    for n_teams, per_team, seed in BATCHED_CORPUS:
+        students, teams = generate_roster(n_teams, per_team, seed)
+        multi_swaps, _, multi_time = run_engine(TeamOptimizer, students, teams, max_iterations, repeat,
+                                                engine='multi_metric')
+        batch_swaps, _, batch_time = run_engine(TeamOptimizer, students, teams, max_iterations, repeat,
+                                                engine='batched')
+        faster = batch_time < multi_time
+        report(f"{f'batched-{n_teams}x{per_team}-s{seed}':<28} {len(batch_swaps):>6} {multi_time * 1000:>10.1f} "
+               f"{batch_time * 1000:>10.1f} {multi_time / batch_time:>7.2f}x  {'OK' if faster else 'SLOWER'}")
+        if not faster:
+            failures += 1
+    return failures
+
+
+def check_sharded_scaling(report, repeat: int) -> int:
+    """Χρόνος reconciliation ανά iteration σε αυξανόμενα πλήθη τμημάτων - επιστρέφει αποτυχίες
+    
+    Τα shards τρέχουν σειριακά και χρονομετρείται μόνο το _reconcile_shards (καλύτερος
+    χρόνος από `repeat` runs). Ο εκθέτης log(χρόνος)/log(τμήματα) ανάμεσα στο μικρότερο
+    και το μεγαλύτερο πλήθος δεν εξαρτάται από το μηχάνημα.
+    """
+    per_team, seed = SHARDED_ROSTER
+    timings = []
+    report(f"{'sharded':<28} {'swaps':>6} {'rec ms':>10} {'ms/iter':>10}  spreads")
+    for n_teams in SHARDED_TEAMS:
+        students, teams = generate_roster(n_teams, per_team, seed)
+        best = None
+        for _ in range(repeat):
+            optimizer = fresh_optimizer(TeamOptimizer, students, teams)
+            with contextlib.redirect_stdout(io.StringIO()):
+                shards = optimizer._partition_teams(math.ceil(n_teams / SHARD_SIZE))
+                optimizer._run_shards(shards, 'multi_metric', 100, 1, None)
+                started = time.perf_counter()
+                swaps = optimizer._reconcile_shards(shards, 100, None)
+                elapsed = time.perf_counter() - started
+            if best is None or elapsed < best[1]:
+                best = (swaps, elapsed, optimizer.calculate_spreads())
+        swaps, elapsed, spreads = best
+        # +1: το τελευταίο iteration που δεν βρίσκει swap
+        per_iteration = elapsed / (len(swaps) + 1)
+        timings.append(per_iteration)
+        report(f"{f'sharded-{n_teams}x{per_team}-s{seed}':<28} {len(swaps):>6} {elapsed * 1000:>10.1f} "
+               f"{per_iteration * 1000:>10.2f}  {spreads}")
+    
+    exponent = math.log(timings[-1] / timings[0]) / math.log(SHARDED_TEAMS[-1] / SHARDED_TEAMS[0])
+    if exponent > MAX_RECONCILE_EXPONENT:
+        report(f"❌ Reconciliation: εκθέτης {exponent:.2f} (> {MAX_RECONCILE_EXPONENT}) ως προς τα τμήματα")
+        return 1
+    report(f"✅ Reconciliation: εκθέτης {exponent:.2f} (όριο {MAX_RECONCILE_EXPONENT})")
+    return 0
+
+
+def check_concurrent_jobs(report, max_iterations: int) -> int:
+    """Ταυτόσημα jobs στο JobRunner ταυτόχρονα, με κοινό checkpoint path - επιστρέφει αποτυχίες
+    
+    Μόνο ένα job παίρνει το checkpoint· όλα πρέπει να τελειώσουν ('done') χωρίς resume,
+    με το ίδιο αποτέλεσμα, και ο φάκελος να μείνει άδειος (checkpoint, lock, temp αρχεία).
+    """
+    data = roster_workbook(*generate_roster(*JOBS_ROSTER))
+    defaults = TeamOptimizer()
+    failures = 0
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        options = {
+            'engine': 'asymmetric',
+            'targets': (defaults.target_ep3, defaults.target_gender, defaults.target_greek),
+            'max_iterations': max_iterations,
+            'checkpoint_path': os.path.join(checkpoint_dir, 'job.tosn')
+        }
+        # Τα worker processes γράφουν κατευθείαν στο fd 1 (το redirect_stdout δεν τα πιάνει)
+        sys.stdout.flush()
+        saved_stdout = os.dup(1)
+        with open(os.devnull, 'w') as devnull:
+            os.dup2(devnull.fileno(), 1)
+        runner = JobRunner(max_workers=CONCURRENT_JOBS)
+        try:
+            job_ids = [runner.submit(data, options) for _ in range(CONCURRENT_JOBS)]
+            while any(runner.status(job_id)['status'] in ('queued', 'running') for job_id in job_ids):
+                time.sleep(0.05)
+            statuses = [runner.status(job_id) for job_id in job_ids]
+            results = [runner.result(job_id) for job_id in job_ids]
+        finally:
+            runner.shutdown()
+            os.dup2(saved_stdout, 1)
+            os.close(saved_stdout)
+        leftovers = sorted(os.listdir(checkpoint_dir))
+    
+    label = f"jobs-{JOBS_ROSTER[0]}x{JOBS_ROSTER[1]}-s{JOBS_ROSTER[2]}"
+    problems = []
+    for idx, (status, result) in enumerate(zip(statuses, results), start=1):
+        if status['status'] != 'done':
+            problems.append(f"job #{idx}: {status['status']} {status.get('error') or status['message']}")
+        elif result['resumed']:
+            problems.append(f"job #{idx}: resume από checkpoint άλλου job")
+    done = [result for result in results if result is not None]
+    if len({result['snapshot'] for result in done}) > 1:
+        problems.append("διαφορετικά αποτελέσματα ανάμεσα σε ταυτόσημα jobs")
+    if leftovers:
+        problems.append(f"έμειναν αρχεία στον φάκελο checkpoint: {leftovers}")
+    
+    swaps = done[0]['n_swaps'] if done else 0
+    report(f"{f'{label} ×{CONCURRENT_JOBS}':<28} {swaps:>6}  {'OK' if not problems else 'FAILED'}")
+    for problem in problems:
+        failures += 1
+        report(f"    {problem}")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', action='append', default=[],
+                        help="φάκελος με recorded rosters (.xlsx / .tosn), μπορεί να δοθεί πολλές φορές")
+    parser.add_argument('--max-iterations', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3, help="runs ανά engine/roster (κρατάμε τον καλύτερο χρόνο)")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="επιτρεπτή πτώση speedup σε σχέση με το baseline (0.2 = 20%%)")
+    parser.add_argument('--update-baseline', action='store_true', help="αποθήκευση του τρέχοντος speedup ως baseline")
+    parser.add_argument('--anonymise', nargs=2, metavar=('SOURCE', 'TARGET'),
+                        help="ανωνυμοποίηση recorded roster (.xlsx / .tosn) σε snapshot και έξοδος")
+    args = parser.parse_args()
+    
+    if args.anonymise:
+        anonymise(*args.anonymise)
+        return 0
+    
+    lines: List[str] = []
+    
+    def report(text: str = '') -> None:
+        print(text)
+        lines.append(text)
+    
+    failures = 0
+    total_swaps = 0
+    total_students = 0
+    total_ref_time = total_cand_time = 0.0
+    baseline_ref_time = baseline_cand_time = 0.0
+    priorities: Counter = Counter()
+    
+    report(f"{'roster':<28} {'swaps':>6} {'ref ms':>10} {'cand ms':>10} {'speedup':>8}  result")
+    for label, students, teams, generated in build_corpus(args.corpus):
+        ref_swaps, ref_spreads, ref_time = run_engine(ReferenceOptimizer, students, teams,
+                                                      args.max_iterations, args.repeat)
+        cand_swaps, cand_spreads, cand_time = run_engine(TeamOptimizer, students, teams,
+                                                         args.max_iterations, args.repeat)
+        
+        same = same_swaps(ref_swaps, cand_swaps) and ref_spreads == cand_spreads
+        speedup = ref_time / cand_time if cand_time > 0 else float('inf')
+        report(f"{label:<28} {len(cand_swaps):>6} {ref_time * 1000:>10.1f} {cand_time * 1000:>10.1f} "
+               f"{speedup:>7.2f}x  {'OK' if same else 'MISMATCH'}")
+        if not same:
+            failures += 1
+            if ref_spreads != cand_spreads:
+                report(f"    spreads: reference={ref_spreads} candidate={cand_spreads}")
+            report(f"    {first_difference(ref_swaps, cand_swaps)}")
+        
+        total_swaps += len(cand_swaps)
+        if generated:
+            baseline_ref_time += ref_time
+            baseline_cand_time += cand_time
+            priorities.update(swap['priority'] for swap in cand_swaps)
+            if len(cand_swaps) < MIN_SWAPS:
+                failures += 1
+                report(f"    ❌ {len(cand_swaps)} swaps (< {MIN_SWAPS}): το roster δεν ελέγχει αρκετά την ισοδυναμία")
+        total_students += len(students)
+        total_ref_time += ref_time
+        total_cand_time += cand_time
+    
+    report()
+    failures += check_moves(report, args.max_iterations)
+    
+    report()
+    failures += check_batched(report, args.max_iterations, args.repeat)
+    
+    report()
+    failures += check_sharded_scaling(report, args.repeat)
+    
+    report()
+    failures += check_concurrent_jobs(report, args.max_iterations)
+    
+    report()
+    missing = [p for p in PRIORITIES if not priorities[p]]
+    report("Κάλυψη priorities (generated): " + ', '.join(f"P{p}={priorities[p]}" for p in PRIORITIES))
+    if missing:
+        failures += 1
+        report(f"❌ Χωρίς swaps στο generated corpus: {', '.join(f'P{p}' for p in missing)}")
+    
+    # Το baseline αφορά μόνο το σταθερό generated corpus, ώστε να συγκρίνεται πάντα ίδιο φορτίο
+    speedup = baseline_ref_time / baseline_cand_time if baseline_cand_time > 0 else 0.0
+    report(f"Συνολικό speedup: {total_ref_time / total_cand_time:.2f}x | "
+           f"{total_students} μαθητές, {total_swaps} swaps | speedup (generated): {speedup:.2f}x")
+    
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'speedup': round(speedup, 2)}, f, indent=2)
+            f.write('\n')
+        report(f"💾 Νέο baseline: {speedup:.2f}x -> {os.path.basename(BASELINE_PATH)}")
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baseline = json.load(f)
+        floor = baseline['speedup'] * (1 - args.tolerance)
+        if speedup < floor:
+            failures += 1
+            report(f"❌ Speedup {speedup:.2f}x κάτω από το baseline {baseline['speedup']:.2f}x (όριο {floor:.2f}x)")
+        else:
+            report(f"✅ Speedup OK (baseline {baseline['speedup']:.2f}x, όριο {floor:.2f}x)")
+    else:
+        report("⚠️ Δεν υπάρχει baseline - τρέξε με --update-baseline")
+    
+    report('❌ FAILED' if failures else '✅ ALL OK')
+    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
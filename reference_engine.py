@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+"""
+Frozen reference του asymmetric engine (για το bench.py)
+
+Αντίγραφο του _generate_asymmetric_swaps, _calc_asymmetric_improvement, του loop
+του optimize() και όλων των helpers που χρησιμοποιούν, όπως ήταν όταν παγώθηκε.
+ΔΕΝ αλλάζει μαζί με το app.py: κάθε ταχύτερη υλοποίηση στο TeamOptimizer πρέπει
+να διαλέγει ακριβώς τα ίδια swaps με αυτό εδώ.
+"""
+from typing import Dict, List, Tuple, Optional
+
+from app import TeamOptimizer
+
+
+# Οι μετρικές του _targets_met (αντίγραφο του app.METRICS)
+REFERENCE_METRICS = ('ep3', 'boys', 'girls', 'greek_yes')
+
+
+class UnionFind:
+    """Disjoint-set (path halving + union by size) για ομάδες φίλων"""
+    
+    def __init__(self):
+        self.parent: Dict[str, str] = {}
+        self.size: Dict[str, int] = {}
+        
+    def add(self, x: str) -> None:
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            
+    def find(self, x: str) -> str:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+    
+    def union(self, a: str, b: str) -> None:
+        self.add(a)
+        self.add(b)
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        
+    def groups(self) -> Dict[str, List[str]]:
+        """Συνιστώσες με τη σειρά εισαγωγής (και μέσα σε κάθε συνιστώσα)"""
+        result: Dict[str, List[str]] = {}
+        for x in self.parent:
+            result.setdefault(self.find(x), []).append(x)
+        return result
+
+
+class ReferenceOptimizer(TeamOptimizer):
+    """TeamOptimizer με παγωμένο asymmetric engine (loaders/export από το TeamOptimizer)"""
+    
+    def optimize(self, max_iterations: int = 100,
+                 engine: str = 'asymmetric') -> Tuple[List[Dict], Dict]:
+        """Frozen loop του optimize() για engine='asymmetric'"""
+        if engine != 'asymmetric':
+            raise ValueError(f"Το reference υπάρχει μόνο για engine='asymmetric' (όχι '{engine}')")
+        
+        applied_swaps = []
+        
+        for iteration in range(max_iterations):
+            spreads = self.calculate_spreads()
+            
+            if self._targets_met(spreads):
+                break
+            
+            swaps = self._step_asymmetric()
+            
+            if not swaps:
+                break
+            
+            applied_swaps.extend(swaps)
+        
+        final_spreads = self.calculate_spreads()
+        return applied_swaps, final_spreads
+    
+    def calculate_spreads(self) -> Dict[str, int]:
+        """Υπολογισμός spreads"""
+        return self._spreads_from_stats(self._get_team_stats())
+    
+    def _spreads_from_stats(self, stats: Dict) -> Dict[str, int]:
+        """Spreads από έτοιμα team stats (χωρίς νέο πέρασμα μαθητών)"""
+        if not stats:
+            return {'ep3': 0, 'boys': 0, 'girls': 0, 'greek_yes': 0}
+        
+        ep3_vals = [s['ep3'] for s in stats.values()]
+        boys_vals = [s['boys'] for s in stats.values()]
+        girls_vals = [s['girls'] for s in stats.values()]
+        greek_yes_vals = [s['greek_yes'] for s in stats.values()]
+        
+        return {
+            'ep3': max(ep3_vals) - min(ep3_vals),
+            'boys': max(boys_vals) - min(boys_vals),
+            'girls': max(girls_vals) - min(girls_vals),
+            'greek_yes': max(greek_yes_vals) - min(greek_yes_vals)
+        }
+    
+    def _get_team_stats(self) -> Dict:
+        """FIX: Διορθωμένη μέτρηση γλώσσας"""
+        stats = {}
+        for team_name, student_names in self.teams.items():
+            boys = girls = greek_yes = greek_no = ep1 = ep2 = ep3 = 0
+            
+            for name in student_names:
+                if name not in self.students:
+                    continue
+                s = self.students[name]
+                
+                # Gender
+                if s.gender == 'Α':
+                    boys += 1
+                elif s.gender == 'Κ':
+                    girls += 1
+                
+                # FIX: Greek knowledge - ελέγχουμε για 'Ν' (ΝΑΙ)
+                if s.greek_knowledge == 'Ν':
+                    greek_yes += 1
+                elif s.greek_knowledge == 'Ο':
+                    greek_no += 1
+                
+                # Choice
+                if s.choice == 1:
+                    ep1 += 1
+                elif s.choice == 2:
+                    ep2 += 1
+                elif s.choice == 3:
+                    ep3 += 1
+            
+            stats[team_name] = {
+                'boys': boys, 'girls': girls,
+                'greek_yes': greek_yes, 'greek_no': greek_no,
+                'ep1': ep1, 'ep2': ep2, 'ep3': ep3
+            }
+        
+        return stats
+    
+    def _targets_met(self, spreads: Dict[str, int]) -> bool:
+        return all(spreads[m] <= self._metric_target(m) for m in REFERENCE_METRICS)
+    
+    def _metric_target(self, metric: str) -> int:
+        if metric == 'ep3':
+            return self.target_ep3
+        if metric in ('boys', 'girls'):
+            return self.target_gender
+        return self.target_greek
+    
+    def _step_asymmetric(self) -> List[Dict]:
+        """Ένα iteration του αρχικού αλγορίθμου (max/min βάσει ep3)"""
+        stats = self._get_team_stats()
+        ep3_counts = {team: stats[team]['ep3'] for team in stats.keys()}
+        
+        max_team = max(ep3_counts.items(), key=lambda x: x[1])[0]
+        min_team = min(ep3_counts.items(), key=lambda x: x[1])[0]
+        
+        if ep3_counts[max_team] - ep3_counts[min_team] <= self.target_ep3:
+            return []
+        
+        all_swaps = self._generate_asymmetric_swaps(max_team, min_team)
+        
+        if not all_swaps:
+            return []
+        
+        best_swap = self._select_best_swap(all_swaps)
+        
+        if not best_swap:
+            return []
+        
+        self._apply_swap(best_swap)
+        return [best_swap]
+    
+    def _generate_asymmetric_swaps(self, max_team: str, min_team: str) -> List[Dict]:
+        """Γέννηση asymmetric swaps με 8 priorities"""
+        swaps = []
+        
+        max_solos_ep3 = self._get_solos_with_ep3(max_team)
+        max_pairs_ep3 = self._get_groups_with_ep3(max_team)
+        min_solos_non_ep3 = self._get_solos_without_ep3(min_team)
+        # Ομάδες του min τμήματος ανά μέγεθος: ανταλλαγή μόνο ισομεγεθών ομάδων
+        min_groups_by_size = self._groups_by_size(self._get_groups(min_team))
+        
+        # P1: Solo(ep3) ↔ Solo(ep1/2), ίδιο φύλο+γλώσσα
+        for solo_max in max_solos_ep3:
+            for solo_min in min_solos_non_ep3:
+                if (solo_max['student'].gender == solo_min['student'].gender and
+                    solo_max['student'].greek_knowledge == solo_min['student'].greek_knowledge):
+                    
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, [solo_max['name']],
+                        min_team, [solo_min['name']]
+                    )
+                    
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': 'Solo(ep3)↔Solo(ep1/2)-P1',
+                            'from_team': max_team,
+                            'students_out': [solo_max['name']],
+                            'to_team': min_team,
+                            'students_in': [solo_min['name']],
+                            'improvement': improvement,
+                            'priority': 1
+                        })
+        
+        # P2: Δυάδα(ep3) ↔ Δυάδα(ep1/2), ίδιο φύλο+γλώσσα
+        for pair_max in max_pairs_ep3:
+            for pair_min in min_groups_by_size.get(len(pair_max['names']), []):
+                ep3_count_max = sum(1 for s in pair_max['students'] if s.choice == 3)
+                ep3_count_min = sum(1 for s in pair_min['students'] if s.choice == 3)
+                
+                if ep3_count_max <= ep3_count_min:
+                    continue
+                
+                genders_max = {s.gender for s in pair_max['students']}
+                genders_min = {s.gender for s in pair_min['students']}
+                greeks_max = {s.greek_knowledge for s in pair_max['students']}
+                greeks_min = {s.greek_knowledge for s in pair_min['students']}
+                
+                if (len(genders_max) == 1 and len(genders_min) == 1 and genders_max == genders_min and
+                    len(greeks_max) == 1 and len(greeks_min) == 1 and greeks_max == greeks_min):
+                    
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, list(pair_max['names']),
+                        min_team, list(pair_min['names'])
+                    )
+                    
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': f"{self._unit_label(pair_max)}({pair_max['ep_combo']})↔{self._unit_label(pair_min)}({pair_min['ep_combo']})-P2",
+                            'from_team': max_team,
+                            'students_out': list(pair_max['names']),
+                            'to_team': min_team,
+                            'students_in': list(pair_min['names']),
+                            'improvement': improvement,
+                            'priority': 2
+                        })
+        
+        # P3-8: Χαλάρωση περιορισμών (όπως πριν)
+        for solo_max in max_solos_ep3:
+            for solo_min in min_solos_non_ep3:
+                if solo_max['student'].gender == solo_min['student'].gender:
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, [solo_max['name']],
+                        min_team, [solo_min['name']]
+                    )
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': 'Solo(ep3)↔Solo(ep1/2)-P3',
+                            'from_team': max_team,
+                            'students_out': [solo_max['name']],
+                            'to_team': min_team,
+                            'students_in': [solo_min['name']],
+                            'improvement': improvement,
+                            'priority': 3
+                        })
+        
+        for pair_max in max_pairs_ep3:
+            for pair_min in min_groups_by_size.get(len(pair_max['names']), []):
+                ep3_count_max = sum(1 for s in pair_max['students'] if s.choice == 3)
+                ep3_count_min = sum(1 for s in pair_min['students'] if s.choice == 3)
+                if ep3_count_max <= ep3_count_min:
+                    continue
+                genders_max = {s.gender for s in pair_max['students']}
+                genders_min = {s.gender for s in pair_min['students']}
+                if len(genders_max) == 1 and len(genders_min) == 1 and genders_max == genders_min:
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, list(pair_max['names']),
+                        min_team, list(pair_min['names'])
+                    )
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': f"{self._unit_label(pair_max)}({pair_max['ep_combo']})↔{self._unit_label(pair_min)}({pair_min['ep_combo']})-P4",
+                            'from_team': max_team,
+                            'students_out': list(pair_max['names']),
+                            'to_team': min_team,
+                            'students_in': list(pair_min['names']),
+                            'improvement': improvement,
+                            'priority': 4
+                        })
+        
+        for solo_max in max_solos_ep3:
+            for solo_min in min_solos_non_ep3:
+                if solo_max['student'].greek_knowledge == solo_min['student'].greek_knowledge:
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, [solo_max['name']],
+                        min_team, [solo_min['name']]
+                    )
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': 'Solo(ep3)↔Solo(ep1/2)-P5',
+                            'from_team': max_team,
+                            'students_out': [solo_max['name']],
+                            'to_team': min_team,
+                            'students_in': [solo_min['name']],
+                            'improvement': improvement,
+                            'priority': 5
+                        })
+        
+        for pair_max in max_pairs_ep3:
+            for pair_min in min_groups_by_size.get(len(pair_max['names']), []):
+                ep3_count_max = sum(1 for s in pair_max['students'] if s.choice == 3)
+                ep3_count_min = sum(1 for s in pair_min['students'] if s.choice == 3)
+                if ep3_count_max <= ep3_count_min:
+                    continue
+                greeks_max = {s.greek_knowledge for s in pair_max['students']}
+                greeks_min = {s.greek_knowledge for s in pair_min['students']}
+                if len(greeks_max) == 1 and len(greeks_min) == 1 and greeks_max == greeks_min:
+                    improvement = self._calc_asymmetric_improvement(
+                        max_team, list(pair_max['names']),
+                        min_team, list(pair_min['names'])
+                    )
+                    if improvement['improves']:
+                        swaps.append({
+                            'type': f"{self._unit_label(pair_max)}({pair_max['ep_combo']})↔{self._unit_label(pair_min)}({pair_min['ep_combo']})-P6",
+                            'from_team': max_team,
+                            'students_out': list(pair_max['names']),
+                            'to_team': min_team,
+                            'students_in': list(pair_min['names']),
+                            'improvement': improvement,
+                            'priority': 6
+                        })
+        
+        for solo_max in max_solos_ep3:
+            for solo_min in min_solos_non_ep3:
+                improvement = self._calc_asymmetric_improvement(
+                    max_team, [solo_max['name']],
+                    min_team, [solo_min['name']]
+                )
+                if improvement['improves']:
+                    swaps.append({
+                        'type': f"Solo({solo_max['student'].choice})↔Solo({solo_min['student'].choice})-P7",
+                        'from_team': max_team,
+                        'students_out': [solo_max['name']],
+                        'to_team': min_team,
+                        'students_in': [solo_min['name']],
+                        'improvement': improvement,
+                        'priority': 7
+                    })
+        
+        for pair_max in max_pairs_ep3:
+            for pair_min in min_groups_by_size.get(len(pair_max['names']), []):
+                ep3_count_max = sum(1 for s in pair_max['students'] if s.choice == 3)
+                ep3_count_min = sum(1 for s in pair_min['students'] if s.choice == 3)
+                if ep3_count_max <= ep3_count_min:
+                    continue
+                improvement = self._calc_asymmetric_improvement(
+                    max_team, list(pair_max['names']),
+                    min_team, list(pair_min['names'])
+                )
+                if improvement['improves']:
+                    swaps.append({
+                        'type': f"{self._unit_label(pair_max)}({pair_max['ep_combo']})↔{self._unit_label(pair_min)}({pair_min['ep_combo']})-P8",
+                        'from_team': max_team,
+                        'students_out': list(pair_max['names']),
+                        'to_team': min_team,
+                        'students_in': list(pair_min['names']),
+                        'improvement': improvement,
+                        'priority': 8
+                    })
+        
+        return swaps
+    
+    def _get_solos_with_ep3(self, team_name: str) -> List[Dict]:
+        return [s for s in self._get_solos(team_name) if s['student'].choice == 3]
+    
+    def _get_solos_without_ep3(self, team_name: str) -> List[Dict]:
+        return [s for s in self._get_solos(team_name) if s['student'].choice != 3]
+    
+    def _get_groups_with_ep3(self, team_name: str) -> List[Dict]:
+        return [g for g in self._get_groups(team_name)
+                if any(s.choice == 3 for s in g['students'])]
+    
+    def _get_groups(self, team_name: str) -> List[Dict]:
+        """Μετακινούμενες ομάδες φίλων (μέγεθος >= 2) του τμήματος"""
+        groups = []
+        for unit in self._get_team_units(team_name):
+            if len(unit) < 2:
+                continue
+            students = [self.students[name] for name in unit]
+            if any(s.locked for s in students):
+                continue
+            groups.append({
+                'names': unit,
+                'students': students,
+                'ep_combo': ','.join(str(s.choice) for s in students)
+            })
+        return groups
+    
+    def _groups_by_size(self, groups: List[Dict]) -> Dict[int, List[Dict]]:
+        by_size: Dict[int, List[Dict]] = {}
+        for group in groups:
+            by_size.setdefault(len(group['names']), []).append(group)
+        return by_size
+    
+    def _unit_label(self, group: Dict) -> str:
+        return 'Δυάδα' if len(group['names']) == 2 else 'Ομάδα'
+    
+    def _get_solos(self, team_name: str) -> List[Dict]:
+        """Όλοι οι μη κλειδωμένοι μαθητές χωρίς φίλο στο τμήμα"""
+        solos = []
+        for unit in self._get_team_units(team_name):
+            if len(unit) != 1:
+                continue
+            student = self.students[unit[0]]
+            if not student.locked:
+                solos.append({'name': unit[0], 'student': student})
+        return solos
+    
+    def _get_team_units(self, team_name: str) -> List[List[str]]:
+        """Συνεκτικές συνιστώσες φίλων μέσα στο τμήμα (index ανά τμήμα)
+        
+        Κάθε συνιστώσα είναι λίστα ονομάτων με τη σειρά του τμήματος και οι
+        συνιστώσες ταξινομούνται κατά τη θέση του πρώτου μέλους τους.
+        Το index ξαναχτίζεται μόνο όταν αλλάξει η σύνθεση του τμήματος.
+        """
+        members = tuple(self.teams[team_name])
+        cached = self._unit_index.get(team_name)
+        if cached is not None and cached[0] == members:
+            return cached[1]
+        
+        if self._friend_adj is None:
+            self._build_friend_groups()
+        
+        present = [name for name in members if name in self.students]
+        in_team = set(present)
+        uf = UnionFind()
+        for name in present:
+            uf.add(name)
+        for name in present:
+            for friend in self._friend_adj.get(name, ()):
+                if friend in in_team:
+                    uf.union(name, friend)
+        
+        units = list(uf.groups().values())
+        self._unit_index[team_name] = (members, units)
+        return units
+    
+    def _build_friend_groups(self) -> None:
+        """Union-find των φίλων σε ομάδες (μία φορά μετά τη φόρτωση)"""
+        adj: Dict[str, set] = {name: set() for name in self.students}
+        uf = UnionFind()
+        for name in self.students:
+            uf.add(name)
+        for name, student in self.students.items():
+            for friend in student.friends:
+                if friend in self.students and friend != name:
+                    adj[name].add(friend)
+                    adj[friend].add(name)
+                    uf.union(name, friend)
+        
+        self._friend_adj = adj
+        self.friend_groups = {root: members for root, members in uf.groups().items() if len(members) > 1}
+        self._unit_index = {}
+    
+    def _calc_asymmetric_improvement(self, team_high: str, names_out: List[str],
+                                      team_low: str, names_in: List[str]) -> Dict:
+        """FIX: Διορθωμένος υπολογισμός με 'Ν'/'Ο'"""
+        stats_before = self._get_team_stats()
+        stats_after = {k: v.copy() for k, v in stats_before.items()}
+        
+        for name in names_out:
+            if name in self.students:
+                s = self.students[name]
+                if s.choice == 3: stats_after[team_high]['ep3'] -= 1
+                if s.gender == 'Α': stats_after[team_high]['boys'] -= 1
+                elif s.gender == 'Κ': stats_after[team_high]['girls'] -= 1
+                if s.greek_knowledge == 'Ν': stats_after[team_high]['greek_yes'] -= 1
+        
+        for name in names_in:
+            if name in self.students:
+                s = self.students[name]
+                if s.choice == 3: stats_after[team_high]['ep3'] += 1
+                if s.gender == 'Α': stats_after[team_high]['boys'] += 1
+                elif s.gender == 'Κ': stats_after[team_high]['girls'] += 1
+                if s.greek_knowledge == 'Ν': stats_after[team_high]['greek_yes'] += 1
+        
+        for name in names_in:
+            if name in self.students:
+                s = self.students[name]
+                if s.choice == 3: stats_after[team_low]['ep3'] -= 1
+                if s.gender == 'Α': stats_after[team_low]['boys'] -= 1
+                elif s.gender == 'Κ': stats_after[team_low]['girls'] -= 1
+                if s.greek_knowledge == 'Ν': stats_after[team_low]['greek_yes'] -= 1
+        
+        for name in names_out:
+            if name in self.students:
+                s = self.students[name]
+                if s.choice == 3: stats_after[team_low]['ep3'] += 1
+                if s.gender == 'Α': stats_after[team_low]['boys'] += 1
+                elif s.gender == 'Κ': stats_after[team_low]['girls'] += 1
+                if s.greek_knowledge == 'Ν': stats_after[team_low]['greek_yes'] += 1
+        
+        ep3_before = max(s['ep3'] for s in stats_before.values()) - min(s['ep3'] for s in stats_before.values())
+        ep3_after = max(s['ep3'] for s in stats_after.values()) - min(s['ep3'] for s in stats_after.values())
+        
+        boys_before = max(s['boys'] for s in stats_before.values()) - min(s['boys'] for s in stats_before.values())
+        boys_after = max(s['boys'] for s in stats_after.values()) - min(s['boys'] for s in stats_after.values())
+        
+        girls_before = max(s['girls'] for s in stats_before.values()) - min(s['girls'] for s in stats_before.values())
+        girls_after = max(s['girls'] for s in stats_after.values()) - min(s['girls'] for s in stats_after.values())
+        
+        greek_before = max(s['greek_yes'] for s in stats_before.values()) - min(s['greek_yes'] for s in stats_before.values())
+        greek_after = max(s['greek_yes'] for s in stats_after.values()) - min(s['greek_yes'] for s in stats_after.values())
+        
+        delta_ep3 = ep3_before - ep3_after
+        delta_boys = boys_before - boys_after
+        delta_girls = girls_before - girls_after
+        delta_greek = greek_before - greek_after
+        
+        improves = delta_ep3 > 0 or (delta_ep3 == 0 and (delta_boys > 0 or delta_girls > 0 or delta_greek > 0))
+        
+        return {
+            'improves': improves,
+            'delta_ep3': delta_ep3,
+            'delta_boys': delta_boys,
+            'delta_girls': delta_girls,
+            'delta_greek': delta_greek,
+            'ep3_before': ep3_before,
+            'ep3_after': ep3_after
+        }
+    
+    def _select_best_swap(self, swaps: List[Dict]) -> Optional[Dict]:
+        if not swaps:
+            return None
+        
+        swaps.sort(
+            key=lambda x: (
+                -x['improvement']['delta_ep3'],
+                -(x['improvement']['delta_boys'] + x['improvement']['delta_girls']),
+                -x['improvement']['delta_greek'],
+                x['priority']
+            )
+        )
+        
+        return swaps[0]
+    
+    def _apply_swap(self, swap: Dict) -> None:
+        from_team = swap['from_team']
+        to_team = swap['to_team']
+        students_out = swap['students_out']
+        students_in = swap['students_in']
+        
+        for name in students_out:
+            if name in self.teams[from_team]:
+                self.teams[from_team].remove(name)
+        
+        for name in students_in:
+            if name in self.teams[to_team]:
+                self.teams[to_team].remove(name)
+        
+        for name in students_out:
+            self.teams[to_team].append(name)
+        
+        for name in students_in:
+            self.teams[from_team].append(name)